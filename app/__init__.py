@@ -1,6 +1,7 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from config import BaseConfig
+from app.services.registry import ServiceRegistry
 
 db = SQLAlchemy()
 
@@ -10,6 +11,8 @@ def create_app(config_class=BaseConfig):
     
     # Initialize extensions
     db.init_app(app)
+    # Services are built on first use, see app/services/registry.py
+    ServiceRegistry(app)
     
     with app.app_context():
         # Import routes
@@ -0,0 +1,36 @@
+from datetime import datetime
+from app import db
+
+class Alert(db.Model):
+    """Standing price alert on an entry/SL/TP setup"""
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(20), nullable=False, index=True)
+    direction = db.Column(db.String(10), nullable=False)  # LONG, SHORT
+    entry_price = db.Column(db.Float, nullable=False)
+    stop_loss = db.Column(db.Float, nullable=False)
+    take_profit = db.Column(db.Float, nullable=False)
+    risk_reward_ratio = db.Column(db.Float)
+    status = db.Column(db.String(20), nullable=False, default='active')  # active, triggered, won, lost, cancelled
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    triggered_at = db.Column(db.DateTime)
+    exit_price = db.Column(db.Float)
+    closed_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Alert {self.symbol} {self.direction} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'symbol': self.symbol,
+            'direction': self.direction,
+            'entry_price': self.entry_price,
+            'stop_loss': self.stop_loss,
+            'take_profit': self.take_profit,
+            'risk_reward_ratio': self.risk_reward_ratio,
+            'status': self.status,
+            'created_at': self.created_at.isoformat(),
+            'triggered_at': self.triggered_at.isoformat() if self.triggered_at else None,
+            'exit_price': self.exit_price,
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None
+        }
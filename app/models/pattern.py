@@ -8,10 +8,13 @@ class Pattern(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     symbol = db.Column(db.String(20), nullable=False)
     pattern_type = db.Column(db.String(50), nullable=False)
+    timeframe = db.Column(db.String(10), nullable=False, default='1h')
     price = db.Column(db.Float, nullable=False)
     confidence = db.Column(db.Float, nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     description = db.Column(db.Text)
+    # Open times (ms) of the formation's pivots, comma separated; empty when unknown
+    anchor = db.Column(db.String(100), nullable=False, default='')
     
     # Retest information
     retest_status = db.Column(db.String(20), nullable=False, default='none')  # none, pending, confirmed, failed
@@ -25,24 +28,33 @@ class Pattern(db.Model):
     stop_loss = db.Column(db.Float)
     risk_reward_ratio = db.Column(db.Float)
     
-    # Unique constraint to prevent duplicates within time window
+    # Trade outcome
+    outcome_status = db.Column(db.String(20), nullable=False, default='open')  # open, filled, won, lost
+    filled_at = db.Column(db.DateTime)
+    exit_price = db.Column(db.Float)
+    closed_at = db.Column(db.DateTime)
+    
+    # Unique constraint to prevent duplicates within time window; the anchor
+    # keeps distinct formations of one type (exhaustive mode) apart
     __table_args__ = (
-        db.UniqueConstraint('symbol', 'pattern_type', 'timestamp', 
-                           name='_symbol_pattern_timestamp_uc'),
+        db.UniqueConstraint('symbol', 'pattern_type', 'timeframe', 'timestamp', 'anchor',
+                           name='_symbol_pattern_timeframe_timestamp_anchor_uc'),
     )
 
     def __repr__(self):
-        return f'<Pattern {self.symbol} {self.pattern_type}>'
+        return f'<Pattern {self.symbol} {self.pattern_type} {self.timeframe}>'
 
     def to_dict(self):
         return {
             'id': self.id,
             'symbol': self.symbol,
             'pattern_type': self.pattern_type,
+            'timeframe': self.timeframe,
             'price': self.price,
             'confidence': self.confidence,
             'timestamp': self.timestamp.isoformat(),
             'description': self.description,
+            'anchor': self.anchor,
             'entry_price': self.entry_price,
             'take_profit': self.take_profit,
             'stop_loss': self.stop_loss,
@@ -50,7 +62,11 @@ class Pattern(db.Model):
             'retest_status': self.retest_status,
             'retest_price': self.retest_price,
             'retest_timestamp': self.retest_timestamp.isoformat() if self.retest_timestamp else None,
-            'retest_description': self.retest_description
+            'retest_description': self.retest_description,
+            'outcome_status': self.outcome_status,
+            'filled_at': self.filled_at.isoformat() if self.filled_at else None,
+            'exit_price': self.exit_price,
+            'closed_at': self.closed_at.isoformat() if self.closed_at else None
         }
 
     @staticmethod
@@ -0,0 +1,47 @@
+from datetime import datetime
+from app import db
+
+class ScanJob(db.Model):
+    """One shard of a scan cycle, claimed by a scanner worker under a lease"""
+    id = db.Column(db.Integer, primary_key=True)
+    cycle = db.Column(db.Integer, nullable=False)
+    shard = db.Column(db.Integer, nullable=False)
+    symbols = db.Column(db.Text, nullable=False)  # comma separated
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending, running, done, failed
+    worker = db.Column(db.String(100))
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    lease_until = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    patterns = db.Column(db.Integer)  # new patterns stored by the job
+    error = db.Column(db.Text)
+
+    __table_args__ = (
+        db.UniqueConstraint('cycle', 'shard', name='_cycle_shard_uc'),
+    )
+
+    def __repr__(self):
+        return f'<ScanJob {self.cycle}/{self.shard} {self.status}>'
+
+    def symbol_list(self):
+        return [s for s in self.symbols.split(',') if s]
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'cycle': self.cycle,
+            'shard': self.shard,
+            'symbols': len(self.symbol_list()),
+            'status': self.status,
+            'worker': self.worker,
+            'attempts': self.attempts,
+            'lease_until': self.lease_until.isoformat() if self.lease_until else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'patterns': self.patterns,
+            'error': self.error
+        }
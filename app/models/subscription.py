@@ -0,0 +1,44 @@
+from datetime import datetime
+from app import db
+
+# Filter columns holding comma separated values; empty means any
+FILTER_FIELDS = {
+    'symbol': 'symbols',
+    'pattern_type': 'pattern_types',
+    'timeframe': 'timeframes',
+    'direction': 'directions',
+}
+
+class Subscription(db.Model):
+    """Telegram chat receiving the new patterns that pass its filters"""
+    id = db.Column(db.Integer, primary_key=True)
+    chat_id = db.Column(db.String(50), nullable=False, index=True)
+    symbols = db.Column(db.Text)  # e.g. BTCUSDT,ETHUSDT
+    pattern_types = db.Column(db.Text)  # e.g. double_top,bull_flag
+    timeframes = db.Column(db.Text)  # e.g. 1h,4h
+    directions = db.Column(db.Text)  # LONG, SHORT
+    min_confidence = db.Column(db.Float, nullable=False, default=0.0)
+    min_risk_reward = db.Column(db.Float)
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Subscription {self.chat_id}>'
+
+    def values(self, field):
+        """Accepted values of a filter field (``symbol``, ...); empty for any"""
+        value = getattr(self, FILTER_FIELDS[field])
+        return [v.strip() for v in value.split(',') if v.strip()] if value else []
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'chat_id': self.chat_id,
+            'min_confidence': self.min_confidence,
+            'min_risk_reward': self.min_risk_reward,
+            'active': self.active,
+            'created_at': self.created_at.isoformat()
+        }
+        for field, column in FILTER_FIELDS.items():
+            data[column] = self.values(field)
+        return data
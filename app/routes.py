@@ -1,9 +1,10 @@
-from flask import render_template, jsonify, request
+from flask import render_template, jsonify, request, Response
 from app import db
 from app.models.pattern import Pattern
-from app.services.binance_service import BinanceService
-from app.services.pattern_analyzer import PatternAnalyzer
-from app.services.telegram_service import TelegramService
+from app.models.alert import Alert
+from app.models.subscription import Subscription, FILTER_FIELDS
+from app.models.scan_job import ScanJob
+from app.services.registry import get_service
 from datetime import datetime, timedelta
 import threading
 import time
@@ -13,9 +14,6 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-binance_service = BinanceService()
-pattern_analyzer = PatternAnalyzer()
-telegram_service = TelegramService()
 background_thread = None
 
 def send_periodic_notifications(app):
@@ -35,6 +33,7 @@ def send_periodic_notifications(app):
                 if top_patterns:
                     top_notifications = [(p.symbol, {
                         'pattern_type': p.pattern_type,
+                        'timeframe': p.timeframe,
                         'confidence': p.confidence,
                         'description': p.description,
                         'entry_price': p.entry_price,
@@ -44,7 +43,7 @@ def send_periodic_notifications(app):
                     }) for p in top_patterns]
                     
                     logger.info(f"Sending hourly top 5 patterns notification at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    telegram_service.send_batch_notification(top_notifications)
+                    get_service('telegram').send_batch_notification(top_notifications)
                 
             except Exception as e:
                 logger.error(f"Error sending periodic notifications: {e}")
@@ -55,96 +54,93 @@ def send_periodic_notifications(app):
 
 def scan_patterns(app):
     """Background task to scan for patterns"""
+    # The scanner pulls in numpy/pandas; load it with the first scan, not at boot
+    from app.services.scanner import run_scan_cycle
     with app.app_context():
+        cycle = 0
         while True:
             try:
-                # Cleanup old patterns
-                Pattern.cleanup_old_patterns(hours=24)
-                logger.info("Cleaned up old patterns")
-                
-                # Get top symbols
-                symbols = binance_service.get_top_symbols()
-                logger.info(f"Analyzing {len(symbols)} symbols")
-                
-                # Initialize notifications list
-                notifications = []
-                
-                for symbol in symbols:
-                    try:
-                        # Get historical data
-                        df = binance_service.get_klines(symbol)
-                        if df is None:
-                            continue
-                            
-                        # Add technical indicators
-                        df = binance_service.add_technical_indicators(df)
-                        
-                        # Analyze patterns
-                        patterns = pattern_analyzer.analyze_all_patterns(df)
-                        current_price = binance_service.get_current_price(symbol)
-                        
-                        if patterns and current_price:
-                            for pattern in patterns:
-                                # Check for existing pattern
-                                cutoff = datetime.utcnow() - timedelta(hours=1)
-                                existing = Pattern.query.filter(
-                                    Pattern.symbol == symbol,
-                                    Pattern.pattern_type == pattern['pattern_type'],
-                                    Pattern.timestamp > cutoff
-                                ).first()
-                                
-                                if existing is None:
-                                    # Save to database
-                                    db_pattern = Pattern(
-                                        symbol=symbol,
-                                        pattern_type=pattern['pattern_type'],
-                                        price=current_price,
-                                        confidence=pattern['confidence'],
-                                        description=pattern['description']
-                                    )
-                                    db.session.add(db_pattern)
-                                    logger.info(f"New pattern detected: {symbol} - {pattern['pattern_type']}")
-                                    
-                                    # Add to notifications list for new patterns
-                                    notifications.append((symbol, pattern))
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing symbol {symbol}: {e}")
-                        continue
-                
-                try:
-                    # Commit all changes
-                    db.session.commit()
-                    logger.info(f"Found {len(notifications)} new patterns")
-                    
-                    # Get top 5 patterns from last 24 hours by confidence
-                    cutoff = datetime.utcnow() - timedelta(hours=24)
-                    top_patterns = Pattern.query.filter(
-                        Pattern.timestamp >= cutoff
-                    ).order_by(
-                        Pattern.confidence.desc()
-                    ).limit(5).all()
-                    
-                    # Format patterns for notification
-                    if top_patterns:
-                        top_notifications = [(p.symbol, {
-                            'pattern_type': p.pattern_type,
-                            'confidence': p.confidence,
-                            'description': p.description
-                        }) for p in top_patterns]
-                        
-                        logger.info(f"Sending top 5 patterns by confidence")
-                        telegram_service.send_batch_notification(top_notifications)
-                except Exception as e:
-                    logger.error(f"Error committing changes: {e}")
-                    db.session.rollback()
-                
+                symbols = None
+                scheduler = None
+                if app.config['SCAN_ADAPTIVE']:
+                    # Hot symbols are rescanned often, cold ones rarely
+                    scheduler = get_service('scheduler')
+                    symbols = adaptive_symbols(app, scheduler)
+                elif app.config['UNIVERSE_MODE']:
+                    # Each tier is rescanned at its own frequency
+                    symbols = get_service('universe').due(cycle)
+                if symbols == []:
+                    logger.info("No symbols due for a scan")
+                elif app.config['SCAN_QUEUE']:
+                    publish_scan_jobs(app, symbols)
+                else:
+                    run_scan_cycle(
+                        get_service('binance'),
+                        get_service('pattern_analyzer'),
+                        get_service('telegram'),
+                        symbols=symbols,
+                        kline_cache=get_service('kline_cache'),
+                        timeframes=app.config['SCAN_TIMEFRAMES'],
+                        retest_engine=get_service('retest_engine'),
+                        outcome_tracker=get_service('outcome_tracker'),
+                        subscriptions=get_service('subscriptions'),
+                        notification_queue=get_service('notification_queue'),
+                        fetch_workers=app.config['SCAN_FETCH_WORKERS'],
+                        scheduler=scheduler
+                    )
             except Exception as e:
                 logger.error(f"Error in pattern scanning: {e}")
+            cycle += 1
                 
-            # Sleep for 1 minute
-            logger.info("Sleeping for 1 minute before next scan")
-            time.sleep(3600)
+            interval = app.config['SCAN_TICK'] if app.config['SCAN_ADAPTIVE'] else app.config['SCAN_INTERVAL']
+            logger.info(f"Sleeping for {interval} seconds before next scan")
+            time.sleep(interval)
+
+def adaptive_symbols(app, scheduler):
+    """Symbols of the scanned universe that the scheduler finds due"""
+    from app.services.scheduler import open_entries
+    if app.config['UNIVERSE_MODE']:
+        candidates = get_service('universe').ranked()
+    else:
+        # The 24h ticker is the heaviest request of a cycle: refresh it on a
+        # TTL and charge it to the scan budget
+        candidates = scheduler.candidates(get_service('binance').get_top_symbols)
+    scheduler.set_entries(open_entries())
+    return scheduler.due(candidates)
+
+def publish_scan_jobs(app, symbols=None):
+    """Queue one scan cycle as shards for the scanner workers"""
+    queue = get_service('job_queue')
+    unfinished = queue.unfinished()
+    if unfinished:
+        # Workers are behind; don't pile up cycles
+        logger.warning(f"Skipping scan cycle: {unfinished} scan jobs still queued")
+        return None
+    queue.purge(hours=24)
+    if symbols is None:
+        symbols = get_service('binance').get_top_symbols()
+    return queue.publish(symbols, app.config['SCAN_SHARD_SIZE'])
+
+def alert_book():
+    """The alert book of the current app, loaded from the database on first use"""
+    book = get_service('alert_book')
+    if not book.loaded:
+        book.load()
+    return book
+
+def poll_prices(app):
+    """Background task matching standing alerts against live prices"""
+    with app.app_context():
+        while True:
+            try:
+                book = alert_book()
+                if len(book):
+                    prices = get_service('binance').get_prices(book.book.symbols())
+                    book.on_prices(prices)
+                    book.flush()
+            except Exception as e:
+                logger.error(f"Error polling prices: {e}")
+            time.sleep(app.config['ALERT_POLL_INTERVAL'])
 
 def cleanup_background_thread():
     """Cleanup function to stop background thread when app stops"""
@@ -153,6 +149,12 @@ def cleanup_background_thread():
         logger.info("Cleaning up background thread")
         background_thread.join(timeout=1)
 
+def win_rate(patterns):
+    """Share of resolved setups that hit take profit"""
+    won = sum(1 for p in patterns if p.outcome_status == 'won')
+    lost = sum(1 for p in patterns if p.outcome_status == 'lost')
+    return won / (won + lost) if won + lost else None
+
 def init_routes(app):
     @app.route('/')
     def index():
@@ -169,6 +171,10 @@ def init_routes(app):
             notify_thread = threading.Thread(target=send_periodic_notifications, args=(app,), daemon=True)
             notify_thread.start()
             
+            # Thread matching alerts against live prices
+            price_thread = threading.Thread(target=poll_prices, args=(app,), daemon=True)
+            price_thread.start()
+            
             background_thread = scan_thread  # Keep reference for cleanup
             # Register cleanup function
             atexit.register(cleanup_background_thread)
@@ -188,7 +194,8 @@ def init_routes(app):
                 'total_patterns': total_patterns,
                 'recent_patterns': len(patterns),
                 'active_coins': len(set(p.symbol for p in patterns)),
-                'accuracy_rate': sum(1 for p in patterns if p.confidence >= 0.8) / len(patterns) if patterns else 0
+                'accuracy_rate': sum(1 for p in patterns if p.confidence >= 0.8) / len(patterns) if patterns else 0,
+                'win_rate': win_rate(patterns)
             }
             
             logger.info(f"Retrieved {len(patterns)} patterns. Total in DB: {total_patterns}")
@@ -200,6 +207,92 @@ def init_routes(app):
             logger.error(f"Error getting patterns: {e}")
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/api/analyze/<symbol>')
+    def analyze_symbol(symbol):
+        """Analyze one symbol on demand, cached until its candle closes"""
+        try:
+            interval = request.args.get('interval', '1h')
+            result = get_service('analysis_cache').get(symbol.upper(), interval)
+            return jsonify(result)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            logger.error(f"Error analyzing {symbol}: {e}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/klines/<symbol>')
+    def get_klines(symbol):
+        """Cached candles (``from``/``to`` in epoch seconds) and pattern overlays"""
+        # chart_data pulls in numpy/pandas; keep it out of worker boot
+        from app.services.chart_data import encode, compress
+        try:
+            start = request.args.get('from', type=int)
+            end = request.args.get('to', type=int)
+            payload = get_service('chart_data').payload(
+                symbol.upper(),
+                interval=request.args.get('interval'),
+                start=start,
+                end=end,
+                patterns=request.args.get('patterns', '1') != '0'
+            )
+            if payload is None:
+                return jsonify({'error': f'No cached or stored klines for {symbol}'}), 404
+            
+            body, mimetype = encode(payload, request.args.get('format', 'json'))
+            response = Response(body, mimetype=mimetype)
+            if 'gzip' in request.accept_encodings:
+                body, compressed = compress(body)
+                if compressed:
+                    response.set_data(body)
+                    response.headers['Content-Encoding'] = 'gzip'
+            response.vary.add('Accept-Encoding')
+            return response
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except ImportError:
+            return jsonify({'error': 'msgpack is not installed'}), 406
+        except Exception as e:
+            logger.error(f"Error getting klines for {symbol}: {e}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/stats/cache')
+    def cache_stats():
+        """Memory of cached kline histories (bytes per symbol) and cache counters"""
+        services = app.extensions['services']
+        stats = {}
+        if services.is_loaded('kline_cache'):
+            kline_cache = services.get('kline_cache')
+            stats['kline_cache'] = dict(kline_cache.summary(), usage=kline_cache.memory_usage())
+        if services.is_loaded('analysis_cache'):
+            stats['analysis_cache'] = services.get('analysis_cache').stats()
+        if services.is_loaded('pattern_analyzer'):
+            analyzer = services.get('pattern_analyzer')
+            if hasattr(analyzer, 'stats'):
+                stats['analysis_memo'] = analyzer.stats()
+        return jsonify(stats)
+
+    @app.route('/api/stats/screening')
+    def screening_stats():
+        """Per-detector skip rates of the screening stage"""
+        services = app.extensions['services']
+        if not services.is_loaded('pattern_analyzer'):
+            return jsonify({})
+        screening = services.get('pattern_analyzer').screening
+        return jsonify(screening.stats() if screening else {})
+
+    @app.route('/api/scan-jobs')
+    def get_scan_jobs():
+        """Job counts per status and the latest scan jobs"""
+        try:
+            limit = request.args.get('limit', 50, type=int)
+            jobs = ScanJob.query.order_by(ScanJob.id.desc()).limit(limit).all()
+            return jsonify(dict(get_service('job_queue').stats(), latest=[j.to_dict() for j in jobs]))
+        except Exception as e:
+            logger.error(f"Error getting scan jobs: {e}")
+            return jsonify({'error': str(e)}), 500
+
     @app.route('/api/cleanup')
     def cleanup_patterns():
         """Manual cleanup endpoint for testing"""
@@ -218,6 +311,9 @@ def init_routes(app):
 
     @app.route('/api/send-alert', methods=['POST'])
     def send_alert():
+        """Register a standing alert; fills and exits are notified later"""
+        # alert_book pulls in numpy; keep it out of worker boot
+        from app.services.alert_book import format_alert
         try:
             data = request.json
             symbol = data.get('symbol')
@@ -228,27 +324,130 @@ def init_routes(app):
             if not all([symbol, entry, stop_loss, take_profit]):
                 raise ValueError("Missing required fields")
 
-            risk = abs(entry - stop_loss)
-            reward = abs(entry - take_profit)
-            ratio = reward / risk
             direction = "LONG" if take_profit > entry else "SHORT"
-            
-            message = (
-                f"🎯 Cảnh báo Giao dịch - {symbol}\n\n"
-                f"{'🟢' if direction == 'LONG' else '🔴'} {direction}\n"
-                f"📍 Entry: {entry:.2f}\n"
-                f"🛑 Stop Loss: {stop_loss:.2f} ({abs((stop_loss - entry) / entry * 100):.1f}%)\n"
-                f"🎯 Take Profit: {take_profit:.2f} ({abs((take_profit - entry) / entry * 100):.1f}%)\n"
-                f"📊 Risk/Reward: 1:{ratio:.2f}"
+            if data.get('direction') and data['direction'].upper() != direction:
+                raise ValueError("Direction does not match entry and take profit")
+            if (stop_loss - entry) * (take_profit - entry) >= 0:
+                raise ValueError("Stop loss and take profit must be on opposite sides of entry")
+
+            alert = Alert(
+                symbol=symbol,
+                direction=direction,
+                entry_price=entry,
+                stop_loss=stop_loss,
+                take_profit=take_profit,
+                risk_reward_ratio=abs(entry - take_profit) / abs(entry - stop_loss)
             )
+            db.session.add(alert)
+            db.session.commit()
             
-            if telegram_service.send_message(message):
-                return jsonify({'success': True})
-            else:
-                return jsonify({'success': False, 'error': 'Failed to send Telegram message'}), 500
+            alert_book().add(alert)
+            get_service('notification_queue').put(format_alert(alert))
+            return jsonify({'success': True, 'id': alert.id})
                 
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         except Exception as e:
             logger.error(f"Error sending alert: {e}")
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/api/alerts')
+    def get_alerts():
+        """List alerts, optionally filtered by ``status``"""
+        try:
+            query = Alert.query
+            status = request.args.get('status')
+            if status:
+                query = query.filter(Alert.status == status)
+            alerts = query.order_by(Alert.created_at.desc()).all()
+            return jsonify({'alerts': [alert.to_dict() for alert in alerts]})
+        except Exception as e:
+            logger.error(f"Error getting alerts: {e}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/alerts/<int:alert_id>', methods=['DELETE'])
+    def cancel_alert(alert_id):
+        """Cancel an alert that has not exited yet"""
+        try:
+            alert = db.session.get(Alert, alert_id)
+            if alert is None:
+                return jsonify({'success': False, 'error': 'Alert not found'}), 404
+            if alert.status not in ('active', 'triggered'):
+                return jsonify({'success': False, 'error': f'Alert is already {alert.status}'}), 409
+            
+            alert_book().cancel(alert_id)
+            alert.status = 'cancelled'
+            alert.closed_at = datetime.utcnow()
+            db.session.commit()
+            return jsonify({'success': True, 'alert': alert.to_dict()})
+        except Exception as e:
+            logger.error(f"Error cancelling alert: {e}")
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/api/subscriptions')
+    def get_subscriptions():
+        """List subscriptions, optionally of one ``chat_id``"""
+        try:
+            query = Subscription.query
+            chat_id = request.args.get('chat_id')
+            if chat_id:
+                query = query.filter(Subscription.chat_id == chat_id)
+            subscriptions = query.order_by(Subscription.created_at.desc()).all()
+            return jsonify({'subscriptions': [s.to_dict() for s in subscriptions]})
+        except Exception as e:
+            logger.error(f"Error getting subscriptions: {e}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/subscriptions', methods=['POST'])
+    def create_subscription():
+        """Subscribe a chat to the new patterns passing its filters"""
+        try:
+            data = request.json
+            if not data.get('chat_id'):
+                raise ValueError("Missing chat_id")
+            subscription = Subscription(
+                chat_id=str(data['chat_id']),
+                min_confidence=float(data.get('min_confidence') or 0),
+                min_risk_reward=float(data['min_risk_reward']) if data.get('min_risk_reward') is not None else None
+            )
+            for field, column in FILTER_FIELDS.items():
+                values = data.get(column) or []
+                if isinstance(values, str):
+                    values = values.split(',')
+                if field == 'direction':
+                    values = [v.strip().upper() for v in values]
+                    if set(values) - {'LONG', 'SHORT'}:
+                        raise ValueError("Directions must be LONG or SHORT")
+                setattr(subscription, column, ','.join(v.strip() for v in values if v.strip()) or None)
+            db.session.add(subscription)
+            db.session.commit()
+            
+            get_service('subscriptions').load()
+            return jsonify({'success': True, 'id': subscription.id})
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        except Exception as e:
+            logger.error(f"Error creating subscription: {e}")
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e)}), 500
+
+    @app.route('/api/subscriptions/<int:subscription_id>', methods=['DELETE'])
+    def delete_subscription(subscription_id):
+        """Remove a subscription"""
+        try:
+            subscription = db.session.get(Subscription, subscription_id)
+            if subscription is None:
+                return jsonify({'success': False, 'error': 'Subscription not found'}), 404
+            db.session.delete(subscription)
+            db.session.commit()
+            
+            get_service('subscriptions').load()
+            return jsonify({'success': True})
+        except Exception as e:
+            logger.error(f"Error deleting subscription: {e}")
+            db.session.rollback()
             return jsonify({'success': False, 'error': str(e)}), 500
 
     return app
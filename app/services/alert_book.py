@@ -0,0 +1,148 @@
+from app import db
+from app.models.alert import Alert
+from app.services.setup_book import SetupBook, OPEN, FILLED, WON, LOST, CLOSED, to_datetime
+import numpy as np
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATUS_NAMES = {OPEN: 'active', FILLED: 'triggered', WON: 'won', LOST: 'lost', CLOSED: 'cancelled'}
+
+class AlertBook:
+    """Standing entry/SL/TP alerts matched against streamed or polled prices.
+
+    Alerts are kept in a SetupBook, so a price tick costs a binary search
+    per symbol plus the alerts it fires. Fired alerts are handed to the
+    notification queue; status changes are written back by ``flush``.
+    """
+
+    def __init__(self, notification_queue=None, capacity=256):
+        self.loaded = False
+        self.book = SetupBook(capacity)
+        self.notifications = notification_queue
+        self._symbols = {}  # alert id -> symbol
+        self._dirty = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load every alert that has not fired its exit yet"""
+        alerts = Alert.query.filter(Alert.status.in_(('active', 'triggered'))).all()
+        for alert in alerts:
+            self.add(alert)
+        self.loaded = True
+        logger.info(f"Loaded {len(alerts)} alerts")
+
+    def add(self, alert, price=None):
+        """Start matching a stored ``Alert``.
+
+        ``price`` is the price the alert was set at; without it the alert
+        is placed on the next price seen for its symbol.
+        """
+        with self._lock:
+            if alert.id in self.book.slots:
+                return
+            self._symbols[alert.id] = alert.symbol
+            self.book.add(
+                alert.id, alert.symbol, alert.entry_price, alert.take_profit, alert.stop_loss,
+                reference_price=price,
+                state=FILLED if alert.status == 'triggered' else OPEN,
+                created_at=alert.created_at, filled_at=alert.triggered_at
+            )
+
+    def cancel(self, alert_id):
+        """Stop matching an alert; returns False if it is not open"""
+        with self._lock:
+            slot = self.book.slots.get(alert_id)
+            if slot is None:
+                return False
+            return len(self.book.close(slot, self._symbols[alert_id])) > 0
+
+    def __len__(self):
+        return len(self.book)
+
+    def on_prices(self, prices, timestamp=None):
+        """Apply a {symbol: price} snapshot; returns the number of alerts fired"""
+        fired = 0
+        for symbol in self.book.symbols():
+            price = prices.get(symbol)
+            if price is not None:
+                fired += self.on_candle(symbol, price, price, timestamp)
+        return fired
+
+    def on_candle(self, symbol, high, low, timestamp=None):
+        """Apply a price range of ``symbol``; returns the number of alerts fired"""
+        with self._lock:
+            filled, won, lost = self.book.on_candle(symbol, high, low, timestamp)
+            fired = np.concatenate([filled, won, lost])
+            if len(fired):
+                self._dirty.append(fired)
+        for slot in filled.tolist():
+            self._notify(symbol, slot, 'triggered')
+        for slot in won.tolist():
+            self._notify(symbol, slot, 'won')
+        for slot in lost.tolist():
+            self._notify(symbol, slot, 'lost')
+        return len(fired)
+
+    def _notify(self, symbol, slot, event):
+        if self.notifications is None:
+            return
+        book = self.book
+        direction = 'LONG' if book.direction[slot] == 1 else 'SHORT'
+        if event == 'triggered':
+            header = f"🔔 Đã khớp Entry - {symbol}"
+            detail = f"📍 Entry: {book.entry[slot]:.2f}"
+        elif event == 'won':
+            header = f"✅ Chạm Take Profit - {symbol}"
+            detail = f"🎯 Take Profit: {book.take_profit[slot]:.2f}"
+        else:
+            header = f"❌ Chạm Stop Loss - {symbol}"
+            detail = f"🛑 Stop Loss: {book.stop_loss[slot]:.2f}"
+        self.notifications.put(
+            f"{header}\n\n"
+            f"{'🟢' if direction == 'LONG' else '🔴'} {direction} (#{book.key[slot]})\n"
+            f"{detail}"
+        )
+
+    def flush(self):
+        """Write buffered status changes in one bulk update"""
+        book = self.book
+        with self._lock:
+            if not self._dirty:
+                return 0
+            slots = np.unique(np.concatenate(self._dirty))
+            self._dirty = []
+            slots = slots[book.state[slots] != CLOSED]
+            changes = [{
+                'id': int(book.key[slot]),
+                'status': STATUS_NAMES[book.state[slot]],
+                'triggered_at': to_datetime(book.filled_at[slot]),
+                'exit_price': None if np.isnan(book.exit_price[slot]) else float(book.exit_price[slot]),
+                'closed_at': to_datetime(book.closed_at[slot]),
+            } for slot in slots.tolist()]
+        if not changes:
+            return 0
+        try:
+            db.session.bulk_update_mappings(Alert, changes)
+            db.session.commit()
+            logger.info(f"Updated {len(changes)} alerts")
+        except Exception as e:
+            logger.error(f"Error writing alert updates: {e}")
+            db.session.rollback()
+            with self._lock:
+                self._dirty.append(slots)
+            return 0
+        return len(changes)
+
+def format_alert(alert):
+    """Telegram message announcing a new alert"""
+    entry, stop_loss, take_profit = alert.entry_price, alert.stop_loss, alert.take_profit
+    return (
+        f"🎯 Cảnh báo Giao dịch - {alert.symbol}\n\n"
+        f"{'🟢' if alert.direction == 'LONG' else '🔴'} {alert.direction}\n"
+        f"📍 Entry: {entry:.2f}\n"
+        f"🛑 Stop Loss: {stop_loss:.2f} ({abs((stop_loss - entry) / entry * 100):.1f}%)\n"
+        f"🎯 Take Profit: {take_profit:.2f} ({abs((take_profit - entry) / entry * 100):.1f}%)\n"
+        f"📊 Risk/Reward: 1:{alert.risk_reward_ratio:.2f}"
+    )
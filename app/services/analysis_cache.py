@@ -0,0 +1,119 @@
+from app.services.timeframes import interval_ms, analysis_frame
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """One in-progress analysis that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class AnalysisCache:
+    """On-demand analysis of one symbol and interval.
+
+    A result is kept until the candle it was computed on closes, so a burst
+    of users opening the same chart costs one kline fetch and one analysis.
+    Concurrent misses for the same key are coalesced: the first caller
+    computes, the others wait for its result (single-flight).
+    """
+
+    def __init__(self, binance_service, pattern_analyzer, bars=100, min_ttl=5.0,
+                 max_entries=1024, clock=time.time):
+        self.binance = binance_service
+        self.pattern_analyzer = pattern_analyzer
+        self.bars = bars
+        self.min_ttl = min_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self._results = {}  # (symbol, interval) -> (expires_at, result), oldest first
+        self._flights = {}  # (symbol, interval) -> _Flight
+        self._lock = threading.Lock()
+
+    def get(self, symbol, interval='1h'):
+        """Patterns of ``symbol`` on ``interval``, cached until the candle closes"""
+        interval_ms(interval)  # Reject unsupported intervals before fetching
+        key = (symbol, interval)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > self.clock():
+                self.hits += 1
+                return cached[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._analyze(symbol, interval)
+            with self._lock:
+                self._store(key, flight.result)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _analyze(self, symbol, interval):
+        df = self.binance.get_klines(symbol, interval=interval, limit=self.bars)
+        if df is None or df.empty:
+            raise LookupError(f"No klines for {symbol} {interval}")
+        df = analysis_frame(df)
+        patterns = self.pattern_analyzer.analyze_all_patterns(df)
+        for pattern in patterns:
+            pattern['timeframe'] = interval
+
+        # The last kline is the candle still forming; its close ends validity
+        close_at = df['timestamp'].iloc[-1].timestamp() + interval_ms(interval) / 1000
+        expires_at = max(close_at, self.clock() + self.min_ttl)
+        return {
+            'symbol': symbol,
+            'interval': interval,
+            'price': float(df['close'].iloc[-1]),
+            # Descriptions are rendered here, once per cached result
+            'patterns': [pattern.to_dict() for pattern in patterns],
+            'generated_at': self.clock(),
+            'expires_at': expires_at,
+        }
+
+    def _store(self, key, result):
+        # Re-inserted so the dict stays in storing order
+        self._results.pop(key, None)
+        if len(self._results) >= self.max_entries:
+            now = self.clock()
+            self._results = {k: v for k, v in self._results.items() if v[0] > now}
+            # Daily and longer candles keep entries live for days; drop the
+            # oldest ones so the cache stays bounded
+            while self._results and len(self._results) >= self.max_entries:
+                del self._results[next(iter(self._results))]
+                self.evictions += 1
+        self._results[key] = (result['expires_at'], result)
+
+    def stats(self):
+        return {
+            'entries': len(self._results),
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+        }
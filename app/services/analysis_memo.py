@@ -0,0 +1,107 @@
+from app.services.timeframes import INTERVAL_MS
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+def config_hash(pattern_analyzer):
+    """Digest of every analyzer setting that can change its output"""
+    rules = [(rule.name, rule.delta) for rule in pattern_analyzer.scorer.rules]
+    config = (pattern_analyzer.scales, pattern_analyzer.exhaustive, pattern_analyzer.lookback,
+              sorted(pattern_analyzer.params.items()), rules)
+    return hashlib.blake2b(repr(config).encode(), digest_size=8).hexdigest()
+
+def closed_rows(key, df, now):
+    """Number of leading candles of ``df`` closed at ``now`` (epoch seconds);
+    None unless ``key`` is a (symbol, interval) frame key"""
+    if not (isinstance(key, tuple) and len(key) == 2 and key[1] in INTERVAL_MS):
+        return None
+    closes = pd.DatetimeIndex(df['timestamp']) + pd.Timedelta(milliseconds=INTERVAL_MS[key[1]])
+    return int(closes.searchsorted(pd.Timestamp(now, unit='s'), side='right'))
+
+class MemoizedAnalyzer:
+    """LRU memo of raw detections in front of a PatternAnalyzer.
+
+    Only the closed candles of a frame are memoized: entries are keyed by
+    the frame key (symbol, interval), the open time of its last closed
+    candle and the analyzer configuration, and hold the detections and
+    indicator features of that closed part. The forming candle and the
+    cycle's regime readings are left out of the key; every lookup rescores
+    the cached detections with the current regime (one cheap batch pass)
+    and checks retests against the full frame, so a frame only runs the
+    detectors again once a candle has closed. Frames whose key has no
+    interval are analyzed without the memo. Other attributes are forwarded
+    to the wrapped analyzer.
+    """
+
+    def __init__(self, pattern_analyzer, max_entries=4096, clock=time.time):
+        self.analyzer = pattern_analyzer
+        self.max_entries = max_entries
+        self.clock = clock
+        self.config = config_hash(pattern_analyzer)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.analyzer, name)
+
+    def analyze_all_patterns(self, df):
+        """``PatternAnalyzer.analyze_all_patterns`` (a frame without a key is
+        not memoized)"""
+        return self.analyze_many({None: df}, skip_errors=False)[None]
+
+    def analyze_many(self, frames, regime=None, skip_errors=True):
+        """Memoized ``PatternAnalyzer.analyze_many``; detectors only run on
+        frames with a newly closed candle"""
+        now = self.clock()
+        return self.analyzer.analyze_many(
+            frames, regime=regime, skip_errors=skip_errors,
+            detect=lambda key, df, readings: self._detect(key, df, readings, now)
+        )
+
+    def _detect(self, key, df, readings, now):
+        """Raw detections and features of ``df``, from the memo if its closed
+        candles were analyzed before"""
+        closed = closed_rows(key, df, now)
+        if not closed:
+            return self.analyzer.detect_patterns(df, regime=readings)
+        memo_key = (key, df['timestamp'].iloc[closed - 1], self.config)
+        with self._lock:
+            entry = self._entries.get(memo_key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(memo_key)
+                self.hits += 1
+        if entry is None:
+            entry = self.analyzer.detect_patterns(df.iloc[:closed], regime=readings)
+            with self._lock:
+                self._entries[memo_key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        patterns, features = entry
+        # Scoring and retest checks mutate the detections; the memo keeps
+        # the raw ones and takes the regime of the current cycle
+        return [p.copy() for p in patterns], features and {**features, **readings}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+        }
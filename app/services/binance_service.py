@@ -6,8 +6,17 @@ import pandas_ta as ta
 from config import BaseConfig
 
 class BinanceService:
-    def __init__(self):
-        self.client = Client(BaseConfig.BINANCE_API_KEY, BaseConfig.BINANCE_API_SECRET)
+    def __init__(self, client=None):
+        """Wrap a python-binance ``Client``.
+
+        Any object exposing the same ``get_ticker``/``get_klines``/
+        ``get_symbol_ticker``/``get_all_tickers``/``get_exchange_info``
+        methods can be injected, e.g. the replay client in
+        ``benchmarks.fakes`` for offline runs.
+        """
+        if client is None:
+            client = Client(BaseConfig.BINANCE_API_KEY, BaseConfig.BINANCE_API_SECRET)
+        self.client = client
         
     def get_top_symbols(self, limit=100, quote_asset='USDT', min_volume=50_000_000):
         """Get top trading pairs by 24h volume with minimum volume threshold"""
@@ -27,14 +36,43 @@ class BinanceService:
             print(f"Error fetching top symbols: {e}")
             return []
 
-    def get_klines(self, symbol, interval='1h', limit=100):
-        """Get historical klines/candlestick data"""
+    def get_trading_symbols(self, quote_assets=('USDT',)):
+        """Every spot pair currently trading against one of ``quote_assets``
+        ({symbol: quote asset})"""
+        try:
+            info = self.client.get_exchange_info()
+            return {
+                s['symbol']: s['quoteAsset']
+                for s in info['symbols']
+                if s['status'] == 'TRADING' and s['quoteAsset'] in quote_assets
+                and s.get('isSpotTradingAllowed', True)
+            }
+        except BinanceAPIException as e:
+            print(f"Error fetching exchange info: {e}")
+            return {}
+
+    def get_tickers(self):
+        """24h ticker statistics of every symbol"""
+        try:
+            return self.client.get_ticker()
+        except BinanceAPIException as e:
+            print(f"Error fetching tickers: {e}")
+            return []
+
+    def get_klines(self, symbol, interval='1h', limit=100, start_time=None, end_time=None):
+        """Get historical klines/candlestick data
+
+        With ``start_time`` (ms) the first ``limit`` candles opening at or
+        after it are returned instead of the latest ones; ``end_time`` (ms)
+        returns the last ``limit`` candles opening at or before it.
+        """
         try:
-            klines = self.client.get_klines(
-                symbol=symbol,
-                interval=interval,
-                limit=limit
-            )
+            params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+            if start_time is not None:
+                params['startTime'] = int(start_time)
+            if end_time is not None:
+                params['endTime'] = int(end_time)
+            klines = self.client.get_klines(**params)
             
             df = pd.DataFrame(klines, columns=[
                 'timestamp', 'open', 'high', 'low', 'close', 
@@ -83,3 +121,15 @@ class BinanceService:
         except BinanceAPIException as e:
             print(f"Error fetching price for {symbol}: {e}")
             return None
+
+    def get_prices(self, symbols=None):
+        """Latest price of every symbol ({symbol: price}) in one request"""
+        try:
+            tickers = self.client.get_all_tickers()
+            if symbols is not None:
+                symbols = set(symbols)
+                tickers = [t for t in tickers if t['symbol'] in symbols]
+            return {t['symbol']: float(t['price']) for t in tickers}
+        except BinanceAPIException as e:
+            print(f"Error fetching prices: {e}")
+            return {}
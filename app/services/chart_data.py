@@ -0,0 +1,125 @@
+from app.services.timeframes import interval_ms, resample_ohlcv, analysis_frame
+import gzip
+import json
+import threading
+import numpy as np
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+class ChartData:
+    """Candles and pattern overlays for the chart, without exchange requests.
+
+    Histories come from this process's KlineCache or from the kline store
+    the scanners write through to (so web workers without a scan thread,
+    or with ``SCAN_QUEUE``, serve what the scanner workers fetched),
+    whichever holds the newer candles; they are as fresh as the last scan
+    of the symbol. Symbols in neither are not served. Candles are returned
+    column by column with ``time`` in epoch seconds.
+    Overlays are the analyzer's patterns on the last ``bars`` candles, with
+    the bar positions of their anchors translated to candle times; they are
+    recomputed only when a new candle arrives.
+    """
+
+    def __init__(self, kline_cache, pattern_analyzer, prepare=None, bars=100, max_entries=1024):
+        self.kline_cache = kline_cache
+        self.pattern_analyzer = pattern_analyzer
+        self.prepare = prepare
+        self.bars = bars
+        self.max_entries = max_entries
+        self._overlays = {}  # (symbol, interval) -> (last candle time, patterns)
+        self._lock = threading.Lock()
+
+    def frame(self, symbol, interval=None):
+        """Cached or stored history of ``symbol`` resampled to ``interval``
+        (None if there is none)"""
+        base = self.kline_cache.interval
+        df = self.kline_cache.peek(symbol)
+        store = self.kline_cache.store
+        if store is not None:
+            stored = store.read(symbol, base, bars=self.kline_cache.max_bars)
+            if stored is not None and not stored.empty and (
+                    df is None or df.empty or stored['timestamp'].iloc[-1] > df['timestamp'].iloc[-1]):
+                df = stored
+        if df is None or df.empty:
+            return None
+        return resample_ohlcv(df, base, interval or base)
+
+    def klines(self, df, start=None, end=None):
+        """Columnar candles of ``df`` opening within [start, end] (epoch seconds)"""
+        times = df['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        lo = 0 if start is None else np.searchsorted(times, start, side='left')
+        hi = len(times) if end is None else np.searchsorted(times, end, side='right')
+        columns = {'time': times[lo:hi]}
+        for column in COLUMNS:
+            columns[column] = df[column].to_numpy(dtype=float)[lo:hi]
+        return columns
+
+    def overlays(self, symbol, interval, df):
+        """Patterns of the latest candles of ``df`` with timed anchors"""
+        key = (symbol, interval)
+        last = df['timestamp'].iloc[-1]
+        with self._lock:
+            cached = self._overlays.get(key)
+        if cached is not None and cached[0] == last:
+            return cached[1]
+
+        frame = analysis_frame(df.iloc[-self.bars:])
+        times = frame['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        if self.prepare is not None:
+            frame = self.prepare(frame)
+        patterns = self.pattern_analyzer.analyze_all_patterns(frame)
+        for pattern in patterns:
+            pattern['timeframe'] = interval
+            for point in pattern.get('points', []):
+                point['time'] = int(times[point['index']])
+            for line in pattern.get('lines', {}).values():
+                for point in line:
+                    point['time'] = int(times[point['index']])
+        patterns = [pattern.to_dict() for pattern in patterns]
+
+        with self._lock:
+            if len(self._overlays) >= self.max_entries:
+                self._overlays.clear()
+            self._overlays[key] = (last, patterns)
+        return patterns
+
+    def payload(self, symbol, interval=None, start=None, end=None, patterns=True):
+        """Chart payload of ``symbol``; None when no history is cached"""
+        interval = interval or self.kline_cache.interval
+        interval_ms(interval)  # Reject unsupported intervals
+        df = self.frame(symbol, interval)
+        if df is None or df.empty:
+            return None
+        payload = {
+            'symbol': symbol,
+            'interval': interval,
+            'columns': self.klines(df, start, end),
+        }
+        if patterns:
+            payload['patterns'] = self.overlays(symbol, interval, df)
+        return payload
+
+def encode(payload, fmt='json'):
+    """Serialize a chart payload; returns (body, mimetype).
+
+    ``msgpack`` sends each column as raw little-endian float64 bytes (a
+    ``Float64Array`` buffer on the client) instead of a list of numbers.
+    """
+    columns = payload['columns']
+    if fmt == 'msgpack':
+        import msgpack  # Optional dependency, only needed for binary responses
+        packed = dict(payload, columns={
+            name: np.ascontiguousarray(values, dtype='<f8').tobytes()
+            for name, values in columns.items()
+        })
+        return msgpack.packb(packed, use_bin_type=True), 'application/msgpack'
+    if fmt != 'json':
+        raise ValueError(f"Unsupported format: {fmt}")
+    listed = dict(payload, columns={name: values.tolist() for name, values in columns.items()})
+    return json.dumps(listed, separators=(',', ':')).encode(), 'application/json'
+
+def compress(body, level=6, min_size=1024):
+    """gzip ``body`` when it is large enough to be worth it"""
+    if len(body) < min_size:
+        return body, False
+    return gzip.compress(body, level), True
@@ -0,0 +1,56 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def recent(extrema, n, lookback):
+    """Extrema positions inside the last ``lookback`` of ``n`` bars"""
+    extrema = np.asarray(extrema, dtype=int)
+    return extrema[extrema >= n - lookback]
+
+def hs_windows(peaks, highs, shoulder_tolerance=0.03, head_margin=0.02):
+    """Start offsets (into ``peaks``) of every run of five consecutive peaks
+    forming a head and shoulders, in chronological order"""
+    if len(peaks) < 5:
+        return np.array([], dtype=int)
+    p1, p2, p3, p4, p5 = highs[sliding_window_view(peaks, 5)].T
+    shoulders = np.maximum(p1, p5)
+    valid = ((p3 > shoulders) &  # Head higher than shoulders
+             (np.abs(p1 - p5) / p1 < shoulder_tolerance) &  # Shoulders at similar levels
+             (np.minimum(p2, p4) < np.minimum(p1, p5)) &  # Neckline validation
+             (p3 > p1 * (1 + head_margin)))  # Head clearly higher than shoulders
+    return np.flatnonzero(valid)
+
+def double_formations(extrema, values, index, window, tolerance, top=True):
+    """All extrema pairs that form a double top (or bottom).
+
+    Every ordered pair is checked at once: ``np.triu_indices`` lists the
+    pairs and the range index answers the trough (or peak) between each
+    pair in one vectorized query. Returns (first, second, middle level).
+    """
+    first, second = np.triu_indices(len(extrema), k=1)
+    first, second = extrema[first], extrema[second]
+    a, b = values[first], values[second]
+    valid = (np.abs(a - b) / a < tolerance) & (second - first > window * 2)
+    first, second = first[valid], second[valid]
+    if top:
+        middle = index.min('low', first, second)
+        valid = middle < np.minimum(a[valid], b[valid]) * 0.97
+    else:
+        middle = index.max('high', first, second)
+        valid = middle > np.maximum(a[valid], b[valid]) * 1.03
+    return first[valid], second[valid], middle[valid]
+
+def triple_formations(extrema, values, tolerance):
+    """All extrema triples whose levels are pairwise within ``tolerance``.
+
+    Closeness is computed once as an m x m matrix and broadcast to m x m x m,
+    which stays small because ``extrema`` is limited to a lookback.
+    Returns an (k, 3) array of positions.
+    """
+    m = len(extrema)
+    level = values[extrema]
+    # close[i, j]: level j within tolerance of level i, for i < j only
+    close = np.abs(level[:, None] - level[None, :]) / level[:, None] < tolerance
+    close &= np.triu(np.ones((m, m), dtype=bool), k=1)
+    valid = close[:, :, None] & close[None, :, :] & close[:, None, :]
+    i, j, k = np.nonzero(valid)
+    return np.stack([extrema[i], extrema[j], extrema[k]], axis=1)
@@ -0,0 +1,138 @@
+from app import db
+from app.models.scan_job import ScanJob
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, and_
+import logging
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """Durable queue of scan shards in the ``scan_job`` table.
+
+    A coordinator publishes one job per shard of the symbol universe; any
+    number of workers, in this process or others sharing the database,
+    claim jobs under a lease they keep alive with heartbeats. A job whose
+    lease ran out (its worker died) is handed to the next worker, up to
+    ``max_attempts`` claims. Claims are conditional updates, so two
+    workers never both win the same claim.
+    """
+
+    def __init__(self, lease=120, max_attempts=3):
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+    def next_cycle(self):
+        return (db.session.query(func.max(ScanJob.cycle)).scalar() or 0) + 1
+
+    def unfinished(self):
+        """Jobs still pending or running"""
+        return ScanJob.query.filter(ScanJob.status.in_(('pending', 'running'))).count()
+
+    def publish(self, symbols, shard_size=50, cycle=None):
+        """Queue ``symbols`` in shards of ``shard_size``; returns the cycle id"""
+        cycle = cycle or self.next_cycle()
+        now = datetime.utcnow()
+        for shard, start in enumerate(range(0, len(symbols), shard_size)):
+            db.session.add(ScanJob(
+                cycle=cycle,
+                shard=shard,
+                symbols=','.join(symbols[start:start + shard_size]),
+                created_at=now
+            ))
+        db.session.commit()
+        logger.info(f"Published cycle {cycle}: {len(symbols)} symbols in shards of {shard_size}")
+        return cycle
+
+    def claim(self, worker):
+        """Lease the oldest available job to ``worker``; None if there is none"""
+        while True:
+            now = datetime.utcnow()
+            job = ScanJob.query.filter(
+                or_(ScanJob.status == 'pending',
+                    and_(ScanJob.status == 'running', ScanJob.lease_until < now))
+            ).order_by(ScanJob.id).first()
+            if job is None:
+                db.session.commit()
+                return None
+
+            if job.attempts >= self.max_attempts:
+                # Its workers kept dying; give up on it
+                self._finish(job.id, job.attempts, 'failed', error='lease expired')
+                continue
+
+            # Only succeeds if nobody claimed the job since we read it
+            claimed = ScanJob.query.filter(
+                ScanJob.id == job.id,
+                ScanJob.status == job.status,
+                ScanJob.attempts == job.attempts
+            ).update({
+                'status': 'running',
+                'worker': worker,
+                'attempts': job.attempts + 1,
+                'lease_until': now + timedelta(seconds=self.lease),
+                'heartbeat_at': now,
+                'started_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                job = db.session.get(ScanJob, job.id)
+                logger.info(f"{worker} claimed scan job {job.cycle}/{job.shard} (attempt {job.attempts})")
+                return job
+
+    def heartbeat(self, job_id, worker):
+        """Extend the lease; False if ``worker`` no longer holds the job"""
+        now = datetime.utcnow()
+        held = ScanJob.query.filter(
+            ScanJob.id == job_id,
+            ScanJob.worker == worker,
+            ScanJob.status == 'running'
+        ).update({
+            'lease_until': now + timedelta(seconds=self.lease),
+            'heartbeat_at': now
+        }, synchronize_session=False)
+        db.session.commit()
+        return held > 0
+
+    def complete(self, job, patterns=0):
+        self._finish(job.id, job.attempts, 'done', patterns=patterns)
+
+    def fail(self, job, error):
+        """Put the job back in the queue, or mark it failed after the last attempt"""
+        status = 'failed' if job.attempts >= self.max_attempts else 'pending'
+        self._finish(job.id, job.attempts, status, error=str(error))
+        logger.warning(f"Scan job {job.cycle}/{job.shard} {status}: {error}")
+
+    def _finish(self, job_id, attempts, status, patterns=None, error=None):
+        # Ignored if the job was re-claimed by another worker meanwhile
+        ScanJob.query.filter(
+            ScanJob.id == job_id,
+            ScanJob.attempts == attempts
+        ).update({
+            'status': status,
+            'lease_until': None,
+            'finished_at': datetime.utcnow() if status in ('done', 'failed') else None,
+            'patterns': patterns,
+            'error': error
+        }, synchronize_session=False)
+        db.session.commit()
+
+    def purge(self, hours=24):
+        """Delete finished jobs older than ``hours``"""
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        deleted = ScanJob.query.filter(
+            ScanJob.status.in_(('done', 'failed')),
+            ScanJob.created_at < cutoff
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def stats(self):
+        """Job counts per status, plus the workers holding running jobs"""
+        counts = dict(
+            db.session.query(ScanJob.status, func.count(ScanJob.id)).group_by(ScanJob.status).all()
+        )
+        workers = [
+            row[0] for row in
+            db.session.query(ScanJob.worker).filter(ScanJob.status == 'running').distinct().all()
+        ]
+        return {'jobs': counts, 'workers': workers}
@@ -0,0 +1,174 @@
+from app.services.kline_store import KlineStore
+from app.services.timeframes import OHLCV_COLUMNS, interval_ms
+import numpy as np
+import pandas as pd
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Binance public data dumps: BTCUSDT-1h-2024-01.zip (monthly) or
+# BTCUSDT-1h-2024-01-15.zip (daily), one CSV inside
+ARCHIVE_NAME = re.compile(
+    r'^(?P<symbol>[A-Z0-9]+)-(?P<interval>\d+[mhd])-(?P<period>\d{4}-\d{2}(?:-\d{2})?)\.(?:zip|csv)$'
+)
+
+# open_time, open, high, low, close, volume; the remaining columns are unused
+CSV_COLUMNS = ['timestamp'] + OHLCV_COLUMNS
+
+MAX_REPORTED_GAPS = 10
+
+def parse_archive_name(path):
+    """(symbol, interval) of an archive file name; ValueError if it does not match"""
+    match = ARCHIVE_NAME.match(os.path.basename(path))
+    if match is None:
+        raise ValueError(f"Not a kline archive name: {path}")
+    return match.group('symbol'), match.group('interval')
+
+def _open_text(path):
+    """Text stream of a CSV or of the CSV inside a zip, decoded as read"""
+    if path.endswith('.zip'):
+        archive = zipfile.ZipFile(path)
+        member = next(name for name in archive.namelist() if name.endswith('.csv'))
+        return io.TextIOWrapper(archive.open(member), encoding='ascii')
+    return open(path, encoding='ascii')
+
+def iter_chunks(path, chunk_rows=100_000):
+    """Decode an archive in chunks of ``chunk_rows`` rows ({column: array}).
+
+    The file is streamed, never read whole. A header line (newer dumps)
+    is skipped, and open times in microseconds (spot dumps since 2025)
+    are converted to milliseconds.
+    """
+    with _open_text(path) as stream:
+        header = not stream.readline()[:1].isdigit()
+    with _open_text(path) as stream:
+        reader = pd.read_csv(
+            stream, header=None, skiprows=1 if header else 0, usecols=range(6),
+            names=CSV_COLUMNS, chunksize=chunk_rows,
+            dtype={'timestamp': np.int64, **{col: np.float64 for col in OHLCV_COLUMNS}}
+        )
+        for chunk in reader:
+            timestamp = chunk['timestamp'].to_numpy()
+            if len(timestamp) and timestamp[0] >= 10**14:
+                timestamp = timestamp // 1000
+            columns = {'timestamp': timestamp}
+            for col in OHLCV_COLUMNS:
+                columns[col] = chunk[col].to_numpy(dtype=np.float32)
+            yield columns
+
+def check_series(timestamp, interval):
+    """Duplicate count and gaps of sorted open times (ms).
+
+    Gaps are (last open time before the gap, missing candles).
+    """
+    step = interval_ms(interval)
+    diff = np.diff(timestamp)
+    duplicates = int((diff == 0).sum())
+    holes = np.flatnonzero(diff > step)
+    gaps = [(int(timestamp[i]), int(diff[i] // step - 1)) for i in holes]
+    return duplicates, gaps
+
+def import_file(path, store, chunk_rows=100_000):
+    """Stream one archive into ``store``, chunk by chunk; returns its report.
+
+    Duplicates and gaps are counted between consecutive rows, carried
+    across chunks (the dumps are sorted by open time).
+    """
+    symbol, interval = parse_archive_name(path)
+    interval_ms(interval)  # reject intervals without a fixed length early
+    rows = duplicates = gaps = 0
+    last = np.empty(0, dtype=np.int64)
+    for columns in iter_chunks(path, chunk_rows):
+        timestamp = columns['timestamp']
+        chunk_duplicates, chunk_gaps = check_series(np.concatenate([last, timestamp]), interval)
+        rows += len(timestamp)
+        duplicates += chunk_duplicates
+        gaps += len(chunk_gaps)
+        last = timestamp[-1:]
+        store.write(symbol, interval, columns)
+        del columns, timestamp
+    return {'file': os.path.basename(path), 'rows': rows, 'duplicates': duplicates, 'gaps': gaps}
+
+def import_series(paths, store, chunk_rows=100_000):
+    """Stream the archives of one series into ``store`` in path order (the
+    later file wins a duplicate); returns (symbol, interval, rows stored
+    before, file reports)"""
+    symbol, interval = parse_archive_name(paths[0])
+    before = store.rows(symbol, interval)
+    return symbol, interval, before, [import_file(path, store, chunk_rows) for path in paths]
+
+def archive_paths(paths):
+    """Archive files among ``paths``, expanding directories"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if ARCHIVE_NAME.match(name)
+            )
+        else:
+            found.append(path)
+    return found
+
+def _import_series(task):
+    """``import_series`` in a worker process, on its own handle of the store"""
+    paths, (root, block_rows, codec), chunk_rows = task
+    return import_series(paths, KlineStore(root, block_rows, codec), chunk_rows)
+
+def import_archives(paths, store, workers=4, chunk_rows=100_000):
+    """Import kline archives into a ``KlineStore``.
+
+    Every series (symbol and interval) is imported by one process, in
+    ``workers`` processes at a time: its files are decoded in chunks, in
+    path order, and each chunk is merged into the store as soon as it is
+    decoded (the later file wins a duplicate), so no file is ever held
+    whole in memory and workers only send back their reports. Every series
+    is then checked on the merged store for the rows dropped as duplicates
+    (within the files or of history already stored) and for gaps,
+    including gaps between files. Returns a report per series.
+    """
+    paths = archive_paths(paths)
+    series = {}
+    for path in paths:
+        series.setdefault(parse_archive_name(path), []).append(path)
+    tasks = [(files, (store.root, store.block_rows, store.codec), chunk_rows) for files in series.values()]
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            results = pool.map(_import_series, tasks)
+    else:
+        results = [import_series(files, store, chunk_rows) for files, _, _ in tasks]
+    done = {(symbol, interval): {'before': before, 'files': reports}
+            for symbol, interval, before, reports in results}
+
+    reports = {}
+    for (symbol, interval), imported in sorted(done.items()):
+        columns = store.read_columns(symbol, interval)
+        merged = columns['timestamp'] if columns is not None else np.empty(0, dtype=np.int64)
+        del columns
+        _, gaps = check_series(merged, interval)
+        rows = sum(report['rows'] for report in imported['files'])
+        stored = len(merged)
+        reports[f'{symbol}-{interval}'] = {
+            'files': imported['files'],
+            'rows': rows,
+            'duplicates': imported['before'] + rows - stored,
+            'stored': stored,
+            'bytes': store.nbytes(symbol, interval),
+            'first': pd.to_datetime(merged[0], unit='ms').isoformat() if stored else None,
+            'last': pd.to_datetime(merged[-1], unit='ms').isoformat() if stored else None,
+            'missing': sum(missing for _, missing in gaps),
+            'gaps': [
+                {'after': pd.to_datetime(after, unit='ms').isoformat(), 'missing': missing}
+                for after, missing in gaps[:MAX_REPORTED_GAPS]
+            ],
+        }
+        del merged
+        if gaps:
+            logger.warning(f"{symbol} {interval}: {len(gaps)} gaps, {reports[f'{symbol}-{interval}']['missing']} candles missing")
+    logger.info(f"Imported {len(paths)} archives into {len(reports)} series")
+    return reports
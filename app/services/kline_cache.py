@@ -0,0 +1,207 @@
+from app.services.timeframes import OHLCV_COLUMNS, interval_ms, compact_klines, frame_nbytes
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+def klines_weight(limit):
+    """Binance request weight of one klines request of ``limit`` candles"""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    return 5 if limit <= 1000 else 10
+
+class KlineCache:
+    """Rolling base-interval history per symbol, topped up incrementally.
+
+    The first ``get`` pages in ``max_bars`` candles; later calls only fetch
+    candles from the last cached open time onwards (usually one request),
+    so the REST cost does not grow with the number of derived timeframes.
+
+    Histories are kept compact (timestamp and float32 OHLCV, see
+    ``compact_klines``). With ``max_bytes`` the least recently used
+    symbols are evicted once the cache grows past the budget.
+
+    With a ``store`` (KlineStore, e.g. filled from exchange archives) a
+    symbol's first ``get`` starts from its stored history when that is
+    recent enough, and only fetches the candles after it. Fetched candles
+    are written through to the store, so other processes (web workers,
+    scanner workers) can read what any of them fetched.
+
+    ``request_weight`` adds up the exchange weight of every klines request
+    made, for callers that budget it.
+    """
+
+    PAGE_LIMIT = 1000  # Binance maximum per klines request
+
+    def __init__(self, binance_service, interval='1h', max_bars=1000, max_bytes=None, store=None):
+        self.binance_service = binance_service
+        self.interval = interval
+        self.max_bars = max_bars
+        self.max_bytes = max_bytes
+        self.store = store
+        self.evictions = 0
+        self.request_weight = 0
+        self._frames = OrderedDict()  # symbol -> frame, least recently used first
+        self._nbytes = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol):
+        """Return the up-to-date history for ``symbol`` (None if unavailable)"""
+        with self._symbol_lock(symbol):
+            with self._lock:
+                cached = self._frames.get(symbol)
+            if cached is None and self.store is not None:
+                cached = self._load_stored(symbol)
+            if cached is None:
+                fresh = self._fetch_latest(symbol, self.max_bars)
+            else:
+                # The last cached candle may still have been open; refetch it
+                start = int(cached['timestamp'].iloc[-1].value // 1_000_000)
+                fresh = self._fetch_since(symbol, start)
+            if fresh is None:
+                if cached is not None:
+                    self._touch(symbol)
+                return cached
+
+            fresh = compact_klines(fresh)
+            self._write_through(symbol, fresh)
+            if cached is not None:
+                fresh = pd.concat([cached, fresh], ignore_index=True)
+                fresh = fresh.drop_duplicates('timestamp', keep='last')
+            fresh = fresh.iloc[-self.max_bars:].reset_index(drop=True)
+            self._store(symbol, fresh)
+            return fresh
+
+    def _load_stored(self, symbol):
+        """Stored history to top up, unless it is older than ``max_bars``"""
+        try:
+            stored = self.store.read(symbol, self.interval, self.max_bars)
+        except Exception as e:
+            logger.error(f"Error reading stored klines of {symbol}: {e}")
+            return None
+        if stored is None or stored.empty:
+            return None
+        age = pd.Timestamp.utcnow().tz_localize(None) - stored['timestamp'].iloc[-1]
+        if age.total_seconds() * 1000 > self.max_bars * interval_ms(self.interval):
+            # Paging forwards would cost more than fetching the latest bars
+            return None
+        return stored
+
+    def _write_through(self, symbol, df):
+        if self.store is None:
+            return
+        columns = {'timestamp': df['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64)}
+        for col in OHLCV_COLUMNS:
+            columns[col] = df[col].to_numpy(dtype=np.float32)
+        try:
+            self.store.write(symbol, self.interval, columns)
+        except Exception as e:
+            logger.error(f"Error storing klines of {symbol}: {e}")
+
+    def _touch(self, symbol):
+        with self._lock:
+            if symbol in self._frames:
+                self._frames.move_to_end(symbol)
+
+    def _store(self, symbol, df):
+        with self._lock:
+            self._frames[symbol] = df
+            self._frames.move_to_end(symbol)
+            self._nbytes[symbol] = frame_nbytes(df)
+            if self.max_bytes is None:
+                return
+            total = sum(self._nbytes.values())
+            # Evict cold symbols, never the one just stored
+            while total > self.max_bytes and len(self._frames) > 1:
+                cold, _ = self._frames.popitem(last=False)
+                total -= self._nbytes.pop(cold)
+                self.evictions += 1
+
+    def memory_usage(self):
+        """Bytes held per symbol ({symbol: bytes})"""
+        with self._lock:
+            return dict(self._nbytes)
+
+    def summary(self):
+        usage = self.memory_usage()
+        total = sum(usage.values())
+        return {
+            'symbols': len(usage),
+            'bytes': total,
+            'bytes_per_symbol': total // len(usage) if usage else 0,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+        }
+
+    def peek(self, symbol):
+        """Return the cached history without contacting the exchange"""
+        return self._frames.get(symbol)
+
+    def drop(self, symbol):
+        with self._lock:
+            self._frames.pop(symbol, None)
+            self._nbytes.pop(symbol, None)
+
+    def symbols(self):
+        with self._lock:
+            return list(self._frames)
+
+    def _fetch_latest(self, symbol, bars):
+        """Page backwards from the newest candle until ``bars`` are loaded"""
+        pages = []
+        end = None
+        while bars > 0:
+            limit = min(bars, self.PAGE_LIMIT)
+            self._spend(limit)
+            df = self.binance_service.get_klines(
+                symbol, interval=self.interval, limit=limit, end_time=end
+            )
+            if df is None or df.empty:
+                break
+            pages.insert(0, df)
+            bars -= len(df)
+            if len(df) < limit:
+                break
+            end = int(df['timestamp'].iloc[0].value // 1_000_000) - 1
+        if not pages:
+            return None
+        return pd.concat(pages, ignore_index=True)
+
+    def _fetch_since(self, symbol, start):
+        """Page forwards from ``start`` (ms) up to the newest candle"""
+        step = interval_ms(self.interval)
+        pages = []
+        while True:
+            self._spend(self.PAGE_LIMIT)
+            df = self.binance_service.get_klines(
+                symbol, interval=self.interval, limit=self.PAGE_LIMIT, start_time=start
+            )
+            if df is None:
+                # Keep what we have; a failed page should not wipe the cache
+                return pd.concat(pages, ignore_index=True) if pages else None
+            if df.empty:
+                break
+            pages.append(df)
+            if len(df) < self.PAGE_LIMIT:
+                break
+            start = int(df['timestamp'].iloc[-1].value // 1_000_000) + step
+        if not pages:
+            return None
+        return pd.concat(pages, ignore_index=True)
+
+    def _spend(self, limit):
+        with self._lock:
+            self.request_weight += klines_weight(limit)
+
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            lock = self._locks.get(symbol)
+            if lock is None:
+                lock = self._locks[symbol] = threading.Lock()
+            return lock
@@ -0,0 +1,154 @@
+from app.services.timeframes import OHLCV_COLUMNS
+import lzma
+import struct
+import zlib
+import numpy as np
+
+# Candles per block; range reads decode whole blocks only
+BLOCK_ROWS = 4096
+
+# Binance tick and lot sizes go down to 1e-8
+MAX_DECIMALS = 8
+# Decimals marker of a column kept as float32 (no decimal scale is exact)
+FLOAT = -1
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# name -> (id stored in the index, compress, decompress)
+CODECS = {
+    'zlib': (0, zlib.compress, zlib.decompress),
+    'lzma': (1, lzma.compress, lzma.decompress),
+}
+DECOMPRESS = {code: decompress for code, _, decompress in CODECS.values()}
+
+MAGIC = b'KLC1'
+# File header: magic, block count; followed by the index, then the blocks
+HEADER = struct.Struct('<4sI')
+INDEX_DTYPE = np.dtype([
+    ('first', '<i8'), ('last', '<i8'),  # open times of the first and last candle
+    ('rows', '<u4'), ('codec', 'u1'),
+    ('offset', '<u8'), ('length', '<u4'),  # offset from the end of the index
+])
+# Block header: rows, first open time, first interval, price and volume decimals
+BLOCK_HEADER = struct.Struct('<Iqqbb')
+
+INT_TYPES = [np.dtype('<i1'), np.dtype('<i2'), np.dtype('<i4'), np.dtype('<i8')]
+
+def decimals(values):
+    """Fewest decimals d such that ``values`` are whole multiples of 10**-d
+    (exactly, after the round trip to float32); FLOAT if there are none"""
+    values = np.asarray(values, dtype=np.float32)
+    wide = values.astype(np.float64)
+    for d in range(MAX_DECIMALS + 1):
+        scale = 10.0 ** d
+        ticks = np.rint(wide * scale)
+        if np.array_equal((ticks / scale).astype(np.float32), values):
+            return d
+    return FLOAT
+
+def _pack_ints(values):
+    """Width code and bytes of ``values`` in the narrowest integer type"""
+    low, high = (values.min(), values.max()) if len(values) else (0, 0)
+    for code, dtype in enumerate(INT_TYPES):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return bytes([code]) + values.astype(dtype).tobytes()
+
+def _unpack_ints(buf, offset, count):
+    dtype = INT_TYPES[buf[offset]]
+    values = np.frombuffer(buf, dtype, count, offset + 1).astype(np.int64)
+    return values, offset + 1 + count * dtype.itemsize
+
+def _pack_column(values, decimals):
+    if decimals == FLOAT:
+        # Byte planes (every first byte, then every second, ...) compress
+        # much better than interleaved floats
+        planes = values.astype('<f4').view(np.uint8).reshape(-1, 4).T
+        return np.ascontiguousarray(planes).tobytes()
+    ticks = np.rint(values.astype(np.float64) * 10.0 ** decimals).astype(np.int64)
+    return struct.pack('<q', ticks[0]) + _pack_ints(np.diff(ticks))
+
+def _unpack_column(buf, offset, rows, decimals):
+    if decimals == FLOAT:
+        planes = np.frombuffer(buf, np.uint8, rows * 4, offset).reshape(4, rows)
+        return np.ascontiguousarray(planes.T).view('<f4').ravel(), offset + rows * 4
+    first, = struct.unpack_from('<q', buf, offset)
+    deltas, offset = _unpack_ints(buf, offset + 8, rows - 1)
+    ticks = np.empty(rows, dtype=np.int64)
+    ticks[0] = first
+    np.cumsum(deltas, out=ticks[1:])
+    ticks[1:] += first
+    return (ticks / 10.0 ** decimals).astype(np.float32), offset
+
+def encode_block(columns, codec='zlib'):
+    """Compressed bytes of one block ({'timestamp': ms, OHLCV...}, sorted).
+
+    Open times are stored as delta-of-deltas (all zero for a series without
+    gaps). Prices are scaled to integer ticks of 10**-d, d shared by the
+    four price columns, and delta encoded; volumes likewise with their own
+    d. Columns without an exact decimal scale are kept as float32.
+    """
+    timestamp = np.asarray(columns['timestamp'], dtype=np.int64)
+    rows = len(timestamp)
+    prices = [np.asarray(columns[col], dtype=np.float32) for col in PRICE_COLUMNS]
+    volume = np.asarray(columns['volume'], dtype=np.float32)
+    price_decimals = decimals(np.concatenate(prices))
+    volume_decimals = decimals(volume)
+
+    parts = [
+        BLOCK_HEADER.pack(rows, int(timestamp[0]), int(timestamp[1] - timestamp[0]) if rows > 1 else 0,
+                          price_decimals, volume_decimals),
+        _pack_ints(np.diff(timestamp, 2)),
+    ]
+    parts.extend(_pack_column(values, price_decimals) for values in prices)
+    parts.append(_pack_column(volume, volume_decimals))
+    return CODECS[codec][1](b''.join(parts))
+
+def decode_block(data, codec=0):
+    """{column: array} of a block from ``encode_block`` (``codec`` by id)"""
+    buf = DECOMPRESS[codec](data)
+    rows, first, first_delta, price_decimals, volume_decimals = BLOCK_HEADER.unpack_from(buf)
+    dod, offset = _unpack_ints(buf, BLOCK_HEADER.size, max(rows - 2, 0))
+    steps = np.zeros(rows, dtype=np.int64)
+    if rows > 1:
+        steps[1] = first_delta
+        steps[2:] = dod
+        np.cumsum(steps[1:], out=steps[1:])
+    columns = {'timestamp': first + np.cumsum(steps)}
+    for col in OHLCV_COLUMNS:
+        columns[col], offset = _unpack_column(
+            buf, offset, rows, volume_decimals if col == 'volume' else price_decimals
+        )
+    return columns
+
+def encode_blocks(columns, block_rows=BLOCK_ROWS, codec='zlib'):
+    """Index entries and data of ``columns`` cut into blocks of ``block_rows``"""
+    timestamp = columns['timestamp']
+    entries, blocks = [], []
+    for start in range(0, len(timestamp), block_rows):
+        stop = min(start + block_rows, len(timestamp))
+        data = encode_block({name: values[start:stop] for name, values in columns.items()}, codec)
+        entries.append((timestamp[start], timestamp[stop - 1], stop - start, CODECS[codec][0], 0, len(data)))
+        blocks.append(data)
+    return np.array(entries, dtype=INDEX_DTYPE), blocks
+
+def write_file(f, index, blocks):
+    """Header, index (offsets filled in here) and blocks"""
+    index = index.copy()
+    index['offset'] = np.cumsum(index['length'], dtype=np.uint64) - index['length']
+    f.write(HEADER.pack(MAGIC, len(index)))
+    f.write(index.tobytes())
+    for data in blocks:
+        f.write(data)
+
+def read_index(f):
+    """Index of an open block file and the offset its blocks start at"""
+    magic, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"Not a kline block file: {getattr(f, 'name', f)}")
+    index = np.frombuffer(f.read(count * INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)
+    return index, HEADER.size + count * INDEX_DTYPE.itemsize
+
+def read_block(f, base, entry):
+    f.seek(base + int(entry['offset']))
+    return f.read(int(entry['length']))
@@ -0,0 +1,147 @@
+from app.services.kline_codec import (
+    BLOCK_ROWS, INDEX_DTYPE, decode_block, encode_blocks, read_block, read_index, write_file
+)
+from app.services.timeframes import OHLCV_COLUMNS
+import numpy as np
+import pandas as pd
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ['timestamp'] + OHLCV_COLUMNS
+
+class KlineStore:
+    """On-disk kline history, one block file per symbol and interval.
+
+    Files hold fixed-size compressed blocks (see ``kline_codec``) behind an
+    index of their open times, so a range read only decodes the blocks it
+    overlaps. Reads return the open time (int64 ms) and float32 OHLCV, the
+    same compact layout as the in-memory ``KlineCache`` histories. Writes
+    merge with the stored history (sorted, later duplicates win), re-encode
+    only the blocks from the first one the new candles reach, and replace
+    the file atomically.
+    """
+
+    def __init__(self, root, block_rows=BLOCK_ROWS, codec='zlib'):
+        self.root = root
+        self.block_rows = block_rows
+        self.codec = codec
+        self._lock = threading.Lock()
+
+    def path(self, symbol, interval):
+        return os.path.join(self.root, interval, f'{symbol}.klc')
+
+    def symbols(self, interval):
+        directory = os.path.join(self.root, interval)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(directory) if name.endswith('.klc'))
+
+    def nbytes(self, symbol, interval):
+        path = self.path(symbol, interval)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def rows(self, symbol, interval):
+        """Number of stored candles, from the file index alone"""
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'rb') as f:
+            index, _ = read_index(f)
+        return int(index['rows'].sum())
+
+    def read_columns(self, symbol, interval, start=None, end=None, bars=None):
+        """{column: array} of the stored candles opened in [start, end] (ms),
+        the last ``bars`` of them if given; None if nothing is stored"""
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            index, base = read_index(f)
+            lo, hi = _block_range(index, start, end, bars)
+            blocks = [decode_block(read_block(f, base, entry), entry['codec']) for entry in index[lo:hi]]
+        columns = _concat(blocks)
+
+        timestamp = columns['timestamp']
+        first = 0 if start is None else int(np.searchsorted(timestamp, start))
+        last = len(timestamp) if end is None else int(np.searchsorted(timestamp, end, side='right'))
+        if bars is not None:
+            first = max(first, last - bars)
+        return {name: values[first:last] for name, values in columns.items()}
+
+    def read(self, symbol, interval, bars=None, start=None, end=None):
+        """Stored history as a compact frame (see ``read_columns``)"""
+        columns = self.read_columns(symbol, interval, start, end, bars)
+        if columns is None:
+            return None
+        out = {'timestamp': pd.to_datetime(columns['timestamp'], unit='ms')}
+        for col in OHLCV_COLUMNS:
+            out[col] = columns[col]
+        return pd.DataFrame(out)
+
+    def write(self, symbol, interval, columns):
+        """Merge ``columns`` ({'timestamp': ms, OHLCV...}) into the stored
+        history; returns the number of stored candles"""
+        columns = dedupe(columns)
+        path = self.path(symbol, interval)
+        with self._lock:
+            kept = np.empty(0, dtype=INDEX_DTYPE)
+            kept_blocks = []
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    index, base = read_index(f)
+                    if not len(columns['timestamp']):
+                        return int(index['rows'].sum())
+                    # Blocks ending before the new candles stay as they are;
+                    # the last one is always re-encoded so blocks stay full
+                    first = min(int(np.searchsorted(index['last'], columns['timestamp'][0])),
+                                max(len(index) - 1, 0))
+                    kept = index[:first]
+                    kept_blocks = [read_block(f, base, entry) for entry in kept]
+                    tail = [decode_block(read_block(f, base, entry), entry['codec']) for entry in index[first:]]
+                if tail:
+                    tail.append(columns)
+                    columns = dedupe(_concat(tail))
+            elif not len(columns['timestamp']):
+                return 0
+
+            index, blocks = encode_blocks(columns, self.block_rows, self.codec)
+            index = np.concatenate([kept, index])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                write_file(f, index, kept_blocks + blocks)
+            os.replace(tmp, path)
+            return int(index['rows'].sum())
+
+def _block_range(index, start, end, bars):
+    """Slice of the index blocks holding the candles a read asks for"""
+    lo = 0 if start is None else int(np.searchsorted(index['last'], start))
+    hi = len(index) if end is None else int(np.searchsorted(index['first'], end, side='right'))
+    if bars is not None and hi > lo:
+        # The last block may end after ``end``; count only whole blocks before it
+        need = bars + (int(index['rows'][hi - 1]) if end is not None else 0)
+        covered = np.cumsum(index['rows'][lo:hi][::-1])
+        lo = max(lo, hi - int(np.searchsorted(covered, need)) - 1)
+    return lo, hi
+
+def _concat(blocks):
+    if not blocks:
+        return {name: np.array([], dtype=np.int64 if name == 'timestamp' else np.float32)
+                for name in COLUMNS}
+    return {name: np.concatenate([block[name] for block in blocks]) for name in COLUMNS}
+
+def dedupe(columns):
+    """Columns sorted by open time, keeping the last row of each time"""
+    timestamp = np.asarray(columns['timestamp'], dtype=np.int64)
+    # Stable sort keeps the input order among equal times
+    order = np.argsort(timestamp, kind='stable')
+    timestamp = timestamp[order]
+    keep = np.ones(len(timestamp), dtype=bool)
+    keep[:-1] = timestamp[1:] != timestamp[:-1]
+    out = {'timestamp': timestamp[keep]}
+    for col in OHLCV_COLUMNS:
+        out[col] = np.asarray(columns[col], dtype=np.float32)[order][keep]
+    return out
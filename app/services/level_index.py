@@ -0,0 +1,75 @@
+import numpy as np
+
+class LevelBook:
+    """Price levels kept sorted with the id of their owner.
+
+    Lookups bisect the sorted array, so they cost O(log n + k) for k hits
+    however many levels are open. Additions and removals are buffered and
+    merged on the next lookup, so a batch of updates costs one sort.
+    """
+
+    def __init__(self):
+        self.levels = np.empty(0)
+        self.ids = np.empty(0, dtype=np.int64)
+        self._added_levels = []
+        self._added_ids = []
+        self._removed = []
+
+    def add(self, ids, levels):
+        self._added_ids.append(np.atleast_1d(np.asarray(ids, dtype=np.int64)))
+        self._added_levels.append(np.atleast_1d(np.asarray(levels, dtype=float)))
+
+    def remove(self, ids):
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        if self._added_ids:
+            # A removal only applies to levels added before it
+            added_ids = np.concatenate(self._added_ids)
+            added_levels = np.concatenate(self._added_levels)
+            keep = ~np.isin(added_ids, ids)
+            self._added_ids, self._added_levels = [added_ids[keep]], [added_levels[keep]]
+        self._removed.append(ids)
+
+    def __len__(self):
+        self._settle()
+        return len(self.ids)
+
+    def _settle(self):
+        if not (self._added_ids or self._removed):
+            return
+        levels, ids = self.levels, self.ids
+        if self._removed:
+            keep = ~np.isin(ids, np.concatenate(self._removed))
+            levels, ids = levels[keep], ids[keep]
+        levels = np.concatenate([levels] + self._added_levels)
+        ids = np.concatenate([ids] + self._added_ids)
+        order = np.argsort(levels, kind='stable')
+        self.levels, self.ids = levels[order], ids[order]
+        self._added_levels, self._added_ids = [], []
+        self._removed = []
+
+    def between(self, lo, hi):
+        """Ids with ``lo <= level <= hi``"""
+        self._settle()
+        start = np.searchsorted(self.levels, lo, side='left')
+        end = np.searchsorted(self.levels, hi, side='right')
+        return self.ids[start:end]
+
+    def below(self, price):
+        """Ids with ``level < price``"""
+        self._settle()
+        return self.ids[:np.searchsorted(self.levels, price, side='left')]
+
+    def above(self, price):
+        """Ids with ``level > price``"""
+        self._settle()
+        return self.ids[np.searchsorted(self.levels, price, side='right'):]
+
+    def at_or_below(self, price):
+        """Ids with ``level <= price``"""
+        self._settle()
+        return self.ids[:np.searchsorted(self.levels, price, side='right')]
+
+    def at_or_above(self, price):
+        """Ids with ``level >= price``"""
+        self._settle()
+        return self.ids[np.searchsorted(self.levels, price, side='left'):]
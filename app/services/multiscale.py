@@ -0,0 +1,129 @@
+import numpy as np
+
+class ExtremaPyramid:
+    """Strict local maxima/minima of one series for several window sizes.
+
+    A point that is an extremum for window ``w2`` is also one for every
+    ``w1 < w2``, so each scale only filters the survivors of the previous
+    scale against the extra ring of neighbours ``w1+1 .. w2``. The result
+    for every scale equals ``PatternAnalyzer.get_local_extrema``.
+    """
+
+    def __init__(self, data, scales):
+        self.data = np.asarray(data, dtype=float)
+        self.scales = sorted(set(scales))
+        self.maxima = {}
+        self.minima = {}
+        n = len(self.data)
+        maxima = minima = np.arange(n)
+        radius = 0
+        for scale in self.scales:
+            maxima = self._grow(maxima, radius, scale, np.greater)
+            minima = self._grow(minima, radius, scale, np.less)
+            self.maxima[scale] = maxima
+            self.minima[scale] = minima
+            radius = scale
+
+    def _grow(self, candidates, inner, outer, compare):
+        data = self.data
+        n = len(data)
+        candidates = candidates[(candidates >= outer) & (candidates < n - outer)]
+        center = data[candidates]
+        # Each neighbour offset usually discards most candidates, so the
+        # loop runs over ever smaller arrays.
+        for offset in range(inner + 1, outer + 1):
+            if not len(candidates):
+                break
+            keep = compare(center, data[candidates - offset]) & \
+                   compare(center, data[candidates + offset])
+            candidates = candidates[keep]
+            center = center[keep]
+        return candidates
+
+class TrendlinePyramid:
+    """Least-squares lines over the trailing ``lookback`` bars of a series.
+
+    Suffix sums of the tail are built once, so the fit for any lookback up
+    to ``max_lookback`` is O(1) and matches
+    ``np.polyfit(np.arange(lookback), data[-lookback:], 1)``; like that
+    slice, a series shorter than ``lookback`` is fitted whole.
+    """
+
+    def __init__(self, data, max_lookback):
+        tail = np.asarray(data, dtype=float)[-max_lookback:][::-1]
+        r = np.arange(len(tail))
+        # sum_y[k] / sum_ry[k]: sums over the last k bars, r = bars from the end
+        self.sum_y = np.r_[0.0, np.cumsum(tail)]
+        self.sum_ry = np.r_[0.0, np.cumsum(r * tail)]
+        self.max_lookback = max_lookback
+        self.bars = len(tail)
+
+    def fit(self, lookback):
+        """Return (slope, intercept) with x = 0 at the first bar of the window.
+
+        A single bar gives a flat line through it. Raises ValueError for an
+        empty series or a ``lookback`` beyond the one the sums were built for.
+        """
+        if lookback > self.max_lookback:
+            raise ValueError(f"Lookback {lookback} exceeds the pyramid's {self.max_lookback}")
+        n = min(lookback, self.bars)
+        if n < 1:
+            raise ValueError("No bars to fit a trendline to")
+        sum_y = self.sum_y[n]
+        if n < 2:
+            return 0.0, sum_y
+        # x = (n - 1) - r within the window
+        sum_xy = (n - 1) * sum_y - self.sum_ry[n]
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        denominator = n * sum_xx - sum_x ** 2
+        slope = (n * sum_xy - sum_x * sum_y) / denominator
+        intercept = (sum_y - slope * sum_x) / n
+        return slope, intercept
+
+class ScalePyramid:
+    """Extrema and trendline structure shared by all detectors and scales"""
+
+    def __init__(self, df, scales, lookbacks):
+        self.scales = sorted(set(scales))
+        self.highs = ExtremaPyramid(df['high'].values, self.scales)
+        self.lows = ExtremaPyramid(df['low'].values, self.scales)
+        max_lookback = max(max(lookbacks), 2 * max(self.scales))
+        self.lines = {
+            column: TrendlinePyramid(df[column].values, max_lookback)
+            for column in ('high', 'low', 'close')
+        }
+
+    def peaks(self, window):
+        return self.highs.maxima.get(window)
+
+    def troughs(self, window):
+        return self.lows.minima.get(window)
+
+    def trendline(self, column, lookback):
+        return self.lines[column].fit(lookback)
+
+def merge_across_scales(patterns, tolerance=0.01):
+    """Collapse detections of the same formation found at several scales.
+
+    Two patterns are the same formation when they share a type (and
+    timeframe) and their entry prices are within ``tolerance``. The most
+    confident detection is kept and records every scale it was seen at.
+    """
+    merged = []
+    for pattern in sorted(patterns, key=lambda p: p['confidence'], reverse=True):
+        entry = pattern.get('entry_price')
+        for kept in merged:
+            if kept['pattern_type'] != pattern['pattern_type'] or \
+               kept.get('timeframe') != pattern.get('timeframe'):
+                continue
+            kept_entry = kept.get('entry_price')
+            if entry and kept_entry and abs(entry - kept_entry) / kept_entry <= tolerance:
+                kept['scales'].append(pattern['scale'])
+                break
+        else:
+            pattern['scales'] = [pattern['scale']]
+            merged.append(pattern)
+    for pattern in merged:
+        pattern['scales'].sort()
+    return merged
@@ -0,0 +1,82 @@
+import asyncio
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class NotificationQueue:
+    """Deliver Telegram messages from one background worker.
+
+    ``put`` returns immediately, so request handlers and price loops never
+    wait on the network. The worker owns a single event loop for the
+    lifetime of the queue, sends whatever is queued (up to ``batch_size``
+    messages) concurrently and retries failed sends ``retries`` times.
+    """
+
+    def __init__(self, telegram_service, retries=3, backoff=2.0, batch_size=500):
+        self.telegram = telegram_service
+        self.retries = retries
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.sent = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def put(self, message, chat_id=None):
+        """Queue ``message`` for ``chat_id`` (default: the configured channel)"""
+        self._queue.put((chat_id, message))
+        self._start()
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def _start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._deliver(loop, batch)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            loop.close()
+
+    def _deliver(self, loop, batch):
+        for attempt in range(self.retries + 1):
+            try:
+                results = loop.run_until_complete(self.telegram.send_messages(batch))
+            except Exception as e:
+                logger.error(f"Error delivering notifications: {e}")
+                results = [False] * len(batch)
+            self.sent += sum(1 for ok in results if ok)
+            batch = [item for item, ok in zip(batch, results) if not ok]
+            if not batch:
+                return
+            if attempt < self.retries:
+                time.sleep(self.backoff * (attempt + 1))
+        self.failed += len(batch)
+        logger.error(f"Dropping {len(batch)} notifications after repeated failures")
+
+    def join(self):
+        """Block until every queued message was handled"""
+        self._queue.join()
+
+    def stats(self):
+        return {'queued': len(self), 'sent': self.sent, 'failed': self.failed}
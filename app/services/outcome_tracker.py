@@ -0,0 +1,114 @@
+from app import db
+from app.models.pattern import Pattern
+from app.services.setup_book import SetupBook, OPEN, FILLED, WON, LOST, CLOSED, to_datetime
+import numpy as np
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+STATUS_NAMES = {OPEN: 'open', FILLED: 'filled', WON: 'won', LOST: 'lost', CLOSED: 'expired'}
+
+class OutcomeTracker:
+    """Resolve the entry, take profit and stop loss of stored patterns.
+
+    Setups are kept in a SetupBook, so a price tick only touches the levels
+    it crosses. Fills and exits are buffered and written back by ``flush``.
+    """
+
+    def __init__(self, capacity=1024):
+        self.loaded = False
+        self.book = SetupBook(capacity)
+        self._dirty = []
+        self.applied = {}  # symbol -> open time of the last closed candle applied
+        self._lock = threading.Lock()
+
+    def load(self, symbols=None):
+        """Track every unresolved pattern stored in the database, of
+        ``symbols`` only if given"""
+        query = Pattern.query.filter(Pattern.outcome_status.in_(('open', 'filled')))
+        if symbols is not None:
+            query = query.filter(Pattern.symbol.in_(symbols))
+        patterns = query.all()
+        self.track(patterns)
+        self.loaded = True
+        logger.info(f"Tracking outcomes of {len(self)} setups")
+
+    def track(self, patterns):
+        """Start following stored ``Pattern`` rows that have complete levels"""
+        with self._lock:
+            for pattern in patterns:
+                if pattern.id in self.book.slots or not (
+                        pattern.entry_price and pattern.take_profit and pattern.stop_loss):
+                    continue
+                status = pattern.outcome_status or 'open'
+                if status not in ('open', 'filled'):
+                    continue
+                self.book.add(
+                    pattern.id, pattern.symbol, pattern.entry_price, pattern.take_profit,
+                    pattern.stop_loss, reference_price=pattern.price,
+                    state=FILLED if status == 'filled' else OPEN,
+                    created_at=pattern.timestamp, filled_at=pattern.filled_at
+                )
+
+    def __len__(self):
+        return len(self.book)
+
+    def on_price(self, symbol, price, timestamp=None):
+        """Apply a price snapshot"""
+        return self.on_candle(symbol, price, price, price, timestamp)
+
+    def on_candle(self, symbol, high, low, close=None, timestamp=None):
+        """Apply one candle of ``symbol``; returns the number of setups changed"""
+        with self._lock:
+            filled, won, lost = self.book.on_candle(symbol, high, low, timestamp)
+            changed = np.union1d(filled, np.concatenate([won, lost]))
+            if len(changed):
+                self._dirty.append(changed)
+        return len(changed)
+
+    def expire(self, cutoff):
+        """Stop tracking setups detected before ``cutoff``; they are written
+        back as expired by the next ``flush``"""
+        with self._lock:
+            expired = self.book.close(self.book.created_before(cutoff))
+            if len(expired):
+                self._dirty.append(expired)
+        return len(expired)
+
+    def flush(self):
+        """Write buffered fills and exits in one bulk update"""
+        book = self.book
+        with self._lock:
+            if not self._dirty:
+                return 0
+            slots = np.unique(np.concatenate(self._dirty))
+            self._dirty = []
+            changes = [{
+                'id': int(book.key[slot]),
+                'outcome_status': STATUS_NAMES[book.state[slot]],
+                'filled_at': to_datetime(book.filled_at[slot]),
+                'exit_price': None if np.isnan(book.exit_price[slot]) else float(book.exit_price[slot]),
+                'closed_at': to_datetime(book.closed_at[slot]),
+            } for slot in slots.tolist()]
+        if not changes:
+            return 0
+        try:
+            db.session.bulk_update_mappings(Pattern, changes)
+            db.session.commit()
+            logger.info(f"Updated outcome of {len(changes)} setups")
+        except Exception as e:
+            logger.error(f"Error writing outcome updates: {e}")
+            db.session.rollback()
+            with self._lock:
+                self._dirty.append(slots)
+            return 0
+        return len(changes)
+
+    def summary(self):
+        """Setup counts per status and the win rate of resolved setups"""
+        counts = self.book.counts()
+        resolved = counts[WON] + counts[LOST]
+        summary = {name: int(counts[state]) for state, name in STATUS_NAMES.items()}
+        summary['win_rate'] = round(counts[WON] / resolved, 3) if resolved else None
+        return summary
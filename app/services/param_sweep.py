@@ -0,0 +1,316 @@
+from app.services.pattern_analyzer import PatternAnalyzer, DETECTOR_PARAMS
+from app.services.setup_book import SetupBook, WON, LOST, OPEN, FILLED
+from app.services.timeframes import OHLCV_COLUMNS
+from multiprocessing import shared_memory, resource_tracker
+from datetime import datetime
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('expectancy', 'total_r', 'win_rate')
+
+class SharedHistory:
+    """Kline histories of many symbols in one shared memory block.
+
+    Open times (int64 ms) and float32 OHLCV of every symbol are laid out
+    column after column; ``spec`` is all a worker process needs to attach,
+    after which ``frame`` hands out read-only views into the block, so the
+    histories are loaded once and never copied per worker or per run.
+    """
+
+    def __init__(self, shm, symbols, rows, owner=False):
+        self.shm = shm
+        self.symbols = symbols  # symbol -> (start, stop) row range
+        self.rows = rows
+        self.owner = owner
+        self.columns = {}
+        offset = 0
+        for name in ['timestamp'] + OHLCV_COLUMNS:
+            dtype = np.dtype(np.int64 if name == 'timestamp' else np.float32)
+            column = np.ndarray((rows,), dtype=dtype, buffer=shm.buf, offset=offset)
+            offset += rows * dtype.itemsize
+            self.columns[name] = column
+
+    @classmethod
+    def create(cls, histories):
+        """Copy ``histories`` ({symbol: {column: array}}) into a new block"""
+        symbols, start = {}, 0
+        for symbol, columns in histories.items():
+            symbols[symbol] = (start, start + len(columns['timestamp']))
+            start += len(columns['timestamp'])
+        shm = shared_memory.SharedMemory(create=True, size=max(start * (8 + 4 * len(OHLCV_COLUMNS)), 1))
+        history = cls(shm, symbols, start, owner=True)
+        for symbol, columns in histories.items():
+            begin, end = symbols[symbol]
+            for name, column in history.columns.items():
+                column[begin:end] = columns[name]
+        history._protect()
+        return history
+
+    @classmethod
+    def attach(cls, spec):
+        name, symbols, rows = spec
+        history = cls(attach_untracked(name), symbols, rows)
+        history._protect()
+        return history
+
+    def _protect(self):
+        for column in self.columns.values():
+            column.flags.writeable = False
+
+    def spec(self):
+        return self.shm.name, self.symbols, self.rows
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def arrays(self, symbol):
+        """{column: view} of one symbol's history"""
+        begin, end = self.symbols[symbol]
+        return {name: column[begin:end] for name, column in self.columns.items()}
+
+    def frame(self, symbol, start, stop):
+        """Candles [start, stop) of ``symbol`` as a compact frame of views"""
+        arrays = self.arrays(symbol)
+        data = {'timestamp': arrays['timestamp'][start:stop].view('datetime64[ms]')}
+        for col in OHLCV_COLUMNS:
+            data[col] = arrays[col][start:stop]
+        return pd.DataFrame(data, copy=False)
+
+    def close(self):
+        self.columns = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def attach_untracked(name):
+    """Attach the shared memory block ``name`` without registering it with
+    this process's resource tracker, which would report it leaked and
+    unlink it when the process exits although only the creator owns it.
+    Unregistering after the attach is not enough: pool workers share the
+    creator's tracker, so that would drop the creator's own registration.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+def load_histories(store, interval, symbols=None, bars=None, min_bars=0):
+    """{symbol: columns} of the last ``bars`` stored candles per symbol"""
+    histories = {}
+    for symbol in symbols or store.symbols(interval):
+        columns = store.read_columns(symbol, interval, bars=bars)
+        if columns is None or len(columns['timestamp']) < min_bars:
+            logger.warning(f"Skipping {symbol}: not enough {interval} history")
+            continue
+        histories[symbol] = columns
+    return histories
+
+def setup_levels(pattern):
+    """(entry, take profit, stop loss) of a detection, None if incomplete"""
+    levels = pattern.get('entry_price'), pattern.get('take_profit'), pattern.get('stop_loss')
+    if any(level is None or not math.isfinite(level) for level in levels):
+        return None
+    entry, take_profit, stop_loss = levels
+    # The take profit and stop loss must lie on opposite sides of the entry
+    if (take_profit - entry) * (entry - stop_loss) <= 0:
+        return None
+    return levels
+
+def backtest(analyzer, history, symbol, bars=100, step=24, horizon=120):
+    """Outcomes of the setups ``analyzer`` finds in ``symbol``'s history.
+
+    The history is walked as the scanner would see it: every ``step``
+    candles the last ``bars`` are analyzed and each new setup goes into a
+    SetupBook, which the following candles fill and resolve exactly like
+    live outcomes. A formation reported again by later scans (same type
+    and entry) counts once. Setups unresolved ``horizon`` candles after
+    detection expire.
+    """
+    arrays = history.arrays(symbol)
+    timestamp, highs, lows, closes = arrays['timestamp'], arrays['high'], arrays['low'], arrays['close']
+    book = SetupBook()
+    seen = set()
+    detections = 0
+    spacing = np.int64(timestamp[1] - timestamp[0]) if len(timestamp) > 1 else np.int64(0)
+    for i in range(bars, len(timestamp)):
+        if (i - bars) % step == 0:
+            now = timestamp[i - 1].astype('datetime64[ms]')
+            for pattern in analyzer.analyze_all_patterns(history.frame(symbol, i - bars, i)):
+                detections += 1
+                levels = setup_levels(pattern)
+                key = (pattern['pattern_type'], levels and float(levels[0]))
+                if levels is None or key in seen:
+                    continue
+                seen.add(key)
+                book.add(len(seen), symbol, *levels, reference_price=float(closes[i - 1]), created_at=now)
+            book.close(book.created_before(now - horizon * spacing), symbol)
+        book.on_candle(symbol, float(highs[i]), float(lows[i]), timestamp[i].astype('datetime64[ms]'))
+
+    size = book.size
+    state = book.state[:size]
+    risk = np.abs(book.entry[:size] - book.stop_loss[:size])
+    reward = np.abs(book.take_profit[:size] - book.entry[:size])
+    won, lost = state == WON, state == LOST
+    return {
+        'detections': detections,
+        'setups': int(size),
+        'filled': int((~np.isnat(book.filled_at[:size])).sum()),
+        'won': int(won.sum()),
+        'lost': int(lost.sum()),
+        'open': int(np.isin(state, (OPEN, FILLED)).sum()),
+        'total_r': float((reward[won] / risk[won]).sum() - lost.sum()),
+    }
+
+def summarize(results):
+    """Totals of per-symbol backtests with win rate and expectancy (R per trade)"""
+    total = {key: sum(result[key] for result in results)
+             for key in ('detections', 'setups', 'filled', 'won', 'lost', 'open', 'total_r')}
+    trades = total['won'] + total['lost']
+    total['trades'] = trades
+    total['win_rate'] = total['won'] / trades if trades else None
+    total['expectancy'] = total['total_r'] / trades if trades else None
+    return total
+
+def evaluate(history, params, analyzer_options=None, bars=100, step=24, horizon=120):
+    """Backtest one parameter set on every symbol of ``history``"""
+    analyzer = PatternAnalyzer(params=params, **(analyzer_options or {}))
+    started = time.perf_counter()
+    results = [backtest(analyzer, history, symbol, bars, step, horizon) for symbol in history.symbols]
+    summary = summarize(results)
+    summary['seconds'] = round(time.perf_counter() - started, 2)
+    return summary
+
+_history = None  # SharedHistory attached by each worker process
+
+def _init_worker(spec):
+    global _history
+    _history = SharedHistory.attach(spec)
+
+def _evaluate(task):
+    number, params, options = task
+    return number, evaluate(_history, params, **options)
+
+def parse_space(items):
+    """Search space from ``name=v1,v2,...`` (choices) or ``name=low:high``
+    (uniform range, random search only) items"""
+    space = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if name not in DETECTOR_PARAMS:
+            raise ValueError(f"Unknown detector parameter: {name}")
+        if ':' in values:
+            low, high = values.split(':')
+            space[name] = (float(low), float(high))
+        else:
+            space[name] = [float(value) for value in values.split(',')]
+    return space
+
+def grid(space):
+    """Every combination of the choices in ``space``"""
+    if any(isinstance(values, tuple) for values in space.values()):
+        raise ValueError("Ranges need a random search; give choices for a grid")
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_search(space, count, seed=None):
+    """``count`` parameter sets drawn from ``space``"""
+    rng = random.Random(seed)
+    candidates = []
+    for _ in range(count):
+        candidates.append({
+            name: round(rng.uniform(*values), 6) if isinstance(values, tuple) else rng.choice(values)
+            for name, values in sorted(space.items())
+        })
+    return candidates
+
+def rank(entries, metric='expectancy', min_trades=20):
+    """Entries ordered by ``metric``; sets with fewer than ``min_trades``
+    resolved trades are not scored and come last"""
+    for entry in entries:
+        value = entry[metric]
+        entry['score'] = value if entry['trades'] >= min_trades and value is not None else None
+    entries.sort(key=lambda entry: (entry['score'] is not None, entry['score'] or 0, entry['trades']),
+                 reverse=True)
+    for position, entry in enumerate(entries, 1):
+        entry['rank'] = position
+    return entries
+
+def run_sweep(history, candidates, workers=4, analyzer_options=None, bars=100, step=24,
+              horizon=120, metric='expectancy', min_trades=20):
+    """Evaluate parameter sets over ``history`` in ``workers`` processes.
+
+    The current defaults are always evaluated as the baseline. Returns the
+    leaderboard: one entry per set with its full parameters and outcomes,
+    best first.
+    """
+    sets, keys = [], set()
+    for params in [{}] + list(candidates):
+        full = {**DETECTOR_PARAMS, **params}
+        key = tuple(sorted(full.items()))
+        if key not in keys:
+            keys.add(key)
+            sets.append(full)
+    options = {'analyzer_options': analyzer_options, 'bars': bars, 'step': step, 'horizon': horizon}
+    tasks = [(number, params, options) for number, params in enumerate(sets)]
+    logger.info(f"Evaluating {len(sets)} parameter sets on {len(history)} symbols")
+
+    entries = [None] * len(sets)
+    if workers > 1 and len(sets) > 1:
+        with multiprocessing.Pool(min(workers, len(sets)), initializer=_init_worker,
+                                  initargs=(history.spec(),)) as pool:
+            for done, (number, summary) in enumerate(pool.imap_unordered(_evaluate, tasks), 1):
+                entries[number] = summary
+                logger.info(f"{done}/{len(sets)} sets evaluated")
+    else:
+        for number, params, options in tasks:
+            entries[number] = evaluate(history, params, **options)
+
+    for params, entry in zip(sets, entries):
+        entry['params'] = params
+        entry['baseline'] = params == DETECTOR_PARAMS
+    return rank(entries, metric, min_trades)
+
+def save_best(path, leaderboard, metric, meta=None):
+    """Write the best scored set where the scanner loads it from; returns
+    the entry, or None (nothing written) if no set was scored"""
+    best = leaderboard[0] if leaderboard and leaderboard[0]['score'] is not None else None
+    if best is None:
+        logger.warning("No parameter set had enough trades to be scored")
+        return None
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'params': best['params'],
+            'metric': metric,
+            'score': best['score'],
+            'trades': best['trades'],
+            'created_at': datetime.utcnow().isoformat(),
+            **(meta or {}),
+        }, f, indent=2)
+    return best
+
+def load_params(path):
+    """Detector params saved by ``save_best``; None if there is no file"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        params = json.load(f).get('params', {})
+    unknown = set(params) - set(DETECTOR_PARAMS)
+    if unknown:
+        logger.warning(f"Ignoring unknown detector parameters in {path}: {', '.join(sorted(unknown))}")
+    return {name: value for name, value in params.items() if name in DETECTOR_PARAMS}
@@ -1,9 +1,51 @@
 import numpy as np
 import pandas as pd
+import threading
+import logging
+from contextlib import contextmanager
 from datetime import datetime
+from app.services.enumeration import recent, hs_windows, double_formations, triple_formations
+from app.services.multiscale import ScalePyramid, merge_across_scales
+from app.services.range_index import RangeIndex
+from app.services.regime import MarketRegime, trend_flags
+from app.services.scoring import ConfidenceScorer, frame_features
+from app.services.screening import ScreenStats, screen_features
+from app.services.pattern_record import PatternRecord
+
+logger = logging.getLogger(__name__)
+
+# Detector thresholds; ``PatternAnalyzer(params=...)`` overrides them, e.g.
+# with the best set found by ``scripts.sweep_params``
+DETECTOR_PARAMS = {
+    'tolerance': 0.02,           # double/triple tops & bottoms: levels within 2%
+    'shoulder_tolerance': 0.03,  # H&S: shoulders within 3%
+    'head_margin': 0.02,         # H&S: head at least 2% above the first shoulder
+    'flag_trend': 0.05,          # flags: pole trend change above 5%
+    'flat_slope': 0.0001,        # triangles: trendline slope counted as flat
+    'compression': 0.2,          # triangles: range compression earning a bonus
+}
+
+def anchor(index, price):
+    """Chart anchor of a pattern: bar position and price"""
+    return {'index': int(index), 'price': float(price)}
 
 class PatternAnalyzer:
-    def __init__(self):
+    def __init__(self, scales=(20,), exhaustive=False, lookback=500, screening=True, params=None):
+        # Window sizes to detect at; more than one enables multi-scale mode
+        self.scales = tuple(sorted(set(scales)))
+        # Report every qualifying formation in the last ``lookback`` bars
+        # instead of only the most recent extrema
+        self.exhaustive = exhaustive
+        self.lookback = lookback
+        unknown = set(params or {}) - set(DETECTOR_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown detector parameters: {', '.join(sorted(unknown))}")
+        self.params = {**DETECTOR_PARAMS, **(params or {})}
+        self.scorer = ConfidenceScorer()
+        # Skip detectors whose necessary conditions fail (see screening.py)
+        self.screening = ScreenStats() if screening else None
+        # Per-thread structures shared by the detectors of one analysis run
+        self._local = threading.local()
         self.patterns = {
             'head_and_shoulders': self.detect_head_and_shoulders,
             'double_top': self.detect_double_top,
@@ -14,6 +56,13 @@ class PatternAnalyzer:
             'wedge': self.detect_wedge,
             'flag': self.detect_flag
         }
+        self.enumerators = {
+            'head_and_shoulders': self.enumerate_head_and_shoulders,
+            'double_top': self.enumerate_double_top,
+            'double_bottom': self.enumerate_double_bottom,
+            'triple_top': self.enumerate_triple_top,
+            'triple_bottom': self.enumerate_triple_bottom
+        }
         self.retest_zones = {
             'head_and_shoulders': self.check_hs_retest,
             'double_top': self.check_top_retest,
@@ -187,11 +236,52 @@ class PatternAnalyzer:
 
     def check_wedge_retest(self, df, pattern):
         """Check retest for wedge patterns"""
-        return self.check_triangle_retest(df, pattern)  # Similar logic to triangles
+        # A rising wedge breaks down: the broken support must now hold as
+        # resistance. A falling wedge breaks up and the reverse applies.
+        bearish = pattern.get('pattern_type') == 'rising_wedge'
+        return self.check_breakout_retest(df, pattern, bearish, 'đường xu hướng của nêm')
 
     def check_flag_retest(self, df, pattern):
         """Check retest for flag patterns"""
-        return self.check_triangle_retest(df, pattern)  # Similar logic to triangles
+        bearish = pattern.get('pattern_type') == 'bear_flag'
+        return self.check_breakout_retest(df, pattern, bearish, 'kênh cờ')
+
+    def check_breakout_retest(self, df, pattern, bearish, level_name):
+        """Check the retest of a broken level from the breakout side.
+
+        At detection time price on the far side of the level has simply not
+        broken out yet, so only the RetestEngine marks these as failed.
+        """
+        try:
+            breakout_level = pattern.get('entry_price')
+            if not breakout_level:
+                return None
+
+            recent_price = df['close'].iloc[-1]
+
+            # Define retest zone (1% tolerance)
+            zone_lower = breakout_level * 0.99
+            zone_upper = breakout_level * 1.01
+
+            if zone_lower <= recent_price <= zone_upper:
+                return {
+                    'retest_status': 'confirmed',
+                    'retest_price': recent_price,
+                    'retest_description': f'Giá đã retest thành công {level_name} tại {recent_price:.2f}'
+                }
+            elif (bearish and recent_price > zone_upper) or (not bearish and recent_price < zone_lower):
+                return {
+                    'retest_status': 'pending',
+                    'retest_description': f'Đang chờ phá vỡ {level_name}'
+                }
+            else:
+                return {
+                    'retest_status': 'pending',
+                    'retest_description': f'Đang chờ retest {level_name}'
+                }
+        except Exception as e:
+            print(f"Error checking breakout retest: {e}")
+        return None
         
     def calculate_pattern_height(self, high, low):
         """Calculate pattern height"""
@@ -207,8 +297,9 @@ class PatternAnalyzer:
         
     def validate_price_levels(self, df, entry, tp, sl, pattern_type):
         """Validate and adjust price levels based on recent volatility"""
-        recent_high = df['high'].iloc[-10:].max()
-        recent_low = df['low'].iloc[-10:].min()
+        index = self._range_index(df)
+        recent_high = index.tail_max('high', 10)
+        recent_low = index.tail_min('low', 10)
         atr = self.calculate_atr(df)
         
         # Adjust based on pattern type and ATR
@@ -229,6 +320,9 @@ class PatternAnalyzer:
         
     def calculate_atr(self, df, period=14):
         """Calculate Average True Range"""
+        return self._memo(df, ('atr', period), lambda: self._atr(df, period))
+
+    def _atr(self, df, period):
         high = df['high']
         low = df['low']
         close = df['close']
@@ -242,24 +336,194 @@ class PatternAnalyzer:
 
     def analyze_all_patterns(self, df):
         """Analyze all patterns for a given dataframe"""
+        return self.analyze_many({None: df}, skip_errors=False)[None]
+
+    def analyze_many(self, frames, regime=None, skip_errors=True, detect=None):
+        """Analyze several frames ({key: df}, e.g. symbols or timeframes).
+
+        Detections of all frames are scored together in one batch.
+        ``regime`` is a MarketRegime covering the same keys (built once per
+        scan cycle); without it only the trends of ``frames`` are used.
+        With ``skip_errors`` a frame that fails is logged and left out of
+        the result instead of failing every other frame. ``detect(key, df,
+        regime readings)`` replaces ``detect_patterns`` (e.g. to serve raw
+        detections from a memo); it must return fresh pattern dicts.
+        """
+        if regime is None:
+            regime = MarketRegime.from_frames(frames, market=False)
+        if detect is None:
+            detect = lambda key, df, readings: self.detect_patterns(df, regime=readings)
+        detected = {}
+        for key, df in frames.items():
+            try:
+                detected[key] = detect(key, df, regime.lookup(key))
+            except Exception as e:
+                if not skip_errors:
+                    raise
+                logger.error(f"Error analyzing {key}: {e}")
+        try:
+            self.scorer.score(detected.values())
+        except Exception:
+            if not skip_errors:
+                raise
+            # Scores are written only once the batch succeeds, so the
+            # frames can be rescored one by one to find the failing ones
+            for key in list(detected):
+                try:
+                    self.scorer.score([detected[key]])
+                except Exception as e:
+                    logger.error(f"Error scoring {key}: {e}")
+                    del detected[key]
+        results = {}
+        for key, (patterns, _) in detected.items():
+            try:
+                results[key] = self.finish_patterns(frames[key], patterns)
+            except Exception as e:
+                if not skip_errors:
+                    raise
+                logger.error(f"Error finishing patterns of {key}: {e}")
+        return results
+
+    def analyze_multi_scale(self, df, scales=None):
+        """Run every detector at several window sizes.
+
+        Extrema and trendlines for all scales are built once in a
+        ScalePyramid and read by the detectors; detections of the same
+        formation at different scales are merged.
+        """
+        patterns, features = self.detect_patterns(df, scales)
+        self.scorer.score([(patterns, features)])
+        return self.finish_patterns(df, patterns)
+
+    def detect_patterns(self, df, scales=None, regime=None):
+        """Raw detections of every detector and scale, plus the frame
+        features used to score them (None when nothing was detected)"""
+        if regime is None:
+            regime = MarketRegime.from_frames({None: df}, market=False).lookup(None)
+        scales = sorted(set(scales or self.scales))
+        pyramid = ScalePyramid(df, scales, [self.trendline_lookback(s) for s in scales])
+        with self.frame_context(df, pyramid):
+            patterns = []
+            for scale in scales:
+                for pattern in self.run_detectors(df, scale):
+                    if len(scales) > 1:
+                        pattern['scale'] = scale
+                    patterns.append(pattern)
+            # Indicators only matter for scoring, so frames without
+            # detections never compute them
+            features = frame_features(df, regime) if patterns else None
+        return patterns, features
+
+    def run_detectors(self, df, window):
+        """Run every detector at one window size"""
         results = []
-        trend = self.get_market_trend(df)
-        
+        eligible = self.screening.eligible(self.screen(df, window), self.params) if self.screening else self.patterns
         for pattern_name, pattern_func in self.patterns.items():
-            pattern = pattern_func(df)
-            if pattern:
-                # Enhance confidence based on trend alignment
-                pattern['confidence'] = self.adjust_confidence_by_trend(pattern, trend)
-                # Add volume confirmation
-                pattern['confidence'] = self.adjust_confidence_by_volume(df, pattern)
-                # Add technical indicator confirmation
-                pattern['confidence'] = self.confirm_with_indicators(df, pattern)
-                # Check for retest
-                pattern = self.check_retest(df, pattern, pattern['pattern_type'])
-                results.append(pattern)
-                
+            if pattern_name not in eligible:
+                continue
+            if self.exhaustive and pattern_name in self.enumerators:
+                results.extend(self.enumerators[pattern_name](df, window=window))
+            else:
+                pattern = pattern_func(df, window=window)
+                if pattern:
+                    results.append(pattern)
         return results
 
+    def screen(self, df, window):
+        """Screening features of ``df`` at one window size"""
+        lookback = self.trendline_lookback(window)
+        slopes = (
+            self._trendline(df, 'high', lookback)[0],
+            self._trendline(df, 'low', lookback)[0],
+            self._trendline(df, 'close', window)[0],
+        )
+        return screen_features(
+            df['close'].values, df['high'].values, df['low'].values,
+            self._peaks(df, window), self._troughs(df, window),
+            slopes, window, lookback
+        )
+
+    def finish_patterns(self, df, patterns):
+        """Check retests of scored detections and merge/rank them"""
+        patterns = [self.check_retest(df, p, p['pattern_type']) for p in patterns]
+        if any('scale' in p for p in patterns):
+            patterns = merge_across_scales(patterns)
+        return self.rank(patterns) if self.exhaustive else patterns
+
+    def rank(self, patterns):
+        """Order detections by confidence, then by how recent they end"""
+        return sorted(patterns,
+                      key=lambda p: (p['confidence'], p.get('indices', [-1])[-1]),
+                      reverse=True)
+
+    def trendline_lookback(self, window):
+        """Bars used by the trendline detectors for a given window (30 for 20)"""
+        return window * 3 // 2
+
+    @contextmanager
+    def frame_context(self, df, pyramid=None):
+        """Share one RangeIndex (and optional ScalePyramid) for ``df``
+        between all detectors called inside the block"""
+        previous = getattr(self._local, 'context', None)
+        self._local.context = (df, pyramid, RangeIndex(df), {})
+        try:
+            yield
+        finally:
+            self._local.context = previous
+
+    def _pyramid(self, df):
+        """Shared ScalePyramid if ``df`` is the frame being analyzed"""
+        context = getattr(self._local, 'context', None)
+        if context is not None and context[0] is df:
+            return context[1]
+        return None
+
+    def _range_index(self, df):
+        """Shared RangeIndex if ``df`` is the frame being analyzed"""
+        context = getattr(self._local, 'context', None)
+        if context is not None and context[0] is df:
+            return context[2]
+        return RangeIndex(df)
+
+    def _memo(self, df, key, compute):
+        """Compute a frame-level value once per analysis run of ``df``"""
+        context = getattr(self._local, 'context', None)
+        if context is None or context[0] is not df:
+            return compute()
+        memo = context[3]
+        if key not in memo:
+            memo[key] = compute()
+        return memo[key]
+
+    def _peaks(self, df, window):
+        pyramid = self._pyramid(df)
+        if pyramid is not None and window in pyramid.scales:
+            return pyramid.peaks(window)
+        peaks, _ = self.get_local_extrema(df['high'].values, window)
+        return peaks
+
+    def _troughs(self, df, window):
+        pyramid = self._pyramid(df)
+        if pyramid is not None and window in pyramid.scales:
+            return pyramid.troughs(window)
+        _, troughs = self.get_local_extrema(df['low'].values, window)
+        return troughs
+
+    def _trendline(self, df, column, lookback):
+        """(slope, intercept) of a least-squares line over the last ``lookback`` bars"""
+        pyramid = self._pyramid(df)
+        if pyramid is not None:
+            return pyramid.trendline(column, lookback)
+        y = df[column].values[-lookback:]
+        slope, intercept = np.polyfit(np.arange(len(y)), y, 1)
+        return slope, intercept
+
+    def _line(self, df, lookback, slope, intercept):
+        """Endpoints of a ``_trendline`` fit over the last ``lookback`` bars"""
+        bars = min(lookback, len(df))
+        start = len(df) - bars
+        return [anchor(start, intercept), anchor(start + bars - 1, intercept + slope * (bars - 1))]
+
     def get_local_extrema(self, data, window=20):
         """Find local maxima and minima"""
         maxima = []
@@ -276,100 +540,89 @@ class PatternAnalyzer:
         return np.array(maxima), np.array(minima)
 
     def get_market_trend(self, df, ma_short=20, ma_long=50):
-        """Determine market trend using multiple methods"""
-        # Method 1: Moving Average Analysis
-        df['SMA_short'] = df['close'].rolling(window=ma_short).mean()
-        df['SMA_long'] = df['close'].rolling(window=ma_long).mean()
-        ma_trend = "bullish" if df['SMA_short'].iloc[-1] > df['SMA_long'].iloc[-1] else "bearish"
-        
-        # Method 2: Higher Highs and Lower Lows
-        highs = df['high'].rolling(window=5).max()
-        lows = df['low'].rolling(window=5).min()
-        price_trend = "bullish" if (highs.diff() > 0).sum() > (lows.diff() < 0).sum() else "bearish"
-        
-        # Method 3: Price vs SMA
-        price_vs_sma = "bullish" if df['close'].iloc[-1] > df['SMA_long'].iloc[-1] else "bearish"
-        
-        # Combine all methods
-        trends = [ma_trend, price_trend, price_vs_sma]
-        return max(set(trends), key=trends.count)  # Return most common trend
+        """Determine market trend using multiple methods (see regime.trend_flags)"""
+        bullish, _ = trend_flags([df], ma_short, ma_long)
+        return 'bullish' if bullish[0] else 'bearish'
 
     def detect_head_and_shoulders(self, df, window=20):
         """Detect Head and Shoulders pattern with enhanced analysis"""
         try:
-            highs = df['high'].values
-            lows = df['low'].values
-            peaks, _ = self.get_local_extrema(highs, window)
+            peaks = self._peaks(df, window)
             
             if len(peaks) < 5:
                 return None
             
-            for i in range(len(peaks)-4):
-                p1, p2, p3, p4, p5 = highs[peaks[i:i+5]]
-                
-                # Check pattern criteria with precise measurements
-                if (p3 > max(p1, p5) and  # Head higher than shoulders
-                    abs(p1 - p5) / p1 < 0.03 and  # Shoulders at similar levels (3% tolerance)
-                    min(p2, p4) < min(p1, p5) and  # Neckline validation
-                    p3 > p1 * 1.02):  # Head at least 2% higher than shoulders
-                    
-                    # Calculate neckline
-                    neckline_start = (p1 + lows[peaks[i]:peaks[i+1]].min()) / 2
-                    neckline_end = (p5 + lows[peaks[i+3]:peaks[i+4]].min()) / 2
-                    neckline_slope = (neckline_end - neckline_start) / (peaks[i+4] - peaks[i])
-                    neckline_angle = np.degrees(np.arctan(neckline_slope))
-                    
-                    # Calculate price levels
-                    pattern_height = p3 - min(neckline_start, neckline_end)
-                    entry_price = neckline_end
-                    is_inverse = df['close'].iloc[-1] > p3
-                    
-                    if is_inverse:
-                        stop_loss = entry_price - pattern_height * 0.1  # 10% of height
-                        take_profit = entry_price + pattern_height
-                    else:
-                        stop_loss = entry_price + pattern_height * 0.1
-                        take_profit = entry_price - pattern_height
-                    
-                    # Validate levels
-                    entry_price, take_profit, stop_loss = self.validate_price_levels(
-                        df, entry_price, take_profit, stop_loss, 
-                        'inverse_head_and_shoulders' if is_inverse else 'head_and_shoulders'
-                    )
-                    
-                    # Validate with volume
-                    vol_head = df['volume'].iloc[peaks[i+2]]
-                    vol_shoulders = (df['volume'].iloc[peaks[i]] + df['volume'].iloc[peaks[i+4]]) / 2
-                    vol_confirms = vol_head > vol_shoulders
-                    
-                    risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
-                    
-                    pattern = {
-                        'pattern_type': 'head_and_shoulders',
-                        'confidence': 0.8 if vol_confirms else 0.6,
-                        'price': df['close'].iloc[-1],
-                        'entry_price': entry_price,
-                        'take_profit': take_profit,
-                        'stop_loss': stop_loss,
-                        'risk_reward_ratio': risk_reward,
-                        'description': (
-                            f'Mô hình Vai-Đầu-Vai {"đảo ngược" if is_inverse else "chuẩn"} '
-                            f'{"với xác nhận khối lượng" if vol_confirms else "cần theo dõi thêm"}. '
-                            f'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward}'
-                            f'Góc neckline: {neckline_angle:.1f}°'
-                        )
-                    }
-                    return pattern
+            # First qualifying formation scanning forward
+            starts = hs_windows(peaks, df['high'].values, self.params['shoulder_tolerance'],
+                                self.params['head_margin'])
+            if len(starts):
+                return self._head_and_shoulders_pattern(df, peaks[starts[0]:starts[0]+5])
                     
         except Exception as e:
             print(f"Error in head and shoulders detection: {e}")
         return None
 
-    def detect_double_top(self, df, window=20, tolerance=0.02):
+    def _head_and_shoulders_pattern(self, df, shoulders):
+        """Build the H&S detection for five consecutive peak positions"""
+        highs = df['high'].values
+        index = self._range_index(df)
+        p1, p2, p3, p4, p5 = highs[shoulders]
+        
+        # Calculate neckline
+        neckline_start = (p1 + index.min('low', shoulders[0], shoulders[1])) / 2
+        neckline_end = (p5 + index.min('low', shoulders[3], shoulders[4])) / 2
+        neckline_slope = (neckline_end - neckline_start) / (shoulders[4] - shoulders[0])
+        neckline_angle = np.degrees(np.arctan(neckline_slope))
+        
+        # Calculate price levels
+        pattern_height = p3 - min(neckline_start, neckline_end)
+        entry_price = neckline_end
+        is_inverse = df['close'].iloc[-1] > p3
+        
+        if is_inverse:
+            stop_loss = entry_price - pattern_height * 0.1  # 10% of height
+            take_profit = entry_price + pattern_height
+        else:
+            stop_loss = entry_price + pattern_height * 0.1
+            take_profit = entry_price - pattern_height
+        
+        # Validate levels
+        entry_price, take_profit, stop_loss = self.validate_price_levels(
+            df, entry_price, take_profit, stop_loss, 
+            'inverse_head_and_shoulders' if is_inverse else 'head_and_shoulders'
+        )
+        
+        # Validate with volume
+        vol_head = df['volume'].iloc[shoulders[2]]
+        vol_shoulders = (df['volume'].iloc[shoulders[0]] + df['volume'].iloc[shoulders[4]]) / 2
+        vol_confirms = vol_head > vol_shoulders
+        
+        risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
+        
+        return PatternRecord(
+            pattern_type='head_and_shoulders',
+            confidence=0.8 if vol_confirms else 0.6,
+            price=df['close'].iloc[-1],
+            entry_price=entry_price,
+            take_profit=take_profit,
+            stop_loss=stop_loss,
+            risk_reward_ratio=risk_reward,
+            indices=[int(i) for i in shoulders],
+            points=[anchor(i, price) for i, price in zip(shoulders, (p1, p2, p3, p4, p5))],
+            lines={
+                'neckline': [anchor(shoulders[0], neckline_start), anchor(shoulders[4], neckline_end)]
+            },
+            template='head_and_shoulders',
+            params={'inverse': is_inverse, 'volume': vol_confirms, 'neckline_angle': neckline_angle}
+        )
+
+    def detect_double_top(self, df, window=20, tolerance=None):
         """Detect Double Top pattern with enhanced validation"""
+        if tolerance is None:
+            tolerance = self.params['tolerance']
         try:
             highs = df['high'].values
-            peaks, _ = self.get_local_extrema(highs, window)
+            peaks = self._peaks(df, window)
             
             if len(peaks) < 2:
                 return None
@@ -377,67 +630,82 @@ class PatternAnalyzer:
             # Analyze last two peaks
             peak1, peak2 = highs[peaks[-2:]]
             peak1_idx, peak2_idx = peaks[-2:]
+            trough = self._range_index(df).min('low', peak1_idx, peak2_idx)
             
             # Validate pattern criteria
             if (abs(peak1 - peak2) / peak1 < tolerance and  # Peaks at similar levels
                 peak2_idx - peak1_idx > window * 2 and  # Minimum distance between peaks
-                min(df['low'].iloc[peak1_idx:peak2_idx]) < min(peak1, peak2) * 0.97):  # Valid trough
-                
-                # Volume analysis
-                vol1 = df['volume'].iloc[peak1_idx]
-                vol2 = df['volume'].iloc[peak2_idx]
-                vol_trend = "bearish" if vol2 < vol1 else "neutral"
-                
-                # Price momentum comparison
-                momentum1 = highs[peak1_idx] - highs[peak1_idx-5]
-                momentum2 = highs[peak2_idx] - highs[peak2_idx-5]
-                weakening = momentum2 < momentum1
-                
-                confidence = 0.8
-                if vol_trend == "bearish":
-                    confidence += 0.1
-                if weakening:
-                    confidence += 0.1
-                    
-                # Calculate price levels
-                pattern_height = self.calculate_pattern_height(peak1, min(df['low'].iloc[peak1_idx:peak2_idx]))
-                entry_price = min(df['low'].iloc[peak1_idx:peak2_idx])
-                stop_loss = peak2 + pattern_height * 0.1  # 10% above peak2
-                take_profit = entry_price - pattern_height  # Full height projection
-                
-                # Validate levels
-                entry_price, take_profit, stop_loss = self.validate_price_levels(
-                    df, entry_price, take_profit, stop_loss, 'double_top'
-                )
-                
-                risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
-                
-                pattern = {
-                    'pattern_type': 'double_top',
-                    'confidence': min(confidence, 1.0),
-                    'price': df['close'].iloc[-1],
-                    'entry_price': entry_price,
-                    'take_profit': take_profit,
-                    'stop_loss': stop_loss,
-                    'risk_reward_ratio': risk_reward,
-                    'description': (
-                        f'Double Top với khoảng cách {peak2_idx - peak1_idx} nến. '
-                        f'{"Động lượng giảm ở đỉnh 2. " if weakening else ""}'
-                        f'{"Khối lượng giảm dần." if vol_trend == "bearish" else ""}'
-                        f'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward}'
-                    )
-                }
-                return pattern
+                trough < min(peak1, peak2) * 0.97):  # Valid trough
+                return self._double_top_pattern(df, peak1_idx, peak2_idx, trough)
                 
         except Exception as e:
             print(f"Error in double top detection: {e}")
         return None
 
-    def detect_double_bottom(self, df, window=20, tolerance=0.02):
+    def _double_top_pattern(self, df, peak1_idx, peak2_idx, trough):
+        """Build the double top detection for two peak positions"""
+        highs = df['high'].values
+        peak1, peak2 = highs[peak1_idx], highs[peak2_idx]
+        
+        # Volume analysis
+        vol1 = df['volume'].iloc[peak1_idx]
+        vol2 = df['volume'].iloc[peak2_idx]
+        vol_trend = "bearish" if vol2 < vol1 else "neutral"
+        
+        # Price momentum comparison
+        momentum1 = highs[peak1_idx] - highs[peak1_idx-5]
+        momentum2 = highs[peak2_idx] - highs[peak2_idx-5]
+        weakening = momentum2 < momentum1
+        
+        confidence = 0.8
+        if vol_trend == "bearish":
+            confidence += 0.1
+        if weakening:
+            confidence += 0.1
+            
+        # Calculate price levels
+        pattern_height = self.calculate_pattern_height(peak1, trough)
+        entry_price = trough
+        stop_loss = peak2 + pattern_height * 0.1  # 10% above peak2
+        take_profit = entry_price - pattern_height  # Full height projection
+        
+        # Validate levels
+        entry_price, take_profit, stop_loss = self.validate_price_levels(
+            df, entry_price, take_profit, stop_loss, 'double_top'
+        )
+        
+        risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
+        
+        # Chart anchors: base of the rise, first peak, trough, second peak
+        index = self._range_index(df)
+        base_idx = index.argmin('low', max(2 * peak1_idx - peak2_idx, 0), peak1_idx)
+        trough_idx = index.argmin('low', peak1_idx, peak2_idx)
+        
+        return PatternRecord(
+            pattern_type='double_top',
+            confidence=min(confidence, 1.0),
+            price=df['close'].iloc[-1],
+            entry_price=entry_price,
+            take_profit=take_profit,
+            stop_loss=stop_loss,
+            risk_reward_ratio=risk_reward,
+            indices=[int(peak1_idx), int(peak2_idx)],
+            points=[
+                anchor(base_idx, df['low'].iloc[base_idx]), anchor(peak1_idx, peak1),
+                anchor(trough_idx, trough), anchor(peak2_idx, peak2)
+            ],
+            lines={'neckline': [anchor(trough_idx, trough), anchor(len(df) - 1, trough)]},
+            template='double_top',
+            params={'distance': peak2_idx - peak1_idx, 'momentum': weakening, 'volume': vol_trend == 'bearish'}
+        )
+
+    def detect_double_bottom(self, df, window=20, tolerance=None):
         """Detect Double Bottom pattern with enhanced validation"""
+        if tolerance is None:
+            tolerance = self.params['tolerance']
         try:
             lows = df['low'].values
-            _, troughs = self.get_local_extrema(lows, window)
+            troughs = self._troughs(df, window)
             
             if len(troughs) < 2:
                 return None
@@ -445,203 +713,316 @@ class PatternAnalyzer:
             # Analyze last two troughs
             trough1, trough2 = lows[troughs[-2:]]
             trough1_idx, trough2_idx = troughs[-2:]
+            peak = self._range_index(df).max('high', trough1_idx, trough2_idx)
             
             # Validate pattern criteria
             if (abs(trough1 - trough2) / trough1 < tolerance and  # Troughs at similar levels
                 trough2_idx - trough1_idx > window * 2 and  # Minimum distance between troughs
-                max(df['high'].iloc[trough1_idx:trough2_idx]) > max(trough1, trough2) * 1.03):  # Valid peak
-                
-                # Volume analysis
-                vol1 = df['volume'].iloc[trough1_idx]
-                vol2 = df['volume'].iloc[trough2_idx]
-                vol_trend = "bullish" if vol2 > vol1 else "neutral"
-                
-                # Price momentum comparison
-                momentum1 = lows[trough1_idx] - lows[trough1_idx-5]
-                momentum2 = lows[trough2_idx] - lows[trough2_idx-5]
-                strengthening = momentum2 > momentum1
-                
-                confidence = 0.8
-                if vol_trend == "bullish":
-                    confidence += 0.1
-                if strengthening:
-                    confidence += 0.1
-                    
-                # Calculate price levels
-                pattern_height = self.calculate_pattern_height(max(df['high'].iloc[trough1_idx:trough2_idx]), trough1)
-                entry_price = max(df['high'].iloc[trough1_idx:trough2_idx])
-                stop_loss = trough2 - pattern_height * 0.1  # 10% below trough2
-                take_profit = entry_price + pattern_height  # Full height projection
-                
-                # Validate levels
-                entry_price, take_profit, stop_loss = self.validate_price_levels(
-                    df, entry_price, take_profit, stop_loss, 'double_bottom'
-                )
-                
-                risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
-                
-                pattern = {
-                    'pattern_type': 'double_bottom',
-                    'confidence': min(confidence, 1.0),
-                    'price': df['close'].iloc[-1],
-                    'entry_price': entry_price,
-                    'take_profit': take_profit,
-                    'stop_loss': stop_loss,
-                    'risk_reward_ratio': risk_reward,
-                    'description': (
-                        f'Double Bottom với khoảng cách {trough2_idx - trough1_idx} nến. '
-                        f'{"Động lượng tăng ở đáy 2. " if strengthening else ""}'
-                        f'{"Khối lượng tăng dần." if vol_trend == "bullish" else ""}'
-                        f'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward}'
-                    )
-                }
-                return pattern
+                peak > max(trough1, trough2) * 1.03):  # Valid peak
+                return self._double_bottom_pattern(df, trough1_idx, trough2_idx, peak)
                 
         except Exception as e:
             print(f"Error in double bottom detection: {e}")
         return None
 
-    def detect_triple_top(self, df, window=20, tolerance=0.02):
+    def _double_bottom_pattern(self, df, trough1_idx, trough2_idx, peak):
+        """Build the double bottom detection for two trough positions"""
+        lows = df['low'].values
+        trough1, trough2 = lows[trough1_idx], lows[trough2_idx]
+        
+        # Volume analysis
+        vol1 = df['volume'].iloc[trough1_idx]
+        vol2 = df['volume'].iloc[trough2_idx]
+        vol_trend = "bullish" if vol2 > vol1 else "neutral"
+        
+        # Price momentum comparison
+        momentum1 = lows[trough1_idx] - lows[trough1_idx-5]
+        momentum2 = lows[trough2_idx] - lows[trough2_idx-5]
+        strengthening = momentum2 > momentum1
+        
+        confidence = 0.8
+        if vol_trend == "bullish":
+            confidence += 0.1
+        if strengthening:
+            confidence += 0.1
+            
+        # Calculate price levels
+        pattern_height = self.calculate_pattern_height(peak, trough1)
+        entry_price = peak
+        stop_loss = trough2 - pattern_height * 0.1  # 10% below trough2
+        take_profit = entry_price + pattern_height  # Full height projection
+        
+        # Validate levels
+        entry_price, take_profit, stop_loss = self.validate_price_levels(
+            df, entry_price, take_profit, stop_loss, 'double_bottom'
+        )
+        
+        risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
+        
+        # Chart anchors: top of the fall, first trough, peak, second trough
+        index = self._range_index(df)
+        base_idx = index.argmax('high', max(2 * trough1_idx - trough2_idx, 0), trough1_idx)
+        peak_idx = index.argmax('high', trough1_idx, trough2_idx)
+        
+        return PatternRecord(
+            pattern_type='double_bottom',
+            confidence=min(confidence, 1.0),
+            price=df['close'].iloc[-1],
+            entry_price=entry_price,
+            take_profit=take_profit,
+            stop_loss=stop_loss,
+            risk_reward_ratio=risk_reward,
+            indices=[int(trough1_idx), int(trough2_idx)],
+            points=[
+                anchor(base_idx, df['high'].iloc[base_idx]), anchor(trough1_idx, trough1),
+                anchor(peak_idx, peak), anchor(trough2_idx, trough2)
+            ],
+            lines={'neckline': [anchor(peak_idx, peak), anchor(len(df) - 1, peak)]},
+            template='double_bottom',
+            params={'distance': trough2_idx - trough1_idx, 'momentum': strengthening, 'volume': vol_trend == 'bullish'}
+        )
+
+    def detect_triple_top(self, df, window=20, tolerance=None):
         """Detect Triple Top pattern"""
+        if tolerance is None:
+            tolerance = self.params['tolerance']
         try:
             highs = df['high'].values
-            peaks, _ = self.get_local_extrema(highs, window)
+            peaks = self._peaks(df, window)
             
             if len(peaks) < 3:
                 return None
             
             # Check last three peaks
             peak1, peak2, peak3 = highs[peaks[-3:]]
-            peak1_idx, peak2_idx, peak3_idx = peaks[-3:]
             
             if (abs(peak1 - peak2) / peak1 < tolerance and
                 abs(peak2 - peak3) / peak2 < tolerance and
                 abs(peak1 - peak3) / peak1 < tolerance):
-                
-                # Volume analysis
-                vols = [df['volume'].iloc[idx] for idx in [peak1_idx, peak2_idx, peak3_idx]]
-                decreasing_volume = all(vols[i] > vols[i+1] for i in range(len(vols)-1))
-                
-                confidence = 0.85
-                if decreasing_volume:
-                    confidence += 0.1
-                    
-                # Calculate price levels
-                lowest_point = min(df['low'].iloc[peak1_idx:peak3_idx])
-                pattern_height = self.calculate_pattern_height(peak1, lowest_point)
-                entry_price = lowest_point
-                stop_loss = peak3 + pattern_height * 0.1  # 10% above last peak
-                take_profit = entry_price - pattern_height  # Full height projection
-                
-                # Validate levels
-                entry_price, take_profit, stop_loss = self.validate_price_levels(
-                    df, entry_price, take_profit, stop_loss, 'triple_top'
-                )
-                
-                risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
-                
-                pattern = {
-                    'pattern_type': 'triple_top',
-                    'confidence': confidence,
-                    'price': df['close'].iloc[-1],
-                    'entry_price': entry_price,
-                    'take_profit': take_profit,
-                    'stop_loss': stop_loss,
-                    'risk_reward_ratio': risk_reward,
-                    'description': (
-                        f'Triple Top với đỉnh tương đương. '
-                        f'{"Khối lượng giảm dần qua các đỉnh." if decreasing_volume else ""}'
-                        f'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward}'
-                    )
-                }
-                return pattern
+                return self._triple_top_pattern(df, peaks[-3:])
                 
         except Exception as e:
             print(f"Error in triple top detection: {e}")
         return None
 
-    def detect_triple_bottom(self, df, window=20, tolerance=0.02):
+    def _triple_top_pattern(self, df, tops):
+        """Build the triple top detection for three peak positions"""
+        highs = df['high'].values
+        peak1, peak2, peak3 = highs[tops]
+        peak1_idx, peak2_idx, peak3_idx = tops
+        
+        # Volume analysis
+        vols = [df['volume'].iloc[idx] for idx in [peak1_idx, peak2_idx, peak3_idx]]
+        decreasing_volume = all(vols[i] > vols[i+1] for i in range(len(vols)-1))
+        
+        confidence = 0.85
+        if decreasing_volume:
+            confidence += 0.1
+            
+        # Calculate price levels
+        index = self._range_index(df)
+        lowest_point = index.min('low', peak1_idx, peak3_idx)
+        pattern_height = self.calculate_pattern_height(peak1, lowest_point)
+        entry_price = lowest_point
+        stop_loss = peak3 + pattern_height * 0.1  # 10% above last peak
+        take_profit = entry_price - pattern_height  # Full height projection
+        
+        # Validate levels
+        entry_price, take_profit, stop_loss = self.validate_price_levels(
+            df, entry_price, take_profit, stop_loss, 'triple_top'
+        )
+        
+        risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
+        
+        return PatternRecord(
+            pattern_type='triple_top',
+            confidence=confidence,
+            price=df['close'].iloc[-1],
+            entry_price=entry_price,
+            take_profit=take_profit,
+            stop_loss=stop_loss,
+            risk_reward_ratio=risk_reward,
+            indices=[int(i) for i in tops],
+            points=[
+                anchor(peak1_idx, peak1),
+                anchor(index.argmin('low', peak1_idx, peak2_idx), index.min('low', peak1_idx, peak2_idx)),
+                anchor(peak2_idx, peak2),
+                anchor(index.argmin('low', peak2_idx, peak3_idx), index.min('low', peak2_idx, peak3_idx)),
+                anchor(peak3_idx, peak3)
+            ],
+            lines={
+                'neckline': [anchor(index.argmin('low', peak1_idx, peak3_idx), lowest_point),
+                             anchor(len(df) - 1, lowest_point)]
+            },
+            template='triple_top',
+            params={'volume': decreasing_volume}
+        )
+
+    def detect_triple_bottom(self, df, window=20, tolerance=None):
         """Detect Triple Bottom pattern"""
+        if tolerance is None:
+            tolerance = self.params['tolerance']
         try:
             lows = df['low'].values
-            _, troughs = self.get_local_extrema(lows, window)
+            troughs = self._troughs(df, window)
             
             if len(troughs) < 3:
                 return None
             
             # Check last three troughs
             trough1, trough2, trough3 = lows[troughs[-3:]]
-            trough1_idx, trough2_idx, trough3_idx = troughs[-3:]
             
             if (abs(trough1 - trough2) / trough1 < tolerance and
                 abs(trough2 - trough3) / trough2 < tolerance and
                 abs(trough1 - trough3) / trough1 < tolerance):
-                
-                # Volume analysis
-                vols = [df['volume'].iloc[idx] for idx in [trough1_idx, trough2_idx, trough3_idx]]
-                increasing_volume = all(vols[i] < vols[i+1] for i in range(len(vols)-1))
-                
-                confidence = 0.85
-                if increasing_volume:
-                    confidence += 0.1
-                    
-                # Calculate price levels
-                highest_point = max(df['high'].iloc[trough1_idx:trough3_idx])
-                pattern_height = self.calculate_pattern_height(highest_point, trough1)
-                entry_price = highest_point
-                stop_loss = trough3 - pattern_height * 0.1  # 10% below last trough
-                take_profit = entry_price + pattern_height  # Full height projection
-                
-                # Validate levels
-                entry_price, take_profit, stop_loss = self.validate_price_levels(
-                    df, entry_price, take_profit, stop_loss, 'triple_bottom'
-                )
-                
-                risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
-                
-                pattern = {
-                    'pattern_type': 'triple_bottom',
-                    'confidence': confidence,
-                    'price': df['close'].iloc[-1],
-                    'entry_price': entry_price,
-                    'take_profit': take_profit,
-                    'stop_loss': stop_loss,
-                    'risk_reward_ratio': risk_reward,
-                    'description': (
-                        f'Triple Bottom với đáy tương đương. '
-                        f'{"Khối lượng tăng dần qua các đáy." if increasing_volume else ""}'
-                        f'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward}'
-                    )
-                }
-                return pattern
+                return self._triple_bottom_pattern(df, troughs[-3:])
                 
         except Exception as e:
             print(f"Error in triple bottom detection: {e}")
         return None
 
-    def detect_triangle(self, df, window=20):
+    def _triple_bottom_pattern(self, df, bottoms):
+        """Build the triple bottom detection for three trough positions"""
+        lows = df['low'].values
+        trough1, trough2, trough3 = lows[bottoms]
+        trough1_idx, trough2_idx, trough3_idx = bottoms
+        
+        # Volume analysis
+        vols = [df['volume'].iloc[idx] for idx in [trough1_idx, trough2_idx, trough3_idx]]
+        increasing_volume = all(vols[i] < vols[i+1] for i in range(len(vols)-1))
+        
+        confidence = 0.85
+        if increasing_volume:
+            confidence += 0.1
+            
+        # Calculate price levels
+        index = self._range_index(df)
+        highest_point = index.max('high', trough1_idx, trough3_idx)
+        pattern_height = self.calculate_pattern_height(highest_point, trough1)
+        entry_price = highest_point
+        stop_loss = trough3 - pattern_height * 0.1  # 10% below last trough
+        take_profit = entry_price + pattern_height  # Full height projection
+        
+        # Validate levels
+        entry_price, take_profit, stop_loss = self.validate_price_levels(
+            df, entry_price, take_profit, stop_loss, 'triple_bottom'
+        )
+        
+        risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
+        
+        return PatternRecord(
+            pattern_type='triple_bottom',
+            confidence=confidence,
+            price=df['close'].iloc[-1],
+            entry_price=entry_price,
+            take_profit=take_profit,
+            stop_loss=stop_loss,
+            risk_reward_ratio=risk_reward,
+            indices=[int(i) for i in bottoms],
+            points=[
+                anchor(trough1_idx, trough1),
+                anchor(index.argmax('high', trough1_idx, trough2_idx), index.max('high', trough1_idx, trough2_idx)),
+                anchor(trough2_idx, trough2),
+                anchor(index.argmax('high', trough2_idx, trough3_idx), index.max('high', trough2_idx, trough3_idx)),
+                anchor(trough3_idx, trough3)
+            ],
+            lines={
+                'neckline': [anchor(index.argmax('high', trough1_idx, trough3_idx), highest_point),
+                             anchor(len(df) - 1, highest_point)]
+            },
+            template='triple_bottom',
+            params={'volume': increasing_volume}
+        )
+
+    def enumerate_head_and_shoulders(self, df, window=20, lookback=None):
+        """Every H&S formation in the last ``lookback`` bars"""
+        try:
+            peaks = recent(self._peaks(df, window), len(df), lookback or self.lookback)
+            return [self._head_and_shoulders_pattern(df, peaks[start:start+5])
+                    for start in hs_windows(peaks, df['high'].values, self.params['shoulder_tolerance'],
+                                self.params['head_margin'])]
+        except Exception as e:
+            print(f"Error in head and shoulders enumeration: {e}")
+        return []
+
+    def enumerate_double_top(self, df, window=20, tolerance=None, lookback=None):
+        """Every double top formed by two peaks in the last ``lookback`` bars"""
+        if tolerance is None:
+            tolerance = self.params['tolerance']
+        try:
+            peaks = recent(self._peaks(df, window), len(df), lookback or self.lookback)
+            first, second, trough = double_formations(
+                peaks, df['high'].values, self._range_index(df), window, tolerance, top=True
+            )
+            return [self._double_top_pattern(df, i, j, level)
+                    for i, j, level in zip(first, second, trough)]
+        except Exception as e:
+            print(f"Error in double top enumeration: {e}")
+        return []
+
+    def enumerate_double_bottom(self, df, window=20, tolerance=None, lookback=None):
+        """Every double bottom formed by two troughs in the last ``lookback`` bars"""
+        if tolerance is None:
+            tolerance = self.params['tolerance']
+        try:
+            troughs = recent(self._troughs(df, window), len(df), lookback or self.lookback)
+            first, second, peak = double_formations(
+                troughs, df['low'].values, self._range_index(df), window, tolerance, top=False
+            )
+            return [self._double_bottom_pattern(df, i, j, level)
+                    for i, j, level in zip(first, second, peak)]
+        except Exception as e:
+            print(f"Error in double bottom enumeration: {e}")
+        return []
+
+    def enumerate_triple_top(self, df, window=20, tolerance=None, lookback=None):
+        """Every triple top formed by three peaks in the last ``lookback`` bars"""
+        if tolerance is None:
+            tolerance = self.params['tolerance']
+        try:
+            peaks = recent(self._peaks(df, window), len(df), lookback or self.lookback)
+            return [self._triple_top_pattern(df, tops)
+                    for tops in triple_formations(peaks, df['high'].values, tolerance)]
+        except Exception as e:
+            print(f"Error in triple top enumeration: {e}")
+        return []
+
+    def enumerate_triple_bottom(self, df, window=20, tolerance=None, lookback=None):
+        """Every triple bottom formed by three troughs in the last ``lookback`` bars"""
+        if tolerance is None:
+            tolerance = self.params['tolerance']
+        try:
+            troughs = recent(self._troughs(df, window), len(df), lookback or self.lookback)
+            return [self._triple_bottom_pattern(df, bottoms)
+                    for bottoms in triple_formations(troughs, df['low'].values, tolerance)]
+        except Exception as e:
+            print(f"Error in triple bottom enumeration: {e}")
+        return []
+
+    def detect_triangle(self, df, window=20, lookback=None):
         """Detect Triangle patterns with trend line analysis"""
         try:
-            highs = df['high'].values[-30:]  # Last 30 periods
-            lows = df['low'].values[-30:]
+            lookback = lookback or self.trendline_lookback(window)
+            highs = df['high'].values[-lookback:]  # Last 30 periods by default
+            lows = df['low'].values[-lookback:]
             
             # Calculate trend lines using least squares
-            x = np.arange(len(highs))
-            high_slope, high_intercept = np.polyfit(x, highs, 1)
-            low_slope, low_intercept = np.polyfit(x, lows, 1)
+            high_slope, high_intercept = self._trendline(df, 'high', lookback)
+            low_slope, low_intercept = self._trendline(df, 'low', lookback)
+            flat = self.params['flat_slope']
             
-            if abs(high_slope - low_slope) > 0.0001:  # Avoid division by zero
+            if abs(high_slope - low_slope) > flat:  # Avoid division by zero
                 x_intersect = (low_intercept - high_intercept) / (high_slope - low_slope)
                 y_intersect = high_slope * x_intersect + high_intercept
                 
                 if 0 < x_intersect < len(highs) * 2:  # Convergence within reasonable range
-                    if high_slope < -0.0001 and low_slope > 0.0001:
+                    if high_slope < -flat and low_slope > flat:
                         pattern_type = 'symmetric_triangle'
                         confidence = 0.85
-                    elif high_slope < -0.0001 and abs(low_slope) < 0.0001:
+                    elif high_slope < -flat and abs(low_slope) < flat:
                         pattern_type = 'descending_triangle'
                         confidence = 0.8
-                    elif abs(high_slope) < 0.0001 and low_slope > 0.0001:
+                    elif abs(high_slope) < flat and low_slope > flat:
                         pattern_type = 'ascending_triangle'
                         confidence = 0.8
                     else:
@@ -652,30 +1033,34 @@ class PatternAnalyzer:
                     final_range = highs[-1] - lows[-1]
                     compression = 1 - (final_range / initial_range)
                     
-                    if compression > 0.2:
+                    if compression > self.params['compression']:
                         confidence += 0.1
                         
+                    index = self._range_index(df)
+                    top = index.tail_max('high', lookback)
+                    bottom = index.tail_min('low', lookback)
+                    
                     # Calculate price levels based on pattern type
                     if pattern_type == 'ascending_triangle':
-                        entry_price = max(highs)
-                        pattern_height = max(highs) - min(lows)
-                        stop_loss = min(lows[-5:])  # Use recent low
+                        entry_price = top
+                        pattern_height = top - bottom
+                        stop_loss = index.tail_min('low', 5)  # Use recent low
                         take_profit = entry_price + pattern_height
                     elif pattern_type == 'descending_triangle':
-                        entry_price = min(lows)
-                        pattern_height = max(highs) - min(lows)
-                        stop_loss = max(highs[-5:])  # Use recent high
+                        entry_price = bottom
+                        pattern_height = top - bottom
+                        stop_loss = index.tail_max('high', 5)  # Use recent high
                         take_profit = entry_price - pattern_height
                     else:  # symmetric_triangle
                         current_price = df['close'].iloc[-1]
-                        pattern_height = max(highs) - min(lows)
+                        pattern_height = top - bottom
                         if current_price > y_intersect:  # Bullish breakout
-                            entry_price = max(highs)
-                            stop_loss = min(lows[-5:])
+                            entry_price = top
+                            stop_loss = index.tail_min('low', 5)
                             take_profit = entry_price + pattern_height
                         else:  # Bearish breakout
-                            entry_price = min(lows)
-                            stop_loss = max(highs[-5:])
+                            entry_price = bottom
+                            stop_loss = index.tail_max('high', 5)
                             take_profit = entry_price - pattern_height
                     
                     # Validate levels
@@ -685,37 +1070,34 @@ class PatternAnalyzer:
                     
                     risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
                     
-                    pattern = {
-                        'pattern_type': pattern_type,
-                        'confidence': min(confidence, 1.0),
-                        'price': df['close'].iloc[-1],
-                        'entry_price': entry_price,
-                        'take_profit': take_profit,
-                        'stop_loss': stop_loss,
-                        'risk_reward_ratio': risk_reward,
-                        'description': (
-                            f'{pattern_type.replace("_", " ").title()} '
-                            f'với độ nén giá {compression:.1%}. '
-                            f'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward}. '
-                            f'Điểm hội tụ sau {int(x_intersect)} nến.'
-                        )
-                    }
+                    upper = self._line(df, lookback, high_slope, high_intercept)
+                    lower = self._line(df, lookback, low_slope, low_intercept)
+                    
+                    pattern = PatternRecord(
+                        pattern_type=pattern_type,
+                        confidence=min(confidence, 1.0),
+                        price=df['close'].iloc[-1],
+                        entry_price=entry_price,
+                        take_profit=take_profit,
+                        stop_loss=stop_loss,
+                        risk_reward_ratio=risk_reward,
+                        points=upper + lower,
+                        lines={'upper': upper, 'lower': lower},
+                        template='triangle',
+                        params={'compression': compression, 'convergence': int(x_intersect)}
+                    )
                     return pattern
                     
         except Exception as e:
             print(f"Error in triangle detection: {e}")
         return None
 
-    def detect_wedge(self, df, window=20):
+    def detect_wedge(self, df, window=20, lookback=None):
         """Detect Wedge patterns"""
         try:
-            closes = df['close'].values[-30:]
-            highs = df['high'].values[-30:]
-            lows = df['low'].values[-30:]
-            
-            x = np.arange(len(closes))
-            high_slope, _ = np.polyfit(x, highs, 1)
-            low_slope, _ = np.polyfit(x, lows, 1)
+            lookback = lookback or self.trendline_lookback(window)
+            high_slope, high_intercept = self._trendline(df, 'high', lookback)
+            low_slope, low_intercept = self._trendline(df, 'low', lookback)
             
             if (high_slope > 0 and low_slope > 0) or (high_slope < 0 and low_slope < 0):
                 if high_slope > low_slope:
@@ -729,16 +1111,19 @@ class PatternAnalyzer:
                     confidence += 0.1
                     
                     # Calculate price levels
-                    pattern_height = max(highs) - min(lows)
+                    index = self._range_index(df)
+                    top = index.tail_max('high', lookback)
+                    bottom = index.tail_min('low', lookback)
+                    pattern_height = top - bottom
                     current_price = df['close'].iloc[-1]
                     
                     if pattern_type == 'rising_wedge':  # Bearish
-                        entry_price = min(lows)
-                        stop_loss = max(highs) + pattern_height * 0.1
+                        entry_price = bottom
+                        stop_loss = top + pattern_height * 0.1
                         take_profit = entry_price - pattern_height
                     else:  # falling_wedge - Bullish
-                        entry_price = max(highs)
-                        stop_loss = min(lows) - pattern_height * 0.1
+                        entry_price = top
+                        stop_loss = bottom - pattern_height * 0.1
                         take_profit = entry_price + pattern_height
                         
                     # Validate levels
@@ -747,20 +1132,22 @@ class PatternAnalyzer:
                     )
                     
                     risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
+                    upper = self._line(df, lookback, high_slope, high_intercept)
+                    lower = self._line(df, lookback, low_slope, low_intercept)
                     
-                    pattern = {
-                        'pattern_type': pattern_type,
-                        'confidence': confidence,
-                        'price': df['close'].iloc[-1],
-                        'entry_price': entry_price,
-                        'take_profit': take_profit,
-                        'stop_loss': stop_loss,
-                        'risk_reward_ratio': risk_reward,
-                        'description': (
-                            f'{pattern_type.replace("_", " ").title()} với góc {angle:.1f}°. '
-                            f'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward}'
-                        )
-                    }
+                    pattern = PatternRecord(
+                        pattern_type=pattern_type,
+                        confidence=confidence,
+                        price=df['close'].iloc[-1],
+                        entry_price=entry_price,
+                        take_profit=take_profit,
+                        stop_loss=stop_loss,
+                        risk_reward_ratio=risk_reward,
+                        points=upper + lower,
+                        lines={'upper': upper, 'lower': lower},
+                        template='wedge',
+                        params={'angle': angle}
+                    )
                 return pattern
                 
         except Exception as e:
@@ -775,10 +1162,10 @@ class PatternAnalyzer:
             trend_end = closes[-window:].mean()
             trend_change = (trend_end - trend_start) / trend_start
             
-            if abs(trend_change) > 0.05:
+            if abs(trend_change) > self.params['flag_trend']:
                 x = np.arange(window)
                 y = closes[-window:]
-                slope, intercept = np.polyfit(x, y, 1)
+                slope, intercept = self._trendline(df, 'close', window)
                 
                 if (trend_change > 0 and slope < 0) or (trend_change < 0 and slope > 0):
                     pattern_type = 'bull_flag' if trend_change > 0 else 'bear_flag'
@@ -791,18 +1178,24 @@ class PatternAnalyzer:
                         confidence += 0.1
                         
                     # Calculate flag pole height and channel height
-                    pole_start = closes[-window*2:-window].max() if trend_change > 0 else closes[-window*2:-window].min()
-                    pole_end = closes[-window:].min() if trend_change > 0 else closes[-window:].max()
+                    index = self._range_index(df)
+                    n = len(closes)
+                    pole_range = (max(n - window * 2, 0), n - window)
+                    channel_high = index.tail_max('close', window)
+                    channel_low = index.tail_min('close', window)
+                    pole_idx = index.argmax('close', *pole_range) if trend_change > 0 else index.argmin('close', *pole_range)
+                    pole_start = closes[pole_idx]
+                    pole_end = channel_low if trend_change > 0 else channel_high
                     pole_height = abs(pole_end - pole_start)
-                    channel_height = abs(max(y) - min(y))
+                    channel_height = abs(channel_high - channel_low)
                     
                     if pattern_type == 'bull_flag':
-                        entry_price = max(closes[-window:])
-                        stop_loss = min(closes[-window:]) - channel_height * 0.5
+                        entry_price = channel_high
+                        stop_loss = channel_low - channel_height * 0.5
                         take_profit = entry_price + pole_height
                     else:  # bear_flag
-                        entry_price = min(closes[-window:])
-                        stop_loss = max(closes[-window:]) + channel_height * 0.5
+                        entry_price = channel_low
+                        stop_loss = channel_high + channel_height * 0.5
                         take_profit = entry_price - pole_height
                         
                     # Validate levels
@@ -811,95 +1204,24 @@ class PatternAnalyzer:
                     )
                     
                     risk_reward = self.calculate_risk_reward_ratio(entry_price, take_profit, stop_loss)
+                    channel = self._line(df, window, slope, intercept)
+                    pole = [anchor(pole_idx, pole_start), channel[0]]
                     
-                    pattern = {
-                        'pattern_type': pattern_type,
-                        'confidence': confidence,
-                        'price': df['close'].iloc[-1],
-                        'entry_price': entry_price,
-                        'take_profit': take_profit,
-                        'stop_loss': stop_loss,
-                        'risk_reward_ratio': risk_reward,
-                        'description': (
-                            f'{pattern_type.replace("_", " ").title()} '
-                            f'sau xu hướng {abs(trend_change):.1%}. '
-                            f'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward}'
-                        )
-                    }
+                    pattern = PatternRecord(
+                        pattern_type=pattern_type,
+                        confidence=confidence,
+                        price=df['close'].iloc[-1],
+                        entry_price=entry_price,
+                        take_profit=take_profit,
+                        stop_loss=stop_loss,
+                        risk_reward_ratio=risk_reward,
+                        points=pole + channel[1:],
+                        lines={'pole': pole, 'channel': channel},
+                        template='flag',
+                        params={'trend_change': abs(trend_change)}
+                    )
                     return pattern
                     
         except Exception as e:
             print(f"Error in flag detection: {e}")
         return None
-
-    def adjust_confidence_by_trend(self, pattern, trend):
-        """Adjust pattern confidence based on trend alignment"""
-        confidence = pattern['confidence']
-        bullish_patterns = ['double_bottom', 'triple_bottom', 'ascending_triangle', 'falling_wedge']
-        bearish_patterns = ['double_top', 'triple_top', 'descending_triangle', 'rising_wedge']
-        
-        if pattern['pattern_type'] in bullish_patterns and trend == 'bullish':
-            confidence = min(confidence + 0.1, 1.0)
-        elif pattern['pattern_type'] in bearish_patterns and trend == 'bearish':
-            confidence = min(confidence + 0.1, 1.0)
-        
-        return confidence
-
-    def adjust_confidence_by_volume(self, df, pattern):
-        """Adjust pattern confidence based on volume confirmation"""
-        confidence = pattern['confidence']
-        vol_ma = df['volume'].rolling(window=20).mean()
-        recent_vol = df['volume'].iloc[-5:].mean()
-        
-        if recent_vol > vol_ma.iloc[-1] * 1.2:
-            confidence = min(confidence + 0.05, 1.0)
-        elif recent_vol < vol_ma.iloc[-1] * 0.8:
-            confidence = max(confidence - 0.05, 0.0)
-            
-        return confidence
-
-    def confirm_with_indicators(self, df, pattern):
-        """Confirm pattern with technical indicators"""
-        confidence = pattern['confidence']
-        
-        # Calculate indicators
-        df['SMA_20'] = df['close'].rolling(window=20).mean()
-        df['SMA_50'] = df['close'].rolling(window=50).mean()
-        
-        # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        # MACD
-        exp1 = df['close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['close'].ewm(span=26, adjust=False).mean()
-        macd = exp1 - exp2
-        signal = macd.ewm(span=9, adjust=False).mean()
-        
-        # Bollinger Bands
-        df['BB_middle'] = df['close'].rolling(window=20).mean()
-        std = df['close'].rolling(window=20).std()
-        df['BB_upper'] = df['BB_middle'] + (2 * std)
-        df['BB_lower'] = df['BB_middle'] - (2 * std)
-        
-        # Adjust confidence based on indicators
-        last_rsi = rsi.iloc[-1]
-        bb_position = (df['close'].iloc[-1] - df['BB_lower'].iloc[-1]) / \
-                     (df['BB_upper'].iloc[-1] - df['BB_lower'].iloc[-1])
-        macd_cross = (macd.iloc[-2] < signal.iloc[-2] and macd.iloc[-1] > signal.iloc[-1]) or \
-                     (macd.iloc[-2] > signal.iloc[-2] and macd.iloc[-1] < signal.iloc[-1])
-        
-        if pattern['pattern_type'] in ['double_bottom', 'triple_bottom']:
-            if last_rsi < 30 and bb_position < 0.2:
-                confidence = min(confidence + 0.1, 1.0)
-        elif pattern['pattern_type'] in ['double_top', 'triple_top']:
-            if last_rsi > 70 and bb_position > 0.8:
-                confidence = min(confidence + 0.1, 1.0)
-        
-        if macd_cross:
-            confidence = min(confidence + 0.05, 1.0)
-            
-        return confidence
@@ -0,0 +1,144 @@
+DEFAULT_LANGUAGE = 'vi'
+
+LEVELS = 'Entry: {entry_price:.2f}, TP: {take_profit:.2f}, SL: {stop_loss:.2f}, R/R: {risk_reward_ratio}'
+
+# Description templates per language and template name. ``{title}`` is the
+# pattern type in title case; the other fields are record fields or params.
+TEMPLATES = {
+    'vi': {
+        'head_and_shoulders': 'Mô hình Vai-Đầu-Vai {inverse} {volume}. ' + LEVELS + 'Góc neckline: {neckline_angle:.1f}°',
+        'double_top': 'Double Top với khoảng cách {distance} nến. {momentum}{volume}' + LEVELS,
+        'double_bottom': 'Double Bottom với khoảng cách {distance} nến. {momentum}{volume}' + LEVELS,
+        'triple_top': 'Triple Top với đỉnh tương đương. {volume}' + LEVELS,
+        'triple_bottom': 'Triple Bottom với đáy tương đương. {volume}' + LEVELS,
+        'triangle': '{title} với độ nén giá {compression:.1%}. ' + LEVELS + '. Điểm hội tụ sau {convergence} nến.',
+        'wedge': '{title} với góc {angle:.1f}°. ' + LEVELS,
+        'flag': '{title} sau xu hướng {trend_change:.1%}. ' + LEVELS,
+    },
+}
+
+# Phrases picked by boolean params: {language: {template: {param: (if true, if false)}}}
+PHRASES = {
+    'vi': {
+        'head_and_shoulders': {
+            'inverse': ('đảo ngược', 'chuẩn'),
+            'volume': ('với xác nhận khối lượng', 'cần theo dõi thêm'),
+        },
+        'double_top': {
+            'momentum': ('Động lượng giảm ở đỉnh 2. ', ''),
+            'volume': ('Khối lượng giảm dần.', ''),
+        },
+        'double_bottom': {
+            'momentum': ('Động lượng tăng ở đáy 2. ', ''),
+            'volume': ('Khối lượng tăng dần.', ''),
+        },
+        'triple_top': {'volume': ('Khối lượng giảm dần qua các đỉnh.', '')},
+        'triple_bottom': {'volume': ('Khối lượng tăng dần qua các đáy.', '')},
+    },
+}
+
+def render_description(record, language=DEFAULT_LANGUAGE):
+    """Text of ``record``'s description template in ``language``"""
+    fields = dict(record.params)
+    for name, (yes, no) in PHRASES[language].get(record.template, {}).items():
+        fields[name] = yes if fields[name] else no
+    return TEMPLATES[language][record.template].format(
+        title=record.pattern_type.replace('_', ' ').title(),
+        entry_price=record.entry_price,
+        take_profit=record.take_profit,
+        stop_loss=record.stop_loss,
+        risk_reward_ratio=record.risk_reward_ratio,
+        **fields
+    )
+
+class PatternRecord:
+    """One detection: numeric fields in slots, description rendered on use.
+
+    Detectors only record the numbers their description needs (``params``
+    for ``template``); the text is formatted when ``description`` is read,
+    i.e. for patterns that are stored, served or notified. Records also
+    behave like the pattern dicts used before (``p['entry_price']``,
+    ``p.get``, ``in``, ``update``), so callers need not change; fields
+    that were never set are absent, as missing keys were. Keys outside the
+    slots (retest results, timeframe, scale, ...) live in ``extra``.
+    """
+
+    __slots__ = ('pattern_type', 'confidence', 'price', 'entry_price', 'take_profit',
+                 'stop_loss', 'risk_reward_ratio', 'indices', 'points', 'lines',
+                 'template', 'params', 'extra')
+
+    FIELDS = __slots__[:10]
+
+    def __init__(self, template, params, **fields):
+        self.template = template
+        self.params = params
+        self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @property
+    def description(self):
+        return render_description(self)
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if key == 'description':
+            return self.description
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, values):
+        for key, value in values.items():
+            self[key] = value
+
+    def keys(self):
+        keys = [key for key in self.FIELDS if hasattr(self, key)]
+        keys.append('description')
+        if self.extra:
+            keys.extend(self.extra)
+        return keys
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        """Plain dict with the description rendered, e.g. for JSON"""
+        return dict(self.items())
+
+    def copy(self):
+        record = PatternRecord(self.template, self.params)
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                setattr(record, key, getattr(self, key))
+        if self.extra:
+            record.extra = dict(self.extra)
+        return record
+
+    def __repr__(self):
+        return f'<PatternRecord {self.pattern_type} {self.confidence:.2f}>'
@@ -0,0 +1,79 @@
+import numpy as np
+
+class SparseTable:
+    """O(1) range argmin/argmax over a fixed array after an O(n log n) build.
+
+    Ranges are half-open ``[lo, hi)`` like Python slices and must be
+    non-empty. ``lo``/``hi`` may be scalars or equally shaped integer arrays,
+    so many ranges can be answered in one vectorized call. Ties resolve to
+    the leftmost position, matching ``np.argmin``/``np.argmax``.
+    """
+
+    def __init__(self, values, mode='min'):
+        self.values = np.asarray(values, dtype=float)
+        self._better = np.less if mode == 'min' else np.greater
+        n = len(self.values)
+        levels = max(n.bit_length(), 1)
+        # table[k, i] = position of the best value in [i, i + 2**k)
+        table = np.zeros((levels, n), dtype=np.int32)
+        table[0] = np.arange(n)
+        for k in range(1, levels):
+            half = 1 << (k - 1)
+            width = n - (1 << k) + 1
+            left = table[k - 1, :width]
+            right = table[k - 1, half:half + width]
+            table[k, :width] = np.where(self._better(self.values[right], self.values[left]),
+                                        right, left)
+        self._table = table
+        self._log2 = np.zeros(n + 1, dtype=np.int64)
+        if n:
+            self._log2[1:] = np.floor(np.log2(np.arange(1, n + 1)))
+
+    def argquery(self, lo, hi):
+        """Position of the min/max value in ``[lo, hi)``"""
+        k = self._log2[np.subtract(hi, lo)]
+        first = self._table[k, lo]
+        second = self._table[k, np.subtract(hi, np.left_shift(1, k))]
+        return np.where(self._better(self.values[second], self.values[first]), second, first)
+
+    def query(self, lo, hi):
+        """Min/max value in ``[lo, hi)``"""
+        return self.values[self.argquery(lo, hi)]
+
+class RangeIndex:
+    """Range min/max/argmin/argmax over the columns of one OHLCV frame.
+
+    Tables are built on first use per (column, mode), so detectors that only
+    need lows never pay for a table over highs.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+        self._tables = {}
+
+    def table(self, column, mode):
+        key = (column, mode)
+        table = self._tables.get(key)
+        if table is None:
+            table = self._tables[key] = SparseTable(self.df[column].values, mode)
+        return table
+
+    def min(self, column, lo, hi):
+        return self.table(column, 'min').query(lo, hi)
+
+    def max(self, column, lo, hi):
+        return self.table(column, 'max').query(lo, hi)
+
+    def argmin(self, column, lo, hi):
+        return self.table(column, 'min').argquery(lo, hi)
+
+    def argmax(self, column, lo, hi):
+        return self.table(column, 'max').argquery(lo, hi)
+
+    def tail_min(self, column, bars):
+        """Min over the last ``bars`` rows, like ``df[column].iloc[-bars:].min()``"""
+        return self.min(column, max(self.n - bars, 0), self.n)
+
+    def tail_max(self, column, bars):
+        return self.max(column, max(self.n - bars, 0), self.n)
@@ -0,0 +1,109 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+BENCHMARK_SYMBOL = 'BTCUSDT'
+
+def _stack(frames, column, length):
+    """Right-aligned (frames x length) matrix of one column, NaN padded"""
+    matrix = np.full((len(frames), length), np.nan)
+    for row, df in enumerate(frames):
+        values = df[column].values[-length:]
+        if len(values):
+            matrix[row, -len(values):] = values
+    return matrix
+
+def trend_flags(frames, ma_short=20, ma_long=50):
+    """Trend votes of many frames in one vectorized pass.
+
+    Same three votes as the old per-frame ``get_market_trend``: short vs
+    long SMA, higher highs vs lower lows (5-bar rolling extremes) and close
+    vs long SMA; the majority decides. Returns (bullish, above_long) bool
+    arrays with one entry per frame.
+    """
+    frames = list(frames)
+    if not frames:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=bool)
+    length = max(max(len(df) for df in frames), 5)
+    close = _stack(frames, 'close', length)
+    high = _stack(frames, 'high', length)
+    low = _stack(frames, 'low', length)
+
+    # Method 1: Moving Average Analysis (NaN when history is too short)
+    sma_short = close[:, -ma_short:].mean(axis=1)
+    sma_long = close[:, -ma_long:].mean(axis=1)
+    ma_trend = sma_short > sma_long
+
+    # Method 2: Higher Highs and Lower Lows
+    highs = sliding_window_view(high, 5, axis=1).max(axis=2)
+    lows = sliding_window_view(low, 5, axis=1).min(axis=2)
+    higher_highs = (np.diff(highs, axis=1) > 0).sum(axis=1)
+    lower_lows = (np.diff(lows, axis=1) < 0).sum(axis=1)
+    price_trend = higher_highs > lower_lows
+
+    # Method 3: Price vs SMA
+    above_long = close[:, -1] > sma_long
+
+    votes = ma_trend.astype(int) + price_trend + above_long
+    return votes >= 2, above_long
+
+def _split(key):
+    """(symbol, timeframe) of a frame key; plain keys have no timeframe"""
+    return key if isinstance(key, tuple) else (key, None)
+
+class MarketRegime:
+    """Trend flags of every analyzed frame plus market-wide aggregates.
+
+    Built once per scan cycle from all frames, keyed by (symbol, timeframe).
+    Per timeframe it records the benchmark (BTC) trend and the breadth,
+    i.e. the share of symbols closing above their long SMA. Detections look
+    their frame up instead of recomputing its trend.
+    """
+
+    def __init__(self, keys, bullish, above_long, benchmark=BENCHMARK_SYMBOL, market=True):
+        self.keys = list(keys)
+        self._row = {key: row for row, key in enumerate(self.keys)}
+        self.bullish = bullish
+        self.above_long = above_long
+        self.breadth = {}
+        self.benchmark_trend = {}
+        if market and self.keys:
+            timeframes = np.array([_split(key)[1] for key in self.keys], dtype=object)
+            for timeframe in dict.fromkeys(timeframes):
+                rows = timeframes == timeframe
+                self.breadth[timeframe] = float(above_long[rows].mean())
+            for key, row in self._row.items():
+                symbol, timeframe = _split(key)
+                if symbol == benchmark:
+                    self.benchmark_trend[timeframe] = 1 if bullish[row] else -1
+
+    @classmethod
+    def from_frames(cls, frames, benchmark=BENCHMARK_SYMBOL, market=True):
+        """Compute the regime of ``frames`` ({key: df}).
+
+        With ``market=False`` only per-frame trends are kept, e.g. when
+        analyzing a single symbol where breadth is meaningless.
+        """
+        bullish, above_long = trend_flags(frames.values())
+        return cls(frames.keys(), bullish, above_long, benchmark, market)
+
+    def trend(self, key):
+        return 'bullish' if self.bullish[self._row[key]] else 'bearish'
+
+    def lookup(self, key):
+        """Regime features of one frame for confidence scoring"""
+        timeframe = _split(key)[1]
+        return {
+            'trend': 1 if self.bullish[self._row[key]] else -1,
+            'benchmark_trend': self.benchmark_trend.get(timeframe, 0),
+            'breadth': self.breadth.get(timeframe, np.nan),
+        }
+
+    def summary(self):
+        """Market aggregates per timeframe, for logging"""
+        return {
+            timeframe: {
+                'breadth': round(self.breadth[timeframe], 3),
+                'benchmark_trend': self.benchmark_trend.get(timeframe, 0),
+            }
+            for timeframe in self.breadth
+        }
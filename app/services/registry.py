@@ -0,0 +1,179 @@
+from flask import current_app
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _create_binance_service(registry):
+    from app.services.binance_service import BinanceService
+    return BinanceService()
+
+def _create_pattern_analyzer(registry):
+    from app.services.pattern_analyzer import PatternAnalyzer
+    from app.services.analysis_memo import MemoizedAnalyzer
+    from app.services.param_sweep import load_params
+    config = registry.config
+    params = load_params(config['PATTERN_PARAMS_PATH'])
+    if params:
+        logger.info(f"Loaded detector parameters from {config['PATTERN_PARAMS_PATH']}: {params}")
+    analyzer = PatternAnalyzer(
+        scales=config['PATTERN_SCALES'],
+        exhaustive=config['PATTERN_EXHAUSTIVE'],
+        lookback=config['PATTERN_LOOKBACK'],
+        screening=config['PATTERN_SCREENING'],
+        params=params
+    )
+    if config['ANALYSIS_MEMO_SIZE']:
+        # Unchanged frames are answered without re-running the detectors
+        analyzer = MemoizedAnalyzer(analyzer, max_entries=config['ANALYSIS_MEMO_SIZE'])
+    return analyzer
+
+def _create_telegram_service(registry):
+    from app.services.telegram_service import TelegramService
+    return TelegramService()
+
+def _create_kline_cache(registry):
+    from app.services.kline_cache import KlineCache
+    from app.services.kline_store import KlineStore
+    from app.services.timeframes import history_bars
+    config = registry.config
+    return KlineCache(
+        registry.get('binance'),
+        interval=config['SCAN_BASE_INTERVAL'],
+        max_bars=history_bars(config['SCAN_BASE_INTERVAL'], config['SCAN_TIMEFRAMES'],
+                              config['SCAN_BARS']),
+        max_bytes=config['KLINE_CACHE_MAX_MB'] * 1024 * 1024 if config['KLINE_CACHE_MAX_MB'] else None,
+        store=KlineStore(config['KLINE_STORE_PATH']) if config['KLINE_STORE_PATH'] else None
+    )
+
+def _create_retest_engine(registry):
+    from app.services.retest_engine import RetestEngine
+    return RetestEngine()
+
+def _create_outcome_tracker(registry):
+    from app.services.outcome_tracker import OutcomeTracker
+    return OutcomeTracker()
+
+def _create_notification_queue(registry):
+    from app.services.notification_queue import NotificationQueue
+    return NotificationQueue(registry.get('telegram'))
+
+def _create_alert_book(registry):
+    from app.services.alert_book import AlertBook
+    return AlertBook(registry.get('notification_queue'))
+
+def _create_subscriptions(registry):
+    from app.services.subscriptions import SubscriptionIndex
+    return SubscriptionIndex()
+
+def _create_analysis_cache(registry):
+    from app.services.analysis_cache import AnalysisCache
+    return AnalysisCache(
+        registry.get('binance'),
+        registry.get('pattern_analyzer'),
+        bars=registry.config['SCAN_BARS']
+    )
+
+def _create_chart_data(registry):
+    from app.services.chart_data import ChartData
+    return ChartData(
+        registry.get('kline_cache'),
+        registry.get('pattern_analyzer'),
+        bars=registry.config['SCAN_BARS']
+    )
+
+def _create_universe(registry):
+    from app.services.universe import Universe, parse_tiers
+    config = registry.config
+    return Universe(
+        registry.get('binance'),
+        quote_assets=config['UNIVERSE_QUOTE_ASSETS'],
+        tiers=parse_tiers(config['UNIVERSE_TIERS'])
+    )
+
+def _create_job_queue(registry):
+    from app.services.job_queue import JobQueue
+    config = registry.config
+    return JobQueue(lease=config['SCAN_JOB_LEASE'], max_attempts=config['SCAN_JOB_ATTEMPTS'])
+
+def _create_scheduler(registry):
+    from app.services.scheduler import AdaptiveScheduler
+    config = registry.config
+    return AdaptiveScheduler(
+        registry.get('pattern_analyzer'),
+        min_interval=config['SCAN_MIN_INTERVAL'],
+        max_interval=config['SCAN_MAX_INTERVAL'],
+        budget=config['SCAN_WEIGHT_BUDGET'],
+        candidates_ttl=config['SCAN_CANDIDATES_TTL']
+    )
+
+DEFAULT_FACTORIES = {
+    'binance': _create_binance_service,
+    'pattern_analyzer': _create_pattern_analyzer,
+    'telegram': _create_telegram_service,
+    'kline_cache': _create_kline_cache,
+    'retest_engine': _create_retest_engine,
+    'outcome_tracker': _create_outcome_tracker,
+    'notification_queue': _create_notification_queue,
+    'alert_book': _create_alert_book,
+    'subscriptions': _create_subscriptions,
+    'analysis_cache': _create_analysis_cache,
+    'chart_data': _create_chart_data,
+    'universe': _create_universe,
+    'job_queue': _create_job_queue,
+    'scheduler': _create_scheduler,
+}
+
+class ServiceRegistry:
+    """Build services on first use and keep one instance per app.
+
+    Factories import their modules lazily, so pandas, pandas_ta,
+    python-binance and python-telegram-bot are only loaded by the workers
+    that actually scan or notify.
+    """
+
+    def __init__(self, app=None, factories=None):
+        """Factories are called with the registry, so they can read
+        ``registry.config`` and depend on other services via ``get``."""
+        self.config = {}
+        self._factories = dict(DEFAULT_FACTORIES)
+        if factories:
+            self._factories.update(factories)
+        self._instances = {}
+        self._lock = threading.RLock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.config = app.config
+        app.extensions['services'] = self
+
+    def register(self, name, factory):
+        """Replace the factory for ``name`` and drop any built instance"""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def set(self, name, instance):
+        """Install a ready-made instance, e.g. an offline stand-in"""
+        with self._lock:
+            self._instances[name] = instance
+
+    def get(self, name):
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            # Another thread may have built it while we waited
+            if name not in self._instances:
+                logger.info(f"Creating service '{name}'")
+                self._instances[name] = self._factories[name](self)
+            return self._instances[name]
+
+    def is_loaded(self, name):
+        return name in self._instances
+
+def get_service(name, app=None):
+    """Return the named service of ``app`` (default: the current app)"""
+    app = app or current_app
+    return app.extensions['services'].get(name)
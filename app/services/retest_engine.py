@@ -0,0 +1,197 @@
+from app import db
+from app.models.pattern import Pattern
+from app.services.level_index import LevelBook
+from datetime import datetime
+import numpy as np
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Retest zones are the level +/- 1%, as in PatternAnalyzer.check_*_retest
+ZONE = 0.01
+
+# pattern_type -> (level field, candle column compared, side the retest fails on)
+RETEST_RULES = {
+    'head_and_shoulders': ('entry_price', 'close', 'above'),
+    'double_top': ('stop_loss', 'high', 'above'),
+    'triple_top': ('stop_loss', 'high', 'above'),
+    'double_bottom': ('stop_loss', 'low', 'below'),
+    'triple_bottom': ('stop_loss', 'low', 'below'),
+    'symmetric_triangle': ('entry_price', 'close', None),
+    'ascending_triangle': ('entry_price', 'close', 'below'),
+    'descending_triangle': ('entry_price', 'close', 'above'),
+    'rising_wedge': ('entry_price', 'close', 'above'),
+    'falling_wedge': ('entry_price', 'close', 'below'),
+    'bull_flag': ('entry_price', 'close', 'below'),
+    'bear_flag': ('entry_price', 'close', 'above'),
+}
+
+# Wedges and flags only fail once they have broken out and retested;
+# before that price sits on the failing side without meaning anything
+BREAKOUT_TYPES = ('rising_wedge', 'falling_wedge', 'bull_flag', 'bear_flag')
+
+LEVEL_NAMES = {
+    'head_and_shoulders': 'neckline',
+    'double_top': 'vùng kháng cự',
+    'triple_top': 'vùng kháng cự',
+    'double_bottom': 'vùng hỗ trợ',
+    'triple_bottom': 'vùng hỗ trợ',
+    'rising_wedge': 'đường xu hướng của nêm',
+    'falling_wedge': 'đường xu hướng của nêm',
+    'bull_flag': 'kênh cờ',
+    'bear_flag': 'kênh cờ',
+}
+
+def book_key(pattern_type, status):
+    """(candle column, failing side) of the LevelBook holding a pattern"""
+    field, column, side = RETEST_RULES[pattern_type]
+    if pattern_type in BREAKOUT_TYPES and status != 'confirmed':
+        side = None
+    return column, side
+
+OPEN_STATUSES = ('none', 'pending', 'confirmed')
+
+class RetestEngine:
+    """Follow the retest of every open pattern as prices arrive.
+
+    Levels are kept per (symbol, candle column, failing side) in sorted
+    LevelBooks. A zone ``[level * 0.99, level * 1.01]`` contains price ``p``
+    exactly when ``p / 1.01 <= level <= p / 0.99``, so the touched patterns
+    are one bisected range and the broken ones the levels below (or above)
+    it. Status changes are buffered and written back by ``flush``.
+    """
+
+    def __init__(self, zone=ZONE):
+        self.zone = zone
+        self.loaded = False
+        self._books = {}    # symbol -> {(column, side): LevelBook}
+        self._open = {}     # pattern id -> [symbol, pattern_type, level, status, timestamp, key, since]
+        self._changes = {}  # pattern id -> row for bulk_update_mappings
+        self.applied = {}   # symbol -> open time of the last closed candle applied
+        self._lock = threading.Lock()
+
+    def load(self, symbols=None):
+        """Track every open pattern stored in the database, of ``symbols`` only
+        if given"""
+        query = Pattern.query.filter(Pattern.retest_status.in_(OPEN_STATUSES))
+        if symbols is not None:
+            query = query.filter(Pattern.symbol.in_(symbols))
+        patterns = query.all()
+        self.track(patterns)
+        self.loaded = True
+        logger.info(f"Tracking retests of {len(self._open)} patterns")
+
+    def track(self, patterns):
+        """Start following stored ``Pattern`` rows"""
+        with self._lock:
+            for pattern in patterns:
+                rule = RETEST_RULES.get(pattern.pattern_type)
+                if rule is None or pattern.id in self._open:
+                    continue
+                level = getattr(pattern, rule[0])
+                if not level or pattern.retest_status not in OPEN_STATUSES:
+                    continue
+                key = book_key(pattern.pattern_type, pattern.retest_status)
+                self._book(pattern.symbol, key).add(pattern.id, level)
+                self._open[pattern.id] = [pattern.symbol, pattern.pattern_type, level,
+                                          pattern.retest_status, pattern.timestamp, key,
+                                          pattern.retest_timestamp or pattern.timestamp]
+
+    def _book(self, symbol, key):
+        return self._books.setdefault(symbol, {}).setdefault(key, LevelBook())
+
+    def __len__(self):
+        return len(self._open)
+
+    def on_price(self, symbol, price, timestamp=None):
+        """Apply a price snapshot"""
+        return self.on_candle(symbol, price, price, price, timestamp)
+
+    def on_candle(self, symbol, high, low, close, timestamp=None):
+        """Apply one candle of ``symbol``; returns the number of status changes.
+
+        Patterns detected or last changed after ``timestamp`` ignore it, so a
+        candle replayed late cannot undo a newer status.
+        """
+        timestamp = timestamp or datetime.utcnow()
+        prices = {'high': high, 'low': low, 'close': close}
+        changed = 0
+        with self._lock:
+            for (column, side), book in list(self._books.get(symbol, {}).items()):
+                price = prices[column]
+                lower, upper = price / (1 + self.zone), price / (1 - self.zone)
+                if side == 'above':
+                    broken = book.below(lower)
+                elif side == 'below':
+                    broken = book.above(upper)
+                else:
+                    broken = np.empty(0, dtype=np.int64)
+                broken = np.array([pid for pid in broken.tolist() if self._open[pid][6] <= timestamp],
+                                  dtype=np.int64)
+                for pattern_id in book.between(lower, upper).tolist():
+                    state = self._open[pattern_id]
+                    if state[3] != 'confirmed' and state[6] <= timestamp:
+                        self._set_status(pattern_id, 'confirmed', price, timestamp)
+                        changed += 1
+                for pattern_id in broken.tolist():
+                    self._set_status(pattern_id, 'failed', price, timestamp)
+                    changed += 1
+                if len(broken):
+                    book.remove(broken)
+        return changed
+
+    def _set_status(self, pattern_id, status, price, timestamp):
+        state = self._open[pattern_id]
+        state[3] = status
+        state[6] = timestamp
+        pattern_type = state[1]
+        key = book_key(pattern_type, status)
+        if status == 'confirmed' and key != state[5]:
+            # A retested breakout can fail from now on
+            self._books[state[0]][state[5]].remove(pattern_id)
+            self._book(state[0], key).add(pattern_id, state[2])
+            state[5] = key
+        name = LEVEL_NAMES.get(pattern_type, 'đường xu hướng')
+        if status == 'confirmed':
+            description = f'Giá đã retest thành công {name} tại {price:.2f}'
+        else:
+            description = f'Giá đã phá vỡ {name} tại {price:.2f}'
+        self._changes[pattern_id] = {
+            'id': pattern_id,
+            'retest_status': status,
+            'retest_price': price,
+            'retest_timestamp': timestamp,
+            'retest_description': description,
+        }
+        if status == 'failed':
+            del self._open[pattern_id]
+
+    def expire(self, cutoff):
+        """Stop tracking patterns detected before ``cutoff``"""
+        with self._lock:
+            expired = [pid for pid, state in self._open.items() if state[4] < cutoff]
+            for pattern_id in expired:
+                state = self._open.pop(pattern_id)
+                self._books[state[0]][state[5]].remove(pattern_id)
+        return len(expired)
+
+    def flush(self):
+        """Write buffered status changes in one bulk update"""
+        with self._lock:
+            changes, self._changes = list(self._changes.values()), {}
+        if not changes:
+            return 0
+        try:
+            db.session.bulk_update_mappings(Pattern, changes)
+            db.session.commit()
+            logger.info(f"Updated retest status of {len(changes)} patterns")
+        except Exception as e:
+            logger.error(f"Error writing retest updates: {e}")
+            db.session.rollback()
+            # Keep them for the next flush unless newer changes exist
+            with self._lock:
+                for row in changes:
+                    self._changes.setdefault(row['id'], row)
+            return 0
+        return len(changes)
@@ -0,0 +1,134 @@
+from app.services.outcome_tracker import OutcomeTracker
+from app.services.registry import get_service
+from app.services.retest_engine import RetestEngine
+from app.services.scanner import run_scan_cycle
+import os
+import socket
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+def worker_name():
+    """host:pid, unique across the processes sharing a queue"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class ScanWorker:
+    """Claim scan jobs from a JobQueue and run each as one scan cycle.
+
+    While a job runs a heartbeat thread keeps its lease alive; if the
+    lease is lost anyway (e.g. the database was unreachable) the job may
+    run twice, which the scanner tolerates by stamping patterns with the
+    job's publish time.
+
+    Any worker may scan any symbol, so retest and outcome state is rebuilt
+    from the database for the symbols of each job instead of being kept in
+    memory between jobs; only the open time of the last candle applied per
+    symbol carries over (the trackers ignore candles older than a
+    pattern's last change, so replaying from an older one is harmless).
+    """
+
+    def __init__(self, app, queue, name=None, poll_interval=5.0):
+        self.app = app
+        self.queue = queue
+        self.name = name or worker_name()
+        self.poll_interval = poll_interval
+        self.jobs = 0
+        self._applied = {'retest_engine': {}, 'outcome_tracker': {}}
+
+    def run(self, stop=None, max_jobs=None):
+        """Process jobs until ``stop`` (a threading.Event) is set"""
+        stop = stop or threading.Event()
+        with self.app.app_context():
+            logger.info(f"Scan worker {self.name} started")
+            while not stop.is_set() and (max_jobs is None or self.jobs < max_jobs):
+                try:
+                    job = self.queue.claim(self.name)
+                except Exception as e:
+                    logger.error(f"Error claiming scan job: {e}")
+                    job = None
+                if job is None:
+                    stop.wait(self.poll_interval)
+                    continue
+                self.run_job(job)
+                self.jobs += 1
+
+    def run_job(self, job):
+        """Scan the symbols of one claimed job and record the outcome"""
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(job.id, done), daemon=True)
+        beat.start()
+        try:
+            config = self.app.config
+            symbols = job.symbol_list()
+            trackers = {'retest_engine': RetestEngine(), 'outcome_tracker': OutcomeTracker()}
+            for name, tracker in trackers.items():
+                # Other workers may have advanced these patterns since
+                tracker.load(symbols)
+                tracker.applied = self._applied[name]
+            notifications = run_scan_cycle(
+                get_service('binance'),
+                get_service('pattern_analyzer'),
+                get_service('telegram'),
+                symbols=symbols,
+                kline_cache=get_service('kline_cache'),
+                timeframes=config['SCAN_TIMEFRAMES'],
+                subscriptions=get_service('subscriptions'),
+                notification_queue=get_service('notification_queue'),
+                fetch_workers=config['SCAN_FETCH_WORKERS'],
+                detected_at=job.created_at,
+                summary=False,
+                **trackers
+            )
+            self.queue.complete(job, patterns=len(notifications))
+        except Exception as e:
+            logger.error(f"Error in scan job {job.cycle}/{job.shard}: {e}")
+            self.queue.fail(job, e)
+        finally:
+            done.set()
+            beat.join()
+
+    def _heartbeat(self, job_id, done):
+        with self.app.app_context():
+            while not done.wait(self.queue.lease / 3):
+                try:
+                    if not self.queue.heartbeat(job_id, self.name):
+                        logger.warning(f"{self.name} lost the lease of scan job {job_id}")
+                        return
+                except Exception as e:
+                    logger.error(f"Error renewing lease of scan job {job_id}: {e}")
+
+def run_workers(create_app, count=1, poll_interval=5.0):
+    """Run ``count`` worker processes until interrupted.
+
+    ``create_app`` is called in every process, so each one has its own
+    database connections and services.
+    """
+    import multiprocessing
+    if count == 1:
+        _worker_main(create_app, poll_interval)
+        return
+    processes = [
+        multiprocessing.Process(target=_worker_main, args=(create_app, poll_interval), daemon=True)
+        for _ in range(count)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+def _worker_main(create_app, poll_interval):
+    app = create_app()
+    queue = get_service('job_queue', app)
+    try:
+        ScanWorker(app, queue, poll_interval=poll_interval).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if app.extensions['services'].is_loaded('notification_queue'):
+            # Deliver what this worker queued before exiting
+            get_service('notification_queue', app).join()
@@ -0,0 +1,322 @@
+from app import db
+from app.models.pattern import Pattern
+from app.services.regime import MarketRegime, BENCHMARK_SYMBOL
+from app.services.scheduler import PRICES_WEIGHT
+from app.services.timeframes import timeframe_frames, interval_ms, analysis_frame, history_bars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+import logging
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+def run_scan_cycle(binance_service, pattern_analyzer, telegram_service, symbols=None,
+                   kline_cache=None, timeframes=None, retest_engine=None,
+                   outcome_tracker=None, subscriptions=None, notification_queue=None,
+                   fetch_workers=1, detected_at=None, summary=True, scheduler=None):
+    """Run one scan over the top symbols, store new patterns and notify.
+
+    Must be called inside an application context. ``symbols`` overrides the
+    top-volume universe. With a ``kline_cache`` only its base interval is
+    fetched and every entry of ``timeframes`` is resampled from it locally.
+    All frames are fetched before analysis so that one market regime
+    (trend flags, BTC trend, breadth) is computed for the whole universe;
+    with a ``kline_cache`` it also covers every other cached symbol and
+    the benchmark, so a scan of a few symbols is rated like a full one.
+    A ``retest_engine`` and ``outcome_tracker`` are given the new patterns
+    and every candle of each symbol since the previous scan, and write
+    their changes back.
+    With ``subscriptions`` every subscribed chat is sent the new patterns
+    passing its filters, through ``notification_queue`` when given.
+    ``detected_at`` stamps the stored patterns instead of the current time:
+    a scan job that is run twice (e.g. after its worker lost the lease)
+    then produces the same rows, which the unique constraint on
+    (symbol, pattern_type, timeframe, timestamp, anchor) drops.
+    Patterns are deduplicated per formation: its ``anchor`` (the open times
+    of its pivots) keeps the several formations of one type found by the
+    exhaustive mode apart. ``summary`` sends the top patterns of the last
+    24 hours to Telegram. A ``scheduler``
+    rates every fetched symbol to plan its next scan and is charged the
+    klines weight spent beyond its per-symbol estimate.
+    Returns the list of (symbol, pattern) tuples that were newly stored in
+    this cycle.
+    """
+    # Cleanup old patterns
+    Pattern.cleanup_old_patterns(hours=24)
+    logger.info("Cleaned up old patterns")
+    trackers = [t for t in (retest_engine, outcome_tracker) if t is not None]
+    for tracker in trackers:
+        if not tracker.loaded:
+            tracker.load()
+        tracker.expire(datetime.utcnow() - timedelta(hours=24))
+
+    # Get top symbols
+    if symbols is None:
+        symbols = binance_service.get_top_symbols()
+    logger.info(f"Analyzing {len(symbols)} symbols")
+
+    # Fetch every symbol first so the market regime sees the whole universe
+    spent = kline_cache.request_weight if kline_cache is not None else 0
+    frames = fetch_frames(binance_service, symbols, kline_cache, timeframes, fetch_workers)
+    market = {}
+    if kline_cache is not None:
+        # A scan of only some symbols (adaptive ticks, queue shards) still
+        # rates the market on every cached one and the benchmark
+        market = market_frames(kline_cache, timeframes, {symbol for symbol, _ in frames})
+        logger.info(f"Kline cache: {kline_cache.summary()}")
+    if scheduler is not None:
+        if kline_cache is not None:
+            # First fills page in far more than one request per symbol
+            scheduler.charge(kline_cache.request_weight - spent - len(symbols) * scheduler.weight)
+        scheduler.observe(frames)
+        logger.info(f"Scan schedule: {scheduler.summary()}")
+
+    # Trend flags and market breadth, once per cycle
+    regime = MarketRegime.from_frames({**market, **frames})
+    logger.info(f"Market regime: {regime.summary()}")
+
+    # Analyze patterns of every frame, scored in one batch; a frame that
+    # fails is logged and dropped without losing the others
+    results = pattern_analyzer.analyze_many(frames, regime=regime)
+
+    patterns_by_symbol = {}
+    for (symbol, timeframe), patterns in results.items():
+        for pattern in patterns:
+            pattern['timeframe'] = timeframe
+            pattern['anchor'] = formation_anchor(frames[(symbol, timeframe)], pattern)
+        patterns_by_symbol.setdefault(symbol, []).extend(patterns)
+
+    # Initialize notifications list
+    notifications = []
+    new_patterns = []
+
+    # One ticker request prices every symbol with new detections
+    detected = [symbol for symbol, patterns in patterns_by_symbol.items() if patterns]
+    prices = binance_service.get_prices(detected) if detected else {}
+    if detected and scheduler is not None:
+        scheduler.charge(PRICES_WEIGHT)
+
+    for symbol, patterns in patterns_by_symbol.items():
+        try:
+            if not patterns:
+                continue
+            current_price = prices.get(symbol) or binance_service.get_current_price(symbol)
+
+            if current_price:
+                for pattern in patterns:
+                    # Check for existing pattern
+                    cutoff = datetime.utcnow() - timedelta(hours=1)
+                    existing = Pattern.query.filter(
+                        Pattern.symbol == symbol,
+                        Pattern.pattern_type == pattern['pattern_type'],
+                        Pattern.timeframe == pattern['timeframe'],
+                        Pattern.anchor == pattern['anchor'],
+                        Pattern.timestamp > cutoff
+                    ).first()
+
+                    if existing is None:
+                        # Save to database
+                        db_pattern = Pattern(
+                            symbol=symbol,
+                            pattern_type=pattern['pattern_type'],
+                            timeframe=pattern['timeframe'],
+                            anchor=pattern['anchor'],
+                            timestamp=detected_at or datetime.utcnow(),
+                            price=current_price,
+                            confidence=pattern['confidence'],
+                            description=pattern['description'],
+                            entry_price=pattern.get('entry_price'),
+                            take_profit=pattern.get('take_profit'),
+                            stop_loss=pattern.get('stop_loss'),
+                            risk_reward_ratio=pattern.get('risk_reward_ratio'),
+                            retest_status=pattern.get('retest_status', 'none'),
+                            retest_price=pattern.get('retest_price'),
+                            retest_timestamp=datetime.utcnow() if pattern.get('retest_price') else None,
+                            retest_description=pattern.get('retest_description')
+                        )
+                        if detected_at is None:
+                            db.session.add(db_pattern)
+                        elif not insert_once(db_pattern):
+                            # Already stored by another run of the same job
+                            continue
+                        new_patterns.append(db_pattern)
+                        logger.info(f"New pattern detected: {symbol} - {pattern['pattern_type']} ({pattern['timeframe']})")
+
+                        # Add to notifications list for new patterns
+                        notifications.append((symbol, pattern))
+
+        except Exception as e:
+            logger.error(f"Error processing symbol {symbol}: {e}")
+            continue
+
+    try:
+        # Commit all changes
+        db.session.commit()
+        logger.info(f"Found {len(notifications)} new patterns")
+
+        if trackers:
+            update_trackers(trackers, frames, new_patterns)
+
+        if subscriptions is not None and notifications:
+            notify_subscribers(subscriptions, telegram_service, notifications, notification_queue)
+
+        # Get top 5 patterns from last 24 hours by confidence
+        cutoff = datetime.utcnow() - timedelta(hours=24)
+        top_patterns = Pattern.query.filter(
+            Pattern.timestamp >= cutoff
+        ).order_by(
+            Pattern.confidence.desc()
+        ).limit(5).all() if summary else []
+
+        # Format patterns for notification
+        if top_patterns:
+            top_notifications = [(p.symbol, {
+                'pattern_type': p.pattern_type,
+                'timeframe': p.timeframe,
+                'confidence': p.confidence,
+                'description': p.description
+            }) for p in top_patterns]
+
+            logger.info(f"Sending top 5 patterns by confidence")
+            telegram_service.send_batch_notification(top_notifications)
+    except Exception as e:
+        logger.error(f"Error committing changes: {e}")
+        db.session.rollback()
+
+    return notifications
+
+def insert_once(row):
+    """Add ``row`` in a savepoint; False if it violates a unique constraint"""
+    try:
+        with db.session.begin_nested():
+            db.session.add(row)
+        return True
+    except IntegrityError:
+        return False
+
+def formation_anchor(df, pattern):
+    """Open times (ms) of the pivots of ``pattern`` in ``df``, comma
+    separated; empty when the detector reports no pivots"""
+    indices = pattern.get('indices') or []
+    opened = pd.DatetimeIndex(df['timestamp'].iloc[indices]).asi8 // 1_000_000
+    return ','.join(str(t) for t in opened)
+
+def fetch_frames(binance_service, symbols, kline_cache=None, timeframes=None, workers=1):
+    """Indicator frames of every symbol, keyed (symbol, timeframe)"""
+    def fetch(symbol):
+        try:
+            if kline_cache is not None:
+                # One base-interval fetch serves every timeframe
+                base_df = kline_cache.get(symbol)
+                if base_df is None:
+                    return {}
+                return timeframe_frames(
+                    base_df, kline_cache.interval, timeframes or [kline_cache.interval]
+                )
+            # Get historical data
+            df = binance_service.get_klines(symbol)
+            if df is None:
+                return {}
+
+            # Indicators are derived from OHLCV by the scorer when needed
+            return {'1h': analysis_frame(df)}
+
+        except Exception as e:
+            logger.error(f"Error processing symbol {symbol}: {e}")
+            return {}
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(fetch, symbols))
+    else:
+        results = [fetch(symbol) for symbol in symbols]
+
+    frames = {}
+    for symbol, symbol_frames in zip(symbols, results):
+        for timeframe, df in symbol_frames.items():
+            frames[(symbol, timeframe)] = df
+    return frames
+
+def market_frames(kline_cache, timeframes=None, skip=()):
+    """Frames of the cached symbols not in ``skip``, for the market regime.
+
+    Built from the cached histories without contacting the exchange,
+    except for the benchmark symbol, which is fetched if it is not cached.
+    """
+    timeframes = timeframes or [kline_cache.interval]
+    bars = history_bars(kline_cache.interval, timeframes)
+    symbols = set(kline_cache.symbols()) | {BENCHMARK_SYMBOL}
+    frames = {}
+    for symbol in sorted(symbols - set(skip)):
+        try:
+            df = kline_cache.peek(symbol)
+            if df is None and symbol == BENCHMARK_SYMBOL:
+                df = kline_cache.get(symbol)
+            if df is None:
+                continue
+            for timeframe, tf_df in timeframe_frames(df.iloc[-bars:], kline_cache.interval, timeframes).items():
+                frames[(symbol, timeframe)] = tf_df
+        except Exception as e:
+            logger.error(f"Error reading cached klines of {symbol}: {e}")
+    return frames
+
+def update_trackers(trackers, frames, new_patterns, now=None):
+    """Apply the candles of every symbol since the last scan and track new
+    patterns.
+
+    Each tracker keeps the open time of the last closed candle it was
+    given per symbol (``applied``); every candle closed after it is
+    replayed in order, stamped with its close time. New patterns are
+    tracked after that replay, since those candles closed before they
+    were detected, and the forming candle is then applied to all as of
+    ``now``. A symbol seen for the first time only gets the forming candle.
+    """
+    now = now or datetime.utcnow()
+
+    # Candles per symbol, from its finest timeframe
+    latest = {}
+    for (symbol, timeframe), df in frames.items():
+        if symbol not in latest or interval_ms(timeframe) < interval_ms(latest[symbol][0]):
+            latest[symbol] = (timeframe, df)
+
+    candles = {}
+    for symbol, (timeframe, df) in latest.items():
+        opened = pd.DatetimeIndex(df['timestamp'])
+        closes = opened + pd.Timedelta(milliseconds=interval_ms(timeframe))
+        closed = int(closes.searchsorted(pd.Timestamp(now), side='right'))
+        highs, lows, prices = (df[col].to_numpy(dtype=float) for col in ('high', 'low', 'close'))
+        candles[symbol] = (highs, lows, prices, closed)
+        for tracker in trackers:
+            last = tracker.applied.get(symbol)
+            if last is not None:
+                for i in range(int(opened.searchsorted(last, side='right')), closed):
+                    tracker.on_candle(symbol, highs[i], lows[i], prices[i], closes[i].to_pydatetime())
+            if closed:
+                tracker.applied[symbol] = opened[closed - 1]
+
+    for tracker in trackers:
+        tracker.track(new_patterns)
+    for symbol, (highs, lows, prices, closed) in candles.items():
+        if closed < len(highs):
+            for tracker in trackers:
+                tracker.on_candle(symbol, highs[closed], lows[closed], prices[closed], now)
+    for tracker in trackers:
+        tracker.flush()
+
+def notify_subscribers(subscriptions, telegram_service, notifications, notification_queue=None):
+    """Send each subscribed chat one message with its matching new patterns"""
+    # Subscriptions may have changed in another process (web app, workers)
+    subscriptions.refresh()
+    routed = subscriptions.route(notifications)
+    messages = [
+        (chat_id, telegram_service.format_batch(events, title="🔔 PATTERN MỚI:", limit=len(events)))
+        for chat_id, events in routed.items()
+    ]
+    if notification_queue is not None:
+        for chat_id, message in messages:
+            notification_queue.put(message, chat_id)
+    elif messages:
+        telegram_service.send_many(messages)
+    logger.info(f"Routed {len(notifications)} new patterns to {len(messages)} subscribers")
+    return len(messages)
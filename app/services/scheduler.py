@@ -0,0 +1,195 @@
+from app.models.pattern import Pattern
+from app.services.timeframes import interval_ms
+import math
+import threading
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Request weight of scanning one symbol (one klines request of 100-499
+# candles costs 2 on Binance); scans that page in more are charged the
+# difference afterwards
+SCAN_WEIGHT = 2
+# 24h ticker of every symbol, the candidate list outside universe mode
+TICKER_WEIGHT = 80
+# Latest price of every symbol, taken once per cycle with detections
+PRICES_WEIGHT = 4
+
+# A symbol is fully "hot" when any of these is reached:
+HOT_ATR = 0.03      # ATR of 3% of the price per candle
+HOT_SURGE = 3.0     # last volume 3x the average of the previous candles
+NEAR_ATRS = 3.0     # heat rises as the price comes within 3 ATRs of an entry
+SURGE_WINDOW = 20
+
+def open_entries():
+    """{symbol: [entry_price, ...]} of every pattern still waiting for its entry"""
+    rows = Pattern.query.with_entities(Pattern.symbol, Pattern.entry_price).filter(
+        Pattern.outcome_status == 'open',
+        Pattern.entry_price.isnot(None)
+    ).all()
+    entries = {}
+    for symbol, entry in rows:
+        entries.setdefault(symbol, []).append(entry)
+    return entries
+
+class AdaptiveScheduler:
+    """Per-symbol scan times from volatility, volume and nearby triggers.
+
+    After each scan a symbol gets a heat in [0, 1]: the largest of its
+    relative ATR, its volume surge and the proximity of its price to the
+    entry of an open pattern (in ATRs). Its next scan is due after an
+    interval interpolated geometrically from ``max_interval`` (heat 0) to
+    ``min_interval`` (heat 1). If the intervals of all symbols together
+    would exceed ``budget`` request weight per minute they are stretched
+    evenly, and ``due`` never hands out more scans than a token bucket
+    refilled at ``budget`` per minute allows, hottest symbols first. Other
+    requests of a cycle are taken from the same bucket with ``charge``;
+    the candidate list is refreshed every ``candidates_ttl`` seconds.
+    """
+
+    def __init__(self, pattern_analyzer, min_interval=300, max_interval=14400,
+                 budget=1200, weight=SCAN_WEIGHT, candidates_ttl=300, clock=time.time):
+        self.analyzer = pattern_analyzer
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = budget
+        self.weight = weight
+        self.candidates_ttl = candidates_ttl
+        self.clock = clock
+        self.entries = {}
+        self._candidates = None  # (expires_at, symbols)
+        self._heat = {}       # symbol -> heat of its last scan
+        self._scanned = {}    # symbol -> time of its last scan
+        self._tokens = float(budget)
+        self._refilled = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if self.budget:
+            rate = self.budget / 60.0
+            self._tokens = min(float(self.budget), self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+
+    def charge(self, weight, now=None):
+        """Take ``weight`` spent outside of the estimated symbol scans from
+        the budget (a negative one gives back an overestimate); the bucket
+        may go into debt, which holds back the next scans"""
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._refill(now)
+            if self.budget:
+                self._tokens = min(float(self.budget), self._tokens - weight)
+
+    def candidates(self, fetch, weight=TICKER_WEIGHT, now=None):
+        """Symbols from ``fetch`` kept for ``candidates_ttl`` seconds, each
+        refresh charged ``weight``; a failed (empty) refresh keeps serving
+        the previous list"""
+        now = self.clock() if now is None else now
+        cached = self._candidates
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        symbols = fetch()
+        self.charge(weight, now)
+        if not symbols and cached is not None:
+            logger.warning("Refreshing scan candidates failed, keeping cached copy")
+            symbols = cached[1]
+        self._candidates = (now + self.candidates_ttl, symbols)
+        return symbols
+
+    def set_entries(self, entries):
+        """Entry prices of open patterns, {symbol: [price, ...]}"""
+        self.entries = entries
+
+    def heat(self, symbol, df):
+        """Heat of ``symbol`` from its latest frame"""
+        close = float(df['close'].iloc[-1])
+        atr = self.analyzer.calculate_atr(df)
+        if not close or not atr or math.isnan(atr):
+            return 0.0
+        volatility = atr / close / HOT_ATR
+
+        volume = df['volume'].to_numpy(dtype=float)
+        surge = 0.0
+        if len(volume) > SURGE_WINDOW:
+            average = volume[-SURGE_WINDOW - 1:-1].mean()
+            if average > 0:
+                surge = (volume[-1] / average - 1) / (HOT_SURGE - 1)
+
+        proximity = 0.0
+        entries = self.entries.get(symbol)
+        if entries:
+            distance = np.min(np.abs(np.asarray(entries, dtype=float) - close)) / atr
+            proximity = 1 - distance / NEAR_ATRS
+
+        return float(np.clip(max(volatility, surge, proximity), 0.0, 1.0))
+
+    def observe(self, frames, now=None):
+        """Record the scan of ``frames`` ({(symbol, timeframe): df}); each
+        symbol is rated on its finest timeframe"""
+        now = self.clock() if now is None else now
+        finest = {}
+        for (symbol, timeframe), df in frames.items():
+            if symbol not in finest or interval_ms(timeframe) < interval_ms(finest[symbol][0]):
+                finest[symbol] = (timeframe, df)
+        with self._lock:
+            for symbol, (_, df) in finest.items():
+                try:
+                    self._heat[symbol] = self.heat(symbol, df)
+                except Exception as e:
+                    logger.error(f"Error rating {symbol}: {e}")
+                    self._heat[symbol] = 0.0
+                self._scanned[symbol] = now
+
+    def interval(self, heat):
+        """Seconds between scans at ``heat`` before budget stretching"""
+        return self.max_interval * (self.min_interval / self.max_interval) ** heat
+
+    def stretch(self, symbols):
+        """Factor (>= 1) applied to every interval to stay within budget"""
+        # Symbols not rated yet count as cold until their first scan
+        demand = sum(
+            60.0 / self.interval(self._heat.get(symbol, 0.0)) for symbol in symbols
+        ) * self.weight
+        return max(1.0, demand / self.budget) if self.budget else 1.0
+
+    def due(self, symbols, now=None):
+        """Symbols of ``symbols`` to scan now, hottest first.
+
+        Symbols never scanned are due at once. The result is capped by the
+        request weight left in the budget.
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._refill(now)
+            stretch = self.stretch(symbols)
+
+            due = []
+            for symbol in symbols:
+                heat = self._heat.get(symbol, 1.0)
+                scanned = self._scanned.get(symbol)
+                if scanned is None or now - scanned >= self.interval(heat) * stretch:
+                    due.append((heat, symbol))
+            due.sort(key=lambda item: -item[0])
+
+            if self.budget:
+                allowed = max(int(self._tokens // self.weight), 0)
+                if len(due) > allowed:
+                    logger.info(f"Scan budget allows {allowed} of {len(due)} due symbols")
+                    due = due[:allowed]
+                self._tokens -= len(due) * self.weight
+            for _, symbol in due:
+                # Until ``observe`` rates the scan, it counts from now
+                self._scanned[symbol] = now
+            return [symbol for _, symbol in due]
+
+    def summary(self):
+        heats = np.array(list(self._heat.values()), dtype=float)
+        return {
+            'symbols': len(heats),
+            'hot': int((heats >= 0.5).sum()),
+            'mean_heat': round(float(heats.mean()), 3) if len(heats) else None,
+            'stretch': round(self.stretch(list(self._heat)), 2),
+            'tokens': round(self._tokens, 1),
+        }
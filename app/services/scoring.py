@@ -0,0 +1,125 @@
+from collections import namedtuple
+import numpy as np
+
+# pattern_type -> (direction, reversal)
+# direction: trend the pattern trades with (1 bullish, -1 bearish, 0 neither)
+# reversal: 1 for bottoms, -1 for tops, 0 for other shapes
+PATTERN_TYPES = {
+    'head_and_shoulders': (0, 0),
+    'double_top': (-1, -1),
+    'double_bottom': (1, 1),
+    'triple_top': (-1, -1),
+    'triple_bottom': (1, 1),
+    'symmetric_triangle': (0, 0),
+    'ascending_triangle': (1, 0),
+    'descending_triangle': (-1, 0),
+    'rising_wedge': (-1, 0),
+    'falling_wedge': (1, 0),
+    'bull_flag': (0, 0),
+    'bear_flag': (0, 0),
+}
+TYPE_CODES = {name: code for code, name in enumerate(PATTERN_TYPES)}
+
+# Per-frame inputs of the rules, see frame_features
+FEATURES = ('trend', 'benchmark_trend', 'breadth',
+            'recent_volume', 'volume_ma', 'rsi', 'bb_position', 'macd_cross')
+
+Rule = namedtuple('Rule', ['name', 'delta', 'when'])
+Rule.__doc__ = """Add ``delta`` (clamped to [0, 1]) where ``when(columns)`` is true.
+
+``columns`` maps every name in FEATURES plus ``code``, ``direction`` and
+``reversal`` to an array with one entry per pattern.
+"""
+
+# Applied in order, each clamped, like the old per-pattern adjustments
+RULES = (
+    Rule('trend_alignment', 0.1,
+         lambda c: (c['direction'] != 0) & (c['direction'] == c['trend'])),
+    Rule('volume_surge', 0.05,
+         lambda c: c['recent_volume'] > c['volume_ma'] * 1.2),
+    Rule('volume_fade', -0.05,
+         lambda c: c['recent_volume'] < c['volume_ma'] * 0.8),
+    Rule('oversold_bottom', 0.1,
+         lambda c: (c['reversal'] == 1) & (c['rsi'] < 30) & (c['bb_position'] < 0.2)),
+    Rule('overbought_top', 0.1,
+         lambda c: (c['reversal'] == -1) & (c['rsi'] > 70) & (c['bb_position'] > 0.8)),
+    Rule('macd_cross', 0.05,
+         lambda c: c['macd_cross']),
+    # Market regime: BTC trends the same way and breadth agrees
+    Rule('market_alignment', 0.05,
+         lambda c: (c['direction'] != 0) & (c['direction'] == c['benchmark_trend']) &
+                   (((c['direction'] == 1) & (c['breadth'] >= 0.6)) |
+                    ((c['direction'] == -1) & (c['breadth'] <= 0.4)))),
+)
+
+def frame_features(df, regime):
+    """Latest regime, volume and indicator readings of one frame.
+
+    ``regime`` is the frame's ``MarketRegime.lookup``. The frame is not
+    modified.
+    """
+    close = df['close']
+    volume = df['volume']
+
+    # RSI
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rsi = 100 - (100 / (1 + gain / loss))
+
+    # MACD
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+
+    # Bollinger Bands
+    middle = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    upper = middle + (2 * std)
+    lower = middle - (2 * std)
+
+    return {
+        'trend': regime['trend'],
+        'benchmark_trend': regime['benchmark_trend'],
+        'breadth': regime['breadth'],
+        'recent_volume': volume.iloc[-5:].mean(),
+        'volume_ma': volume.rolling(window=20).mean().iloc[-1],
+        'rsi': rsi.iloc[-1],
+        'bb_position': (close.iloc[-1] - lower.iloc[-1]) / (upper.iloc[-1] - lower.iloc[-1]),
+        'macd_cross': bool((macd.iloc[-2] < signal.iloc[-2] and macd.iloc[-1] > signal.iloc[-1]) or
+                           (macd.iloc[-2] > signal.iloc[-2] and macd.iloc[-1] < signal.iloc[-1])),
+    }
+
+class ConfidenceScorer:
+    """Adjust the confidence of many detections in one vectorized pass.
+
+    Detections of any number of frames (symbols, timeframes) are laid out
+    as arrays of type code, direction and frame features, and every rule is
+    a single numpy expression over those arrays, so adding a rule does not
+    add per-pattern Python work.
+    """
+
+    def __init__(self, rules=RULES):
+        self.rules = tuple(rules)
+
+    def score(self, groups):
+        """Rescore ``groups`` ([(patterns, features)], one per frame) in place"""
+        groups = [(patterns, features) for patterns, features in groups if patterns]
+        if not groups:
+            return
+        patterns = [pattern for group, _ in groups for pattern in group]
+        frame = np.repeat(np.arange(len(groups)), [len(group) for group, _ in groups])
+        columns = {
+            name: np.array([features[name] for _, features in groups])[frame]
+            for name in FEATURES
+        }
+        kinds = np.array([PATTERN_TYPES.get(p['pattern_type'], (0, 0)) for p in patterns])
+        columns['code'] = np.array([TYPE_CODES.get(p['pattern_type'], -1) for p in patterns])
+        columns['direction'] = kinds[:, 0]
+        columns['reversal'] = kinds[:, 1]
+
+        confidence = np.array([p['confidence'] for p in patterns], dtype=float)
+        for rule in self.rules:
+            mask = rule.when(columns)
+            confidence = np.where(mask, np.clip(confidence + rule.delta, 0.0, 1.0), confidence)
+        for pattern, value in zip(patterns, confidence.tolist()):
+            pattern['confidence'] = value
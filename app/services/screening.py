@@ -0,0 +1,84 @@
+import threading
+import numpy as np
+
+def _triangle(f, params):
+    h, l = f['high_slope'], f['low_slope']
+    flat = params['flat_slope']  # same threshold as detect_triangle
+    if abs(h - l) <= flat:
+        return False
+    return ((h < -flat and l > flat) or
+            (h < -flat and abs(l) < flat) or
+            (abs(h) < flat and l > flat))
+
+def _wedge(f, params):
+    h, l = f['high_slope'], f['low_slope']
+    return ((h > 0 and l > 0) or (h < 0 and l < 0)) and h <= l
+
+def _flag(f, params):
+    change, slope = f['trend_change'], f['close_slope']
+    return abs(change) > params['flag_trend'] and ((change > 0 and slope < 0) or (change < 0 and slope > 0))
+
+# Necessary conditions of every detector (and its enumerator) on the
+# screening features and detector params; a detector whose screen fails cannot match, so
+# skipping it never changes the results.
+SCREENS = {
+    'head_and_shoulders': lambda f, params: f['peaks'] >= 5,
+    'double_top': lambda f, params: f['peaks'] >= 2,
+    'double_bottom': lambda f, params: f['troughs'] >= 2,
+    'triple_top': lambda f, params: f['peaks'] >= 3,
+    'triple_bottom': lambda f, params: f['troughs'] >= 3,
+    'triangle': _triangle,
+    'wedge': _wedge,
+    'flag': _flag,
+}
+
+def screen_features(closes, highs, lows, peaks, troughs, slopes, window, lookback):
+    """O(n) features deciding which detectors can match a frame at ``window``.
+
+    ``slopes`` are the (high, low, close) trendline slopes the detectors
+    fit over ``lookback`` (high/low) and ``window`` (close) bars.
+    """
+    # Same arithmetic as detect_flag, so the screen agrees with it exactly
+    trend_start = closes[-window * 2:-window].mean() if len(closes[-window * 2:-window]) else np.nan
+    trend_end = closes[-window:].mean() if len(closes) else np.nan
+    tail_high, tail_low = highs[-lookback:], lows[-lookback:]
+    initial_range = tail_high[0] - tail_low[0] if len(tail_high) else 0.0
+    final_range = tail_high[-1] - tail_low[-1] if len(tail_high) else 0.0
+    return {
+        'peaks': len(peaks),
+        'troughs': len(troughs),
+        'high_slope': slopes[0],
+        'low_slope': slopes[1],
+        'close_slope': slopes[2],
+        'trend_change': (trend_end - trend_start) / trend_start,
+        'compression': 1 - final_range / initial_range if initial_range else 0.0,
+    }
+
+class ScreenStats:
+    """How often each detector was screened out, across analysis runs"""
+
+    def __init__(self):
+        self.checked = dict.fromkeys(SCREENS, 0)
+        self.skipped = dict.fromkeys(SCREENS, 0)
+        self._lock = threading.Lock()
+
+    def eligible(self, features, params):
+        """Detector names worth running on a frame with ``features`` under
+        the analyzer's detector ``params``"""
+        passed = {name for name, screen in SCREENS.items() if screen(features, params)}
+        with self._lock:
+            for name in SCREENS:
+                self.checked[name] += 1
+                if name not in passed:
+                    self.skipped[name] += 1
+        return passed
+
+    def stats(self):
+        return {
+            name: {
+                'checked': self.checked[name],
+                'skipped': self.skipped[name],
+                'skip_rate': round(self.skipped[name] / self.checked[name], 3) if self.checked[name] else None,
+            }
+            for name in SCREENS
+        }
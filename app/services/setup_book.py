@@ -0,0 +1,188 @@
+from app.services.level_index import LevelBook
+from datetime import datetime
+import numpy as np
+
+# Setup states, stored as small ints in the state array
+OPEN, FILLED, WON, LOST, CLOSED = range(5)
+
+class SetupBook:
+    """Entry / take profit / stop loss setups resolved against prices.
+
+    Setups live in flat numpy arrays (one slot each, keyed by an external
+    id such as a Pattern or Alert id). Per symbol two LevelBooks hold the
+    next level of every open setup: ``up`` for levels reached when price
+    rises to them, ``down`` for levels reached when it falls. A waiting
+    setup has its entry in one book; a filled long has its TP in ``up`` and
+    SL in ``down`` (reversed for shorts). A candle crosses exactly the
+    prefix of ``up`` at or below its high and the suffix of ``down`` at or
+    above its low, and the resulting fills and exits are applied with
+    masks, so the cost per tick follows the number of levels crossed, not
+    the number of setups.
+    """
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.slots = {}  # external id -> slot
+        self._books = {}  # symbol -> (up, down)
+        self._unplaced = {}  # symbol -> slots waiting for a first price
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        arrays = {
+            'key': np.zeros(capacity, dtype=np.int64),
+            'entry': np.zeros(capacity),
+            'take_profit': np.zeros(capacity),
+            'stop_loss': np.zeros(capacity),
+            'direction': np.zeros(capacity, dtype=np.int8),  # 1 long, -1 short
+            'state': np.full(capacity, CLOSED, dtype=np.int8),
+            'exit_price': np.full(capacity, np.nan),
+            'created_at': np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]'),
+            'filled_at': np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]'),
+            'closed_at': np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]'),
+        }
+        for name, array in arrays.items():
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:self.size] = old[:self.size]
+            setattr(self, name, array)
+
+    def add(self, key, symbol, entry, take_profit, stop_loss, reference_price=None,
+            state=OPEN, created_at=None, filled_at=None):
+        """Add a setup and return its slot.
+
+        An open setup fills when price crosses ``entry`` coming from
+        ``reference_price`` (e.g. the price at detection). Without it the
+        setup is placed on the first price seen for ``symbol``.
+        """
+        if self.size == len(self.state):
+            self._allocate(2 * len(self.state))
+        slot = self.size
+        self.size += 1
+        self.slots[key] = slot
+        self.key[slot] = key
+        self.entry[slot] = entry
+        self.take_profit[slot] = take_profit
+        self.stop_loss[slot] = stop_loss
+        self.direction[slot] = 1 if take_profit > entry else -1
+        self.state[slot] = state
+        self.created_at[slot] = created_at or datetime.utcnow()
+        if filled_at:
+            self.filled_at[slot] = filled_at
+
+        up, down = self._symbol_books(symbol)
+        if state == FILLED:
+            self._add_exits(up, down, np.array([slot]))
+        elif reference_price is None:
+            self._unplaced.setdefault(symbol, []).append(slot)
+        elif reference_price < entry:
+            up.add(slot, entry)
+        else:
+            down.add(slot, entry)
+        return slot
+
+    def __len__(self):
+        return int(np.isin(self.state[:self.size], (OPEN, FILLED)).sum())
+
+    def symbols(self):
+        return list(self._books)
+
+    def _symbol_books(self, symbol):
+        books = self._books.get(symbol)
+        if books is None:
+            books = self._books[symbol] = (LevelBook(), LevelBook())
+        return books
+
+    def _add_exits(self, up, down, slots):
+        longs = slots[self.direction[slots] == 1]
+        shorts = slots[self.direction[slots] == -1]
+        up.add(longs, self.take_profit[longs])
+        down.add(longs, self.stop_loss[longs])
+        down.add(shorts, self.take_profit[shorts])
+        up.add(shorts, self.stop_loss[shorts])
+
+    def _place(self, symbol, up, down, price):
+        slots = np.array(self._unplaced.pop(symbol), dtype=np.int64)
+        slots = slots[self.state[slots] == OPEN]
+        below = slots[price < self.entry[slots]]
+        above = slots[price >= self.entry[slots]]
+        up.add(below, self.entry[below])
+        down.add(above, self.entry[above])
+
+    def on_candle(self, symbol, high, low, timestamp=None):
+        """Apply one candle; returns the (filled, won, lost) slot arrays.
+
+        A setup filled by this candle can also exit in it. When a candle
+        spans both TP and SL the order is unknown and the setup counts as
+        lost. Setups created (or filled) after ``timestamp`` are not
+        filled (or exited) by it, so a candle replayed late is harmless.
+        """
+        empty = np.empty(0, dtype=np.int64)
+        books = self._books.get(symbol)
+        if books is None:
+            return empty, empty, empty
+        up, down = books
+        if symbol in self._unplaced:
+            self._place(symbol, up, down, (high + low) / 2)
+        now = np.datetime64(timestamp or datetime.utcnow(), 'us')
+        up_hits, down_hits = up.at_or_below(high), down.at_or_above(low)
+
+        # Entries
+        fill_up = up_hits[(self.state[up_hits] == OPEN) & ~(self.created_at[up_hits] > now)]
+        fill_down = down_hits[(self.state[down_hits] == OPEN) & ~(self.created_at[down_hits] > now)]
+        filled = np.concatenate([fill_up, fill_down])
+        if len(filled):
+            up.remove(fill_up)
+            down.remove(fill_down)
+            self.state[filled] = FILLED
+            self.filled_at[filled] = now
+            self._add_exits(up, down, filled)
+            up_hits, down_hits = up.at_or_below(high), down.at_or_above(low)
+
+        # Exits
+        up_exit = up_hits[(self.state[up_hits] == FILLED) & ~(self.filled_at[up_hits] > now)]
+        down_exit = down_hits[(self.state[down_hits] == FILLED) & ~(self.filled_at[down_hits] > now)]
+        long_up = self.direction[up_exit] == 1
+        long_down = self.direction[down_exit] == 1
+        lost = np.union1d(up_exit[~long_up], down_exit[long_down])
+        won = np.setdiff1d(np.concatenate([up_exit[long_up], down_exit[~long_down]]), lost)
+        self.state[won] = WON
+        self.exit_price[won] = self.take_profit[won]
+        self.state[lost] = LOST
+        self.exit_price[lost] = self.stop_loss[lost]
+        closed = np.concatenate([won, lost])
+        self.closed_at[closed] = now
+        up.remove(closed)
+        down.remove(closed)
+        return filled, won, lost
+
+    def close(self, slots, symbol=None, timestamp=None):
+        """Stop following ``slots`` without an outcome (cancelled, expired),
+        closed at ``timestamp`` (now by default).
+
+        Passing the ``symbol`` of the slots spares a pass over every book.
+        """
+        slots = np.atleast_1d(np.asarray(slots, dtype=np.int64))
+        slots = slots[np.isin(self.state[slots], (OPEN, FILLED))]
+        self.state[slots] = CLOSED
+        self.closed_at[slots] = np.datetime64(timestamp if timestamp is not None else datetime.utcnow(), 'us')
+        books = [self._books[symbol]] if symbol in self._books else self._books.values()
+        for up, down in books:
+            up.remove(slots)
+            down.remove(slots)
+        return slots
+
+    def created_before(self, cutoff):
+        """Open or filled slots created before ``cutoff``"""
+        size = self.size
+        return np.flatnonzero(
+            (self.created_at[:size] < np.datetime64(cutoff, 'us')) &
+            np.isin(self.state[:size], (OPEN, FILLED))
+        )
+
+    def counts(self):
+        """Number of slots per state"""
+        return np.bincount(self.state[:self.size], minlength=CLOSED + 1)
+
+def to_datetime(value):
+    """numpy datetime64 -> datetime (None for NaT)"""
+    return None if np.isnat(value) else value.astype(datetime)
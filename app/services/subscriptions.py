@@ -0,0 +1,131 @@
+from app import db
+from app.models.subscription import Subscription, FILTER_FIELDS
+from app.services.scoring import PATTERN_TYPES
+import numpy as np
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+def pattern_direction(pattern):
+    """LONG/SHORT of a pattern dict, from its levels or else its type"""
+    if pattern.get('entry_price') and pattern.get('take_profit'):
+        return 'LONG' if pattern['take_profit'] > pattern['entry_price'] else 'SHORT'
+    direction = PATTERN_TYPES.get(pattern['pattern_type'], (0, 0))[0]
+    return {1: 'LONG', -1: 'SHORT'}.get(direction)
+
+class _Threshold:
+    """Subscribers passing a ``value >= threshold`` test, via one bisect.
+
+    Thresholds are sorted once; the subscribers a value passes are the
+    prefix up to its insertion point, i.e. those whose rank is below it.
+    """
+
+    def __init__(self, thresholds):
+        order = np.argsort(thresholds, kind='stable')
+        self.sorted = thresholds[order]
+        self.rank = np.empty(len(order), dtype=np.int64)
+        self.rank[order] = np.arange(len(order))
+
+    def passing(self, value):
+        return self.rank < np.searchsorted(self.sorted, value, side='right')
+
+class SubscriptionIndex:
+    """Match pattern events against every subscription without a loop.
+
+    Each discrete filter field (symbol, pattern type, timeframe, direction)
+    has an inverted index from value to a boolean mask over subscribers,
+    plus a mask of subscribers that do not filter on the field. Minimum
+    confidence and minimum R/R are sorted thresholds. Matching a pattern is
+    four mask lookups, two bisects and a handful of vectorized ANDs.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.version = None  # (count, max id) of the indexed subscriptions
+        self._lock = threading.Lock()
+        self.build([])
+
+    def load(self):
+        """(Re)build the index from the active subscriptions in the database"""
+        version = self._version()
+        subscriptions = Subscription.query.filter(Subscription.active.is_(True)).all()
+        self.build(subscriptions)
+        self.version = version
+        self.loaded = True
+        logger.info(f"Indexed {len(subscriptions)} subscriptions")
+
+    def refresh(self):
+        """Reload if the subscriptions changed since the last load, e.g. from
+        another process; subscriptions are only created and deleted, so
+        their count and highest id tell"""
+        if not self.loaded or self._version() != self.version:
+            self.load()
+
+    def _version(self):
+        count, last = db.session.query(
+            db.func.count(Subscription.id), db.func.max(Subscription.id)
+        ).filter(Subscription.active.is_(True)).one()
+        return count, last
+
+    def build(self, subscriptions):
+        n = len(subscriptions)
+        postings, wildcard = {}, {}
+        for field in FILTER_FIELDS:
+            index, any_value = {}, np.zeros(n, dtype=bool)
+            for i, subscription in enumerate(subscriptions):
+                values = subscription.values(field)
+                if not values:
+                    any_value[i] = True
+                for value in values:
+                    index.setdefault(value, []).append(i)
+            postings[field] = {}
+            for value, rows in index.items():
+                mask = postings[field][value] = np.zeros(n, dtype=bool)
+                mask[rows] = True
+            wildcard[field] = any_value
+        min_confidence = np.array([s.min_confidence or 0.0 for s in subscriptions], dtype=float)
+        min_risk_reward = np.array(
+            [-np.inf if s.min_risk_reward is None else s.min_risk_reward for s in subscriptions],
+            dtype=float
+        )
+        with self._lock:
+            self.chat_ids = np.array([str(s.chat_id) for s in subscriptions], dtype=object)
+            self._postings, self._wildcard = postings, wildcard
+            self._confidence = _Threshold(min_confidence)
+            self._risk_reward = _Threshold(min_risk_reward)
+
+    def __len__(self):
+        return len(self.chat_ids)
+
+    def match(self, symbol, pattern):
+        """Positions of the subscriptions that accept ``pattern`` of ``symbol``"""
+        with self._lock:
+            return self._match(symbol, pattern)
+
+    def _match(self, symbol, pattern):
+        fields = {
+            'symbol': symbol,
+            'pattern_type': pattern['pattern_type'],
+            'timeframe': pattern.get('timeframe'),
+            'direction': pattern_direction(pattern),
+        }
+        risk_reward = pattern.get('risk_reward_ratio')
+        mask = self._confidence.passing(pattern['confidence'])
+        mask &= self._risk_reward.passing(-np.inf if risk_reward is None else risk_reward)
+        for field, value in fields.items():
+            posting = self._postings[field].get(value)
+            mask &= self._wildcard[field] if posting is None else posting | self._wildcard[field]
+        return np.flatnonzero(mask)
+
+    def route(self, notifications):
+        """Group (symbol, pattern) events by chat: {chat_id: [events]}.
+
+        A chat with several matching subscriptions gets each event once.
+        """
+        routed = {}
+        with self._lock:
+            for event in notifications:
+                for chat_id in set(self.chat_ids[self._match(*event)]):
+                    routed.setdefault(chat_id, []).append(event)
+        return routed
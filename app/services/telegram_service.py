@@ -9,33 +9,41 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class TelegramService:
-    def __init__(self):
+    def __init__(self, bot=None, chat_id=None):
+        """Wrap a python-telegram-bot ``Bot``.
+
+        Any object with an async ``send_message(chat_id, text, parse_mode)``
+        can be injected, e.g. the recording bot in ``benchmarks.fakes``.
+        """
         try:
-            logger.info(f"BaseConfig bot tokennnn: {BaseConfig.TELEGRAM_BOT_TOKEN}")
-            # Configure connection pool
-            request = HTTPXRequest(
-                connection_pool_size=8,
-                connect_timeout=20.0,
-                read_timeout=20.0,
-                pool_timeout=3.0
-            )
-            self.bot = Bot(token=BaseConfig.TELEGRAM_BOT_TOKEN, request=request)
-            self.chat_id = BaseConfig.TELEGRAM_CHAT_ID
+            if bot is None:
+                logger.info(f"BaseConfig bot tokennnn: {BaseConfig.TELEGRAM_BOT_TOKEN}")
+                # Configure connection pool
+                request = HTTPXRequest(
+                    connection_pool_size=8,
+                    connect_timeout=20.0,
+                    read_timeout=20.0,
+                    pool_timeout=3.0
+                )
+                bot = Bot(token=BaseConfig.TELEGRAM_BOT_TOKEN, request=request)
+            self.bot = bot
+            self.chat_id = chat_id or BaseConfig.TELEGRAM_CHAT_ID
             logger.info(f"Telegram bot initialized with chat_id: {self.chat_id}")
         except Exception as e:
             logger.error(f"Error initializing Telegram bot: {e}")
             raise
 
-    async def send_message(self, message):
-        """Send message to Telegram channel"""
+    async def send_message(self, message, chat_id=None):
+        """Send message to ``chat_id`` (default: the configured channel)"""
+        chat_id = chat_id or self.chat_id
         try:
-            if not self.bot or not self.chat_id:
+            if not self.bot or not chat_id:
                 logger.error("Bot or chat_id not properly initialized")
                 return False
                 
-            logger.info(f"Attempting to send message to chat {self.chat_id}")
+            logger.info(f"Attempting to send message to chat {chat_id}")
             await self.bot.send_message(
-                chat_id=self.chat_id,
+                chat_id=chat_id,
                 text=message,
                 parse_mode='HTML'
             )
@@ -48,6 +56,28 @@ class TelegramService:
             logger.error(f"Unexpected error sending message: {e}")
             return False
 
+    async def send_messages(self, messages, concurrency=20):
+        """Send (chat_id, message) pairs concurrently; returns one bool each.
+
+        ``concurrency`` bounds the requests in flight, so thousands of
+        subscribers share the bot's connection pool.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(chat_id, message):
+            async with semaphore:
+                return await self.send_message(message, chat_id)
+
+        return await asyncio.gather(*(send(chat_id, message) for chat_id, message in messages))
+
+    def send_many(self, messages):
+        """Blocking ``send_messages``"""
+        try:
+            return asyncio.run(self.send_messages(messages))
+        except Exception as e:
+            logger.error(f"Error sending messages: {e}")
+            return [False] * len(messages)
+
     def send_batch_notification(self, notifications):
         """Send batch notification with multiple patterns"""
         try:
@@ -55,40 +85,43 @@ class TelegramService:
                 logger.warning("Empty notifications list, skipping batch")
                 return False
                 
-            # Sort by confidence and get top 5
-            notifications.sort(key=lambda x: x[1]['confidence'], reverse=True)
-            notifications = notifications[:5]
-                
             logger.info("Sending batch notification for top 5 patterns")
-            summary = "🏆 TOP 5 PATTERN PHÁT HIỆN:\n\n"
-            for symbol, pattern in notifications:
-                emoji = self.get_pattern_emoji(pattern['pattern_type'])
-                is_bullish = pattern['take_profit'] > pattern['entry_price'] if pattern.get('take_profit') else None
+            return asyncio.run(self.send_message(self.format_batch(notifications)))
+        except Exception as e:
+            logger.error(f"Error in batch notification: {e}")
+            return False
+
+    def format_batch(self, notifications, title="🏆 TOP 5 PATTERN PHÁT HIỆN:", limit=5):
+        """Summary of the ``limit`` most confident (symbol, pattern) pairs"""
+        # Sort by confidence and get top 5
+        notifications = sorted(notifications, key=lambda x: x[1]['confidence'], reverse=True)
+        notifications = notifications[:limit]
+        summary = f"{title}\n\n"
+        for symbol, pattern in notifications:
+            emoji = self.get_pattern_emoji(pattern['pattern_type'])
+            is_bullish = pattern['take_profit'] > pattern['entry_price'] if pattern.get('take_profit') else None
+            
+            summary += (
+                f"{emoji} <b>{symbol}</b>\n"
+                f"Mẫu hình: {pattern['pattern_type'].replace('_', ' ').title()}"
+                f"{' (' + pattern['timeframe'] + ')' if pattern.get('timeframe') else ''}\n"
+                f"Độ tin cậy: {pattern['confidence']*100:.1f}%\n"
+            )
+            
+            if pattern.get('entry_price'):
+                tp_percent = abs((pattern['take_profit'] - pattern['entry_price']) / pattern['entry_price'] * 100)
+                sl_percent = abs((pattern['stop_loss'] - pattern['entry_price']) / pattern['entry_price'] * 100)
                 
                 summary += (
-                    f"{emoji} <b>{symbol}</b>\n"
-                    f"Mẫu hình: {pattern['pattern_type'].replace('_', ' ').title()}\n"
-                    f"Độ tin cậy: {pattern['confidence']*100:.1f}%\n"
+                    f"{'🟢' if is_bullish else '🔴'} Tín hiệu: {'LONG' if is_bullish else 'SHORT'}\n"
+                    f"📍 Entry: {pattern['entry_price']:.2f}\n"
+                    f"🎯 TP: {pattern['take_profit']:.2f} ({tp_percent:.1f}%)\n"
+                    f"🛑 SL: {pattern['stop_loss']:.2f} ({sl_percent:.1f}%)\n"
+                    f"📊 R/R: {pattern['risk_reward_ratio']}\n"
                 )
-                
-                if pattern.get('entry_price'):
-                    tp_percent = abs((pattern['take_profit'] - pattern['entry_price']) / pattern['entry_price'] * 100)
-                    sl_percent = abs((pattern['stop_loss'] - pattern['entry_price']) / pattern['entry_price'] * 100)
-                    
-                    summary += (
-                        f"{"🟢" if is_bullish else "🔴"} Tín hiệu: {'LONG' if is_bullish else 'SHORT'}\n"
-                        f"📍 Entry: {pattern['entry_price']:.2f}\n"
-                        f"🎯 TP: {pattern['take_profit']:.2f} ({tp_percent:.1f}%)\n"
-                        f"🛑 SL: {pattern['stop_loss']:.2f} ({sl_percent:.1f}%)\n"
-                        f"📊 R/R: {pattern['risk_reward_ratio']}\n"
-                    )
-                
-                summary += "\n"
             
-            return asyncio.run(self.send_message(summary))
-        except Exception as e:
-            logger.error(f"Error in batch notification: {e}")
-            return False
+            summary += "\n"
+        return summary
 
     def get_pattern_emoji(self, pattern_type):
         """Get emoji for pattern type"""
@@ -112,7 +145,8 @@ class TelegramService:
         """Format pattern detection message"""
         try:
             emoji = self.get_pattern_emoji(pattern['pattern_type'])
-            message = f"{emoji} <b>{symbol}</b> - {pattern['pattern_type'].replace('_', ' ').title()} - {pattern['confidence']*100:.1f}%"
+            timeframe = f" [{pattern['timeframe']}]" if pattern.get('timeframe') else ''
+            message = f"{emoji} <b>{symbol}</b>{timeframe} - {pattern['pattern_type'].replace('_', ' ').title()} - {pattern['confidence']*100:.1f}%"
             return message
         except Exception as e:
             logger.error(f"Error formatting message: {e}")
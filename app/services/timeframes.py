@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 180_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '30m': 1_800_000,
+    '1h': 3_600_000,
+    '2h': 7_200_000,
+    '4h': 14_400_000,
+    '6h': 21_600_000,
+    '8h': 28_800_000,
+    '12h': 43_200_000,
+    '1d': 86_400_000,
+}
+
+SUM_COLUMNS = ['volume', 'quote_volume', 'taker_buy_base', 'taker_buy_quote']
+
+# Columns the analyzer reads; indicators are derived from them on demand
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def interval_ms(interval):
+    """Length of a Binance interval string in milliseconds"""
+    try:
+        return INTERVAL_MS[interval]
+    except KeyError:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+def resample_ratio(base_interval, interval):
+    """How many base candles make up one ``interval`` candle"""
+    base_ms, target_ms = interval_ms(base_interval), interval_ms(interval)
+    if target_ms % base_ms:
+        raise ValueError(f"{interval} is not a multiple of {base_interval}")
+    return target_ms // base_ms
+
+def resample_ohlcv(df, base_interval, interval, closed_only=True):
+    """Aggregate base-interval klines into ``interval`` klines.
+
+    Buckets are aligned to the epoch like Binance's own candles, so 4h and
+    1d candles open at 00:00 UTC. ``df`` must be sorted by ``timestamp``.
+    With ``closed_only`` a trailing bucket that is still missing base candles
+    is dropped, as is a leading one that started before the history.
+    """
+    ratio = resample_ratio(base_interval, interval)
+    if ratio == 1 or df.empty:
+        return df
+
+    target_ms = interval_ms(interval)
+    open_ms = df['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    bucket = open_ms // target_ms
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(df)] - 1
+    counts = ends - starts + 1
+
+    out = {
+        'timestamp': pd.to_datetime(bucket[starts] * target_ms, unit='ms'),
+        'open': df['open'].to_numpy(dtype=float)[starts],
+        'high': np.maximum.reduceat(df['high'].to_numpy(dtype=float), starts),
+        'low': np.minimum.reduceat(df['low'].to_numpy(dtype=float), starts),
+        'close': df['close'].to_numpy(dtype=float)[ends],
+    }
+    for col in SUM_COLUMNS:
+        if col in df:
+            out[col] = np.add.reduceat(df[col].to_numpy(dtype=float), starts)
+    if 'trades' in df:
+        out['trades'] = np.add.reduceat(df['trades'].to_numpy(dtype=np.int64), starts)
+    if 'close_time' in df:
+        out['close_time'] = bucket[starts] * target_ms + target_ms - 1
+
+    result = pd.DataFrame(out)
+    if closed_only:
+        complete = counts == ratio
+        result = result[complete].reset_index(drop=True)
+    return result
+
+def compact_klines(df, dtype=np.float32):
+    """Timestamp plus OHLCV as ``dtype``, for long-lived histories.
+
+    float32 keeps about 7 significant digits, far finer than any tolerance
+    used by the detectors, at half the size of float64. The raw Binance
+    extras (quote volume, trades, ...) are not used by the analysis and are
+    dropped.
+    """
+    out = {'timestamp': df['timestamp'].to_numpy(dtype='datetime64[ns]')}
+    for col in OHLCV_COLUMNS:
+        out[col] = df[col].to_numpy(dtype=dtype)
+    return pd.DataFrame(out)
+
+def analysis_frame(df):
+    """float64 OHLCV frame for the analyzer (detections stay plain floats)"""
+    out = {'timestamp': df['timestamp'].to_numpy()}
+    for col in OHLCV_COLUMNS:
+        out[col] = df[col].to_numpy(dtype=float)
+    return pd.DataFrame(out)
+
+def frame_nbytes(df):
+    """Memory held by a frame's columns"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def timeframe_frames(base_df, base_interval, timeframes, bars=100, prepare=None):
+    """The last ``bars`` candles of every timeframe derived from one base
+    frame ({timeframe: df}); timeframes without enough history are left out.
+
+    ``prepare`` is applied to each frame (e.g.
+    ``BinanceService.add_technical_indicators``).
+    """
+    frames = {}
+    for timeframe in timeframes:
+        df = resample_ohlcv(base_df, base_interval, timeframe)
+        if len(df) < bars // 2:
+            # Not enough history for this timeframe yet
+            continue
+        df = analysis_frame(df.iloc[-bars:])
+        if prepare is not None:
+            df = prepare(df)
+        frames[timeframe] = df
+    return frames
+
+def analyze_timeframes(pattern_analyzer, base_df, base_interval, timeframes,
+                       bars=100, prepare=None):
+    """Run the analyzer on every timeframe derived from one base frame.
+
+    Each returned pattern is tagged with its ``timeframe``.
+    """
+    frames = timeframe_frames(base_df, base_interval, timeframes, bars, prepare)
+
+    # All timeframes are scored in one batch
+    results = []
+    for timeframe, patterns in pattern_analyzer.analyze_many(frames).items():
+        for pattern in patterns:
+            pattern['timeframe'] = timeframe
+            results.append(pattern)
+    return results
+
+def history_bars(base_interval, timeframes, bars=100):
+    """Base candles needed so every timeframe gets ``bars`` candles"""
+    ratio = max(resample_ratio(base_interval, tf) for tf in timeframes)
+    # One extra bucket covers a partially filled leading candle
+    return (bars + 1) * ratio
@@ -0,0 +1,102 @@
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+QUOTE_ASSETS = ('USDT', 'FDUSD', 'BTC')
+
+# (size, every): the next ``size`` symbols by quote volume are rescanned
+# every ``every`` cycles; a size of None takes all remaining symbols
+TIERS = ((100, 1), (400, 4), (None, 24))
+
+def parse_tiers(value):
+    """``"100:1,400:4,*:24"`` -> ((100, 1), (400, 4), (None, 24))"""
+    tiers = []
+    for item in value.split(','):
+        size, every = item.split(':')
+        tiers.append((None if size.strip() in ('*', '') else int(size), int(every)))
+    return tuple(tiers)
+
+class Universe:
+    """Every trading pair of several quote assets, split into scan tiers.
+
+    Exchange info and 24h tickers are cached for ``info_ttl``/``ticker_ttl``
+    seconds. Symbols are ranked by quote volume converted to USDT and cut
+    into tiers; a tier rescanned every ``n`` cycles is scanned one
+    ``1/n`` slice per cycle, so every cycle does a similar amount of work.
+    """
+
+    def __init__(self, binance_service, quote_assets=QUOTE_ASSETS, tiers=TIERS,
+                 info_ttl=3600, ticker_ttl=300, clock=time.time):
+        self.binance = binance_service
+        self.quote_assets = tuple(quote_assets)
+        self.tiers = tuple(tiers)
+        self.info_ttl = info_ttl
+        self.ticker_ttl = ticker_ttl
+        self.clock = clock
+        self._cache = {}  # name -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def _cached(self, name, ttl, fetch):
+        """Value of ``fetch`` kept for ``ttl`` seconds; a failed (empty)
+        refresh keeps serving the previous value"""
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] > self.clock():
+                return cached[1]
+            value = fetch()
+            if not value and cached is not None:
+                logger.warning(f"Refreshing {name} failed, keeping cached copy")
+                value = cached[1]
+            self._cache[name] = (self.clock() + ttl, value)
+            return value
+
+    def symbols(self):
+        """{symbol: quote asset} of every trading pair"""
+        return self._cached('exchange_info', self.info_ttl,
+                            lambda: self.binance.get_trading_symbols(self.quote_assets))
+
+    def tickers(self):
+        return self._cached('tickers', self.ticker_ttl, self.binance.get_tickers)
+
+    def ranked(self):
+        """Trading symbols by 24h quote volume in USDT, highest first"""
+        symbols = self.symbols()
+        tickers = {t['symbol']: t for t in self.tickers()}
+
+        def usdt_rate(quote):
+            if quote == 'USDT':
+                return 1.0
+            ticker = tickers.get(f"{quote}USDT")
+            return float(ticker['lastPrice']) if ticker else 1.0
+
+        rates = {quote: usdt_rate(quote) for quote in self.quote_assets}
+        volume = {
+            symbol: float(tickers[symbol]['quoteVolume']) * rates[quote]
+            for symbol, quote in symbols.items() if symbol in tickers
+        }
+        return sorted(symbols, key=lambda s: volume.get(s, 0.0), reverse=True)
+
+    def partition(self):
+        """[(symbols, every)] per tier"""
+        ranked = self.ranked()
+        partition, start = [], 0
+        for size, every in self.tiers:
+            end = len(ranked) if size is None else start + size
+            partition.append((ranked[start:end], every))
+            start = end
+        return partition
+
+    def due(self, cycle):
+        """Symbols to scan in ``cycle`` (0, 1, 2, ...)"""
+        symbols = []
+        for tier, every in self.partition():
+            symbols.extend(tier[cycle % every::every])
+        return symbols
+
+    def summary(self):
+        return {
+            'symbols': len(self.symbols()),
+            'tiers': [{'size': len(tier), 'every': every} for tier, every in self.partition()],
+        }
@@ -106,6 +106,7 @@ function createPatternRow(pattern) {
                   title="${patternDescriptions[pattern.pattern_type] || 'Mô hình giá'}">
                 ${pattern.pattern_type.replace('_', ' ').toUpperCase()}
             </span>
+            ${pattern.timeframe ? `<span class="badge bg-secondary ms-1">${pattern.timeframe}</span>` : ''}
         </td>
         <td>${formatNumber(pattern.price)} USDT</td>
         <td class="${confidence.class}">
@@ -114,6 +115,7 @@ function createPatternRow(pattern) {
         </td>
         <td>
             ${getRetestBadge(pattern.retest_status, pattern.retest_description)}
+            ${getOutcomeBadge(pattern)}
         </td>
         <td>${pattern.description}</td>
     `;
@@ -206,6 +208,23 @@ function getRetestBadge(status, description) {
     `;
 }
 
+// Get trade outcome badge (only once the entry has triggered)
+function getOutcomeBadge(pattern) {
+    const outcomes = {
+        filled: ['bg-info text-dark', 'Đã vào lệnh'],
+        won: ['bg-success', 'Chạm TP'],
+        lost: ['bg-danger', 'Chạm SL']
+    };
+    const outcome = outcomes[pattern.outcome_status];
+    if (!outcome) return '';
+    const time = pattern.closed_at || pattern.filled_at;
+    return `
+        <span class="badge ${outcome[0]} ms-1" title="${time ? new Date(time + 'Z').toLocaleString() : ''}">
+            ${outcome[1]}
+        </span>
+    `;
+}
+
 // Filter and sort patterns based on search and filter criteria
 function filterPatterns() {
     const searchTerm = document.getElementById('search-input').value.toLowerCase();
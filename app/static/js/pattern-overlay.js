@@ -92,11 +92,7 @@ class PatternOverlay {
         ));
 
         // Vẽ đường neckline
-        this.lines.push(this.chart.createShape(
-            { time: points[0].time, price: points[0].price },
-            { time: points[4].time, price: points[4].price },
-            { color: color, width: 2, style: 2 }
-        ));
+        this.drawLines(pattern, color);
 
         // Thêm nhãn
         this.labels.push(this.chart.createShape(
@@ -128,11 +124,7 @@ class PatternOverlay {
         ));
 
         // Vẽ đường neckline
-        this.lines.push(this.chart.createShape(
-            { time: points[0].time, price: points[0].price },
-            { time: points[2].time, price: points[2].price },
-            { color: color, width: 2, style: 2 }
-        ));
+        this.drawLines(pattern, color);
 
         // Thêm nhãn
         this.labels.push(this.chart.createShape(
@@ -141,44 +133,67 @@ class PatternOverlay {
         ));
     }
 
-    // Tương tự implement các hàm vẽ cho các mô hình khác...
+    // Vẽ các đường của mô hình (neckline, trendline, kênh) từ pattern.lines
+    drawLines(pattern, color, label) {
+        const lines = Object.values(pattern.lines || {});
+        lines.forEach(([start, end]) => {
+            this.lines.push(this.chart.createShape(
+                { time: start.time, price: start.price },
+                { time: end.time, price: end.price },
+                { color: color, width: 2, style: 2 }
+            ));
+        });
+
+        if (label && lines.length) {
+            const [start] = lines[0];
+            this.labels.push(this.chart.createShape(
+                { time: start.time, price: start.price },
+                { text: `${label} (${(pattern.confidence * 100).toFixed(1)}%)`, color: color }
+            ));
+        }
+    }
+
+    patternColor(pattern) {
+        return pattern.confidence >= 0.8 ? '#f23645' : '#ffa500';
+    }
+
     drawDoubleBottom(pattern) {
-        // Implement vẽ Double Bottom
+        this.drawLines(pattern, this.patternColor(pattern), 'DB');
     }
 
     drawTripleTop(pattern) {
-        // Implement vẽ Triple Top
+        this.drawLines(pattern, this.patternColor(pattern), 'TT');
     }
 
     drawTripleBottom(pattern) {
-        // Implement vẽ Triple Bottom
+        this.drawLines(pattern, this.patternColor(pattern), 'TB');
     }
 
     drawSymmetricTriangle(pattern) {
-        // Implement vẽ Symmetric Triangle
+        this.drawLines(pattern, this.patternColor(pattern), 'Sym Triangle');
     }
 
     drawAscendingTriangle(pattern) {
-        // Implement vẽ Ascending Triangle
+        this.drawLines(pattern, this.patternColor(pattern), 'Asc Triangle');
     }
 
     drawDescendingTriangle(pattern) {
-        // Implement vẽ Descending Triangle
+        this.drawLines(pattern, this.patternColor(pattern), 'Desc Triangle');
     }
 
     drawRisingWedge(pattern) {
-        // Implement vẽ Rising Wedge
+        this.drawLines(pattern, this.patternColor(pattern), 'Rising Wedge');
     }
 
     drawFallingWedge(pattern) {
-        // Implement vẽ Falling Wedge
+        this.drawLines(pattern, this.patternColor(pattern), 'Falling Wedge');
     }
 
     drawBullFlag(pattern) {
-        // Implement vẽ Bull Flag
+        this.drawLines(pattern, this.patternColor(pattern), 'Bull Flag');
     }
 
     drawBearFlag(pattern) {
-        // Implement vẽ Bear Flag
+        this.drawLines(pattern, this.patternColor(pattern), 'Bear Flag');
     }
 }
@@ -0,0 +1,4 @@
+"""Offline benchmark suite for the pattern scanner.
+
+Run with ``python -m benchmarks.run``; see README for details.
+"""
@@ -0,0 +1,208 @@
+"""Offline stand-ins for the Binance and Telegram clients.
+
+``ReplayBinanceClient`` answers the subset of the python-binance ``Client``
+API used by ``BinanceService`` from recorded or synthetic data, with optional
+latency and injected rate-limit errors. ``FakeTelegramBot`` records messages
+instead of sending them. Both are injected into the real services:
+
+    binance_service = BinanceService(client=ReplayBinanceClient.from_frames(frames))
+    telegram_service = TelegramService(bot=FakeTelegramBot(), chat_id='bench')
+"""
+import asyncio
+import bisect
+import json
+import random
+import threading
+import time
+
+from binance.exceptions import BinanceAPIException
+from telegram.error import RetryAfter
+
+# Longest first, so FDUSD is not read as USD
+KNOWN_QUOTES = ('FDUSD', 'USDT', 'USDC', 'BTC', 'ETH', 'BNB')
+RATE_LIMIT_ERROR = json.dumps({'code': -1003, 'msg': 'Too many requests; current limit is exceeded.'})
+
+class _FakeResponse:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+class ReplayBinanceClient:
+    def __init__(self, klines, tickers=None, latency=0.0, jitter=0.0,
+                 error_rate=0.0, seed=0):
+        """Serve ``klines`` ({symbol: {interval: [raw kline rows]}}).
+
+        ``latency`` (+ uniform ``jitter``) seconds are slept on every call and
+        ``error_rate`` of calls raise a Binance rate-limit error.
+        """
+        self.klines = klines
+        self.tickers = tickers or self._tickers_from_klines(klines)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.cursor = 0
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frames(cls, frames, interval='1h', warmup=None, **kwargs):
+        """Build from synthetic frames ({symbol: DataFrame}).
+
+        With ``warmup`` only the first ``warmup`` candles are visible until
+        ``advance`` is called, which lets successive scans see new candles.
+        """
+        klines = {
+            symbol: {interval: _frame_to_rows(df)}
+            for symbol, df in frames.items()
+        }
+        client = cls(klines, **kwargs)
+        if warmup is not None:
+            client.cursor = warmup - max(len(rows[interval]) for rows in klines.values())
+        return client
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Load a session written by ``record_session``"""
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['klines'], data.get('tickers'), **kwargs)
+
+    def advance(self, steps=1):
+        """Reveal ``steps`` more candles of every replayed series"""
+        self.cursor = min(self.cursor + steps, 0)
+
+    def ping(self):
+        self._call()
+        return {}
+
+    def get_ticker(self, **params):
+        self._call()
+        if 'symbol' in params:
+            return next(t for t in self.tickers if t['symbol'] == params['symbol'])
+        return list(self.tickers)
+
+    def get_exchange_info(self):
+        self._call()
+        symbols = []
+        for symbol in self.klines:
+            quote = next((q for q in KNOWN_QUOTES if symbol.endswith(q)), symbol[-4:])
+            symbols.append({
+                'symbol': symbol,
+                'status': 'TRADING',
+                'baseAsset': symbol[:-len(quote)],
+                'quoteAsset': quote,
+                'isSpotTradingAllowed': True,
+            })
+        return {'symbols': symbols}
+
+    def get_all_tickers(self):
+        self._call()
+        return [{'symbol': s, 'price': p} for s, p in self._last_prices().items()]
+
+    def get_symbol_ticker(self, **params):
+        self._call()
+        prices = self._last_prices()
+        if 'symbol' in params:
+            return {'symbol': params['symbol'], 'price': prices[params['symbol']]}
+        return [{'symbol': s, 'price': p} for s, p in prices.items()]
+
+    def get_klines(self, **params):
+        self._call()
+        rows = self._visible(self.klines[params['symbol']][params['interval']])
+        limit = params.get('limit', 500)
+        start = params.get('startTime')
+        end = params.get('endTime')
+        if start is not None:
+            rows = rows[bisect.bisect_left(rows, start, key=lambda r: r[0]):]
+            return rows[:limit]
+        if end is not None:
+            rows = rows[:bisect.bisect_right(rows, end, key=lambda r: r[0])]
+        return rows[-limit:]
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.latency or self.jitter else 0
+            if fail:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise BinanceAPIException(_FakeResponse(429, RATE_LIMIT_ERROR), 429, RATE_LIMIT_ERROR)
+
+    def _visible(self, rows):
+        return rows[:len(rows) + self.cursor] if self.cursor else rows
+
+    def _last_prices(self):
+        prices = {}
+        for symbol, intervals in self.klines.items():
+            rows = self._visible(next(iter(intervals.values())))
+            if rows:
+                prices[symbol] = rows[-1][4]
+        return prices
+
+    @staticmethod
+    def _tickers_from_klines(klines):
+        tickers = []
+        for symbol, intervals in klines.items():
+            rows = next(iter(intervals.values()))
+            last = rows[-24:]
+            tickers.append({
+                'symbol': symbol,
+                'lastPrice': last[-1][4],
+                'volume': str(sum(float(r[5]) for r in last)),
+                # Synthetic volumes are small; scale so every symbol clears
+                # the default 50M quote-volume filter of get_top_symbols.
+                'quoteVolume': str(1e8 + sum(float(r[7]) for r in last)),
+            })
+        return tickers
+
+def record_session(client, symbols, path, interval='1h', limit=1000):
+    """Capture tickers and klines from a real client for later replay"""
+    tickers = client.get_ticker()
+    klines = {
+        symbol: {interval: client.get_klines(symbol=symbol, interval=interval, limit=limit)}
+        for symbol in symbols
+    }
+    with open(path, 'w') as f:
+        json.dump({'tickers': tickers, 'klines': klines}, f)
+
+class FakeTelegramBot:
+    def __init__(self, latency=0.0, flood_rate=0.0, seed=0):
+        """Record messages; ``flood_rate`` of sends raise ``RetryAfter``"""
+        self.latency = latency
+        self.flood_rate = flood_rate
+        self.messages = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    async def send_message(self, chat_id, text, parse_mode=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        with self._lock:
+            if self._random.random() < self.flood_rate:
+                raise RetryAfter(1)
+            self.messages.append({
+                'chat_id': chat_id,
+                'text': text,
+                'parse_mode': parse_mode,
+                'sent_at': time.time()
+            })
+        return True
+
+def _frame_to_rows(df):
+    """Convert a synthetic frame into raw Binance kline rows"""
+    open_time = df['timestamp'].astype('int64') // 1_000_000
+    rows = []
+    for t, o, h, l, c, v, ct, qv, n, tb, tq in zip(
+            open_time, df['open'], df['high'], df['low'], df['close'],
+            df['volume'], df['close_time'], df['quote_volume'], df['trades'],
+            df['taker_buy_base'], df['taker_buy_quote']):
+        rows.append([
+            int(t), f"{o:.8f}", f"{h:.8f}", f"{l:.8f}", f"{c:.8f}", f"{v:.8f}",
+            int(ct), f"{qv:.8f}", int(n), f"{tb:.8f}", f"{tq:.8f}", "0"
+        ])
+    return rows
@@ -0,0 +1,115 @@
+"""End-to-end load driver running the real scan pipeline against fakes.
+
+Usage:
+    python -m benchmarks.load --symbols 100,500,2000 --latency 0.002 --error-rate 0.01
+
+For each universe size one full ``run_scan_cycle`` is executed with the real
+``BinanceService``/``TelegramService`` on top of ``ReplayBinanceClient`` and
+``FakeTelegramBot``, then every new pattern is pushed through
+``TelegramService.notify_pattern``. Reports symbols/second and
+notifications/second.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+from flask import Flask
+
+from app import db
+from app.services.binance_service import BinanceService
+from app.services.pattern_analyzer import PatternAnalyzer
+from app.services.scanner import run_scan_cycle
+from app.services.telegram_service import TelegramService
+from benchmarks.fakes import FakeTelegramBot, ReplayBinanceClient
+from benchmarks.synthetic import make_universe
+
+def make_offline_app():
+    """Minimal Flask app bound to an in-memory SQLite database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+def build_offline_services(frames, latency=0.0, jitter=0.0, error_rate=0.0,
+                           telegram_latency=0.0, seed=0):
+    """Real services wired to the replay client and recording bot"""
+    client = ReplayBinanceClient.from_frames(
+        frames, latency=latency, jitter=jitter, error_rate=error_rate, seed=seed
+    )
+    bot = FakeTelegramBot(latency=telegram_latency, seed=seed)
+    return BinanceService(client=client), TelegramService(bot=bot, chat_id='offline')
+
+def run_load(symbol_count, bars=100, latency=0.0, jitter=0.0, error_rate=0.0,
+             telegram_latency=0.0, seed=0):
+    """Run one scan cycle plus notifications for ``symbol_count`` symbols"""
+    app = make_offline_app()
+    frames = make_universe(symbol_count, n=bars, seed=seed)
+    binance_service, telegram_service = build_offline_services(
+        frames, latency, jitter, error_rate, telegram_latency, seed
+    )
+    pattern_analyzer = PatternAnalyzer()
+
+    with app.app_context():
+        start = time.perf_counter()
+        new_patterns = run_scan_cycle(
+            binance_service, pattern_analyzer, telegram_service, symbols=list(frames)
+        )
+        scan_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sent = 0
+        for symbol, pattern in new_patterns:
+            if telegram_service.notify_pattern(symbol, pattern, pattern.get('price')):
+                sent += 1
+        notify_seconds = time.perf_counter() - start
+
+    client = binance_service.client
+    return {
+        'symbols': symbol_count,
+        'bars': bars,
+        'scan_seconds': scan_seconds,
+        'symbols_per_second': symbol_count / scan_seconds if scan_seconds else None,
+        'api_calls': client.calls,
+        'api_errors': client.errors,
+        'new_patterns': len(new_patterns),
+        'notifications_sent': sent,
+        'notify_seconds': notify_seconds,
+        'notifications_per_second': sent / notify_seconds if notify_seconds else None
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline scan load driver')
+    parser.add_argument('--symbols', default='100,500,2000', help='Comma separated universe sizes')
+    parser.add_argument('--bars', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds per Binance call')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of Binance calls that raise a rate-limit error')
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+    # Per-pattern INFO logs from the pipeline would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    results = []
+    for count in [int(s) for s in args.symbols.split(',') if s]:
+        result = run_load(count, args.bars, args.latency, args.jitter, args.error_rate,
+                          args.telegram_latency, args.seed)
+        results.append(result)
+        print(f"{count:6d} symbols: {result['symbols_per_second']:8.1f} symbols/s, "
+              f"{result['api_errors']} API errors, {result['new_patterns']} patterns, "
+              f"{result['notifications_per_second'] or 0:8.1f} notifications/s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results}, f, indent=2)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
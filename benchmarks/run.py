@@ -0,0 +1,180 @@
+"""Benchmark runner for PatternAnalyzer and the scan pipeline.
+
+Usage:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --sizes 100,1000 --baseline bench.json --threshold 0.25
+
+Each result is keyed by a stable name so two JSON files can be compared;
+with ``--baseline`` the process exits with status 1 when any benchmark got
+slower than the allowed threshold.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.services.pattern_analyzer import PatternAnalyzer
+from benchmarks.startup import bench_startup
+from benchmarks.synthetic import SHAPES, SIZES, make_ohlcv, make_universe
+
+def time_call(func, repeat=3, setup=None):
+    """Time ``func`` ``repeat`` times, calling ``setup`` untimed before each run"""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return {
+        'min': min(runs),
+        'median': statistics.median(runs),
+        'runs': runs
+    }
+
+def bench_analyzer(sizes, repeat):
+    """Time every detector and analyze_all_patterns on each size and shape"""
+    analyzer = PatternAnalyzer()
+    results = {}
+    for n in sizes:
+        for shape in ['random_walk'] + list(SHAPES):
+            df = make_ohlcv(n, shape=shape)
+            for name, detector in analyzer.patterns.items():
+                key = f"detect.{name}[n={n},shape={shape}]"
+                results[key] = time_call(lambda: detector(df.copy()), repeat)
+            key = f"analyze_all_patterns[n={n},shape={shape}]"
+            results[key] = time_call(lambda: analyzer.analyze_all_patterns(df.copy()), repeat)
+    return results
+
+def bench_indicators(sizes, repeat):
+    """Time BinanceService.add_technical_indicators"""
+    try:
+        from app.services.binance_service import BinanceService
+        from benchmarks.fakes import ReplayBinanceClient
+    except ImportError as e:
+        return {'add_technical_indicators': {'skipped': str(e)}}
+
+    service = BinanceService(client=ReplayBinanceClient({}))
+    results = {}
+    for n in sizes:
+        df = make_ohlcv(n)
+        key = f"add_technical_indicators[n={n}]"
+        results[key] = time_call(lambda: service.add_technical_indicators(df.copy()), repeat)
+    return results
+
+def bench_scan_cycle(symbols, bars, repeat):
+    """Time one full offline scan cycle against an in-memory database"""
+    try:
+        from app import db
+        from app.services.scanner import run_scan_cycle
+        from benchmarks.load import build_offline_services, make_offline_app
+    except ImportError as e:
+        return {'scan_cycle': {'skipped': str(e)}}
+
+    app = make_offline_app()
+    binance_service, telegram_service = build_offline_services(make_universe(symbols, n=bars))
+    pattern_analyzer = PatternAnalyzer()
+
+    def reset_db():
+        db.drop_all()
+        db.create_all()
+
+    with app.app_context():
+        key = f"scan_cycle[symbols={symbols},bars={bars}]"
+        result = time_call(
+            lambda: run_scan_cycle(binance_service, pattern_analyzer, telegram_service),
+            repeat,
+            setup=reset_db
+        )
+        result['symbols_per_second'] = symbols / result['min'] if result['min'] else None
+        return {key: result}
+
+def run_all(sizes=SIZES, repeat=3, scan_symbols=50, scan_bars=100):
+    """Run every benchmark and return the JSON-serialisable report"""
+    results = {}
+    results.update(bench_analyzer(sizes, repeat))
+    results.update(bench_indicators(sizes, repeat))
+    results.update(bench_scan_cycle(scan_symbols, scan_bars, repeat))
+    results.update(bench_startup(repeat))
+    return {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'sizes': list(sizes),
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+def compare(current, baseline, threshold=0.25, metric='min', min_delta=0.0005):
+    """Return benchmarks that got slower than ``threshold`` relative to baseline
+
+    Slowdowns smaller than ``min_delta`` seconds are treated as timer noise.
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or metric not in base or metric not in result:
+            continue
+        if result[metric] - base[metric] < min_delta:
+            continue
+        if base[metric] > 0 and result[metric] > base[metric] * (1 + threshold):
+            regressions.append({
+                'name': name,
+                'baseline': base[metric],
+                'current': result[metric],
+                'ratio': result[metric] / base[metric]
+            })
+    return sorted(regressions, key=lambda r: r['ratio'], reverse=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pattern scanner benchmarks')
+    parser.add_argument('--sizes', default=','.join(str(s) for s in SIZES),
+                        help='Comma separated bar counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scan-symbols', type=int, default=50)
+    parser.add_argument('--scan-bars', type=int, default=100)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', help='Compare against a previous JSON report')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown before a benchmark counts as a regression')
+    args = parser.parse_args(argv)
+    # Per-pattern INFO logs from the pipeline would dominate the timings
+    logging.getLogger().setLevel(logging.WARNING)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    report = run_all(sizes, args.repeat, args.scan_symbols, args.scan_bars)
+
+    for name, result in report['results'].items():
+        if 'skipped' in result:
+            print(f"{name:70s} skipped ({result['skipped']})")
+        else:
+            print(f"{name:70s} {result['min'] * 1000:10.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['name']}: {r['baseline'] * 1000:.2f} ms -> "
+                  f"{r['current'] * 1000:.2f} ms (x{r['ratio']:.2f})")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Worker startup-time measurement.
+
+Each sample boots a fresh interpreter that builds the app the way a gunicorn
+worker does (``create_app`` with the production config) and reports how long
+that took and which heavy modules ended up imported.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ['pandas', 'numpy', 'pandas_ta', 'binance', 'telegram']
+
+_BOOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+from config.production import ProductionConfig
+app = create_app(ProductionConfig)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'loaded': [m for m in %r if m in sys.modules]
+}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_boot(repeat=5):
+    """Boot ``repeat`` fresh workers and return timing and loaded modules"""
+    samples = []
+    loaded = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', _BOOT_SCRIPT % (HEAVY_MODULES,)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result['seconds'])
+        loaded = result['loaded']
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'runs': samples,
+        'heavy_modules_loaded': loaded
+    }
+
+def bench_startup(repeat=3):
+    """Benchmark entry used by ``benchmarks.run``"""
+    try:
+        return {'worker_boot': measure_boot(repeat)}
+    except (subprocess.CalledProcessError, ValueError) as e:
+        return {'worker_boot': {'skipped': str(e)}}
@@ -0,0 +1,145 @@
+"""Seeded synthetic OHLCV generators.
+
+Frames have the same columns as ``BinanceService.get_klines`` so they can be
+fed straight into ``PatternAnalyzer`` and the scan pipeline.
+"""
+import numpy as np
+import pandas as pd
+
+KLINE_COLUMNS = [
+    'timestamp', 'open', 'high', 'low', 'close',
+    'volume', 'close_time', 'quote_volume', 'trades',
+    'taker_buy_base', 'taker_buy_quote', 'ignore'
+]
+
+INTERVAL_MS = {
+    '1m': 60_000,
+    '5m': 300_000,
+    '15m': 900_000,
+    '1h': 3_600_000,
+    '4h': 14_400_000,
+    '1d': 86_400_000,
+}
+
+# Skeletons are (x, y) knots: x is the fraction of the shape length, y the
+# move relative to the starting level in units of the shape amplitude.
+SHAPES = {
+    # The detector walks five consecutive maxima, so the neckline dips carry
+    # a minor bump between each shoulder and the head.
+    'head_and_shoulders': [
+        (0.0, 0.0), (0.1, 0.6), (0.2, 0.2), (0.3, 0.4), (0.4, 0.15),
+        (0.5, 1.0), (0.6, 0.15), (0.7, 0.4), (0.8, 0.2), (0.9, 0.6), (1.0, 0.0)
+    ],
+    'double_top': [
+        (0.0, 0.0), (0.25, 1.0), (0.5, 0.4), (0.75, 1.0), (1.0, 0.0)
+    ],
+    'triangle': [
+        (0.0, 0.0), (0.1, 1.0), (0.25, 0.1), (0.4, 0.85), (0.55, 0.25),
+        (0.7, 0.7), (0.85, 0.4), (1.0, 0.55)
+    ],
+    'flag': [
+        (0.0, 0.0), (0.45, 1.0), (0.6, 0.95), (0.7, 0.98), (0.8, 0.9),
+        (0.9, 0.93), (1.0, 0.85)
+    ],
+}
+
+# Default number of bars used by each embedded shape; large enough for the
+# detectors' default window of 20 bars.
+SHAPE_LENGTHS = {
+    'head_and_shoulders': 240,
+    'double_top': 160,
+    'triangle': 30,
+    'flag': 40,
+}
+
+SHAPE_AMPLITUDES = {
+    'head_and_shoulders': 0.1,
+    'double_top': 0.1,
+    'triangle': 0.1,
+    'flag': 0.25,
+}
+
+SIZES = [100, 1_000, 10_000, 100_000]
+
+def random_walk(n, seed=0, start_price=100.0, volatility=0.01, interval='1h'):
+    """Generate a geometric random walk of ``n`` candles"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0, volatility, n)
+    close = start_price * np.exp(np.cumsum(returns))
+    volume = rng.lognormal(mean=10.0, sigma=0.5, size=n)
+    return _build_frame(close, volume, rng, interval)
+
+def embed_shape(df, shape, length=None, amplitude=None, seed=0, interval='1h'):
+    """Overlay a chart pattern on the last ``length`` candles of ``df``"""
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape: {shape}")
+
+    rng = np.random.default_rng(seed)
+    n = len(df)
+    length = min(length or SHAPE_LENGTHS[shape], n)
+    amplitude = amplitude or SHAPE_AMPLITUDES[shape]
+    start = n - length
+
+    close = df['close'].to_numpy(dtype=float).copy()
+    base = close[start - 1] if start > 0 else close[0]
+
+    knots_x, knots_y = zip(*SHAPES[shape])
+    x = np.linspace(0.0, 1.0, length)
+    skeleton = np.interp(x, knots_x, knots_y)
+    noise = rng.normal(0.0, amplitude * 0.002, length)
+    close[start:] = base * (1 + amplitude * skeleton + noise)
+
+    return _build_frame(close, df['volume'].to_numpy(dtype=float), rng, interval,
+                        start_time=df['timestamp'].iloc[0])
+
+def make_ohlcv(n, shape='random_walk', seed=0, interval='1h'):
+    """Random walk of ``n`` candles, optionally ending in an embedded shape"""
+    df = random_walk(n, seed=seed, interval=interval)
+    if shape == 'random_walk':
+        return df
+    return embed_shape(df, shape, seed=seed, interval=interval)
+
+def make_universe(count, n=100, seed=0, interval='1h', quote_assets=('USDT',)):
+    """Build ``count`` symbol frames cycling through all shapes (and quote assets)"""
+    shapes = ['random_walk'] + list(SHAPES)
+    frames = {}
+    for i in range(count):
+        symbol = f"SYM{i:04d}{quote_assets[i % len(quote_assets)]}"
+        frames[symbol] = make_ohlcv(n, shape=shapes[i % len(shapes)], seed=seed + i,
+                                    interval=interval)
+    return frames
+
+def _build_frame(close, volume, rng, interval, start_time=None):
+    """Derive open/high/low around a close series and assemble kline columns"""
+    n = len(close)
+    step = INTERVAL_MS[interval]
+    open_ = np.empty(n)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    # Wicks are kept much smaller than the embedded shapes so that local
+    # extrema of the skeleton stay strict.
+    wick = np.abs(rng.normal(0.0, 0.0005, (2, n)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+
+    if start_time is None:
+        start_ms = 1_600_000_000_000
+    else:
+        start_ms = int(pd.Timestamp(start_time).value // 1_000_000)
+    open_time = start_ms + np.arange(n, dtype=np.int64) * step
+
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(open_time, unit='ms'),
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+        'close_time': open_time + step - 1,
+        'quote_volume': volume * close,
+        'trades': (volume // 10).astype(np.int64),
+        'taker_buy_base': volume / 2,
+        'taker_buy_quote': volume * close / 2,
+        'ignore': 0,
+    })
+    return df[KLINE_COLUMNS]
@@ -0,0 +1,89 @@
+"""Throughput check of universe mode against a fake exchange.
+
+Usage:
+    python -m benchmarks.universe --symbols 2400 --latency 0.02 --workers 16
+
+Builds a replayed exchange with ``--symbols`` pairs spread over the
+universe quote assets, ranks and tiers them with ``Universe`` and runs one
+``run_scan_cycle`` over every symbol through a ``KlineCache`` (the worst
+case, when all tiers are due at once). Also checks that the tier rotation
+visits every symbol within one full period. Exits with status 1 when the
+scan is slower than ``--target`` symbols per minute.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+
+from app.services.kline_cache import KlineCache
+from app.services.pattern_analyzer import PatternAnalyzer
+from app.services.scanner import run_scan_cycle
+from app.services.universe import QUOTE_ASSETS, TIERS, Universe
+from benchmarks.load import build_offline_services, make_offline_app
+from benchmarks.synthetic import make_universe
+
+# Documented throughput target of universe mode (see README)
+TARGET_SYMBOLS_PER_MINUTE = 2000
+
+def run_universe(symbol_count, bars=100, latency=0.0, workers=16, seed=0):
+    """Scan a ``symbol_count`` universe once; returns throughput figures"""
+    app = make_offline_app()
+    frames = make_universe(symbol_count, n=bars, seed=seed, quote_assets=QUOTE_ASSETS)
+    binance_service, telegram_service = build_offline_services(frames, latency=latency, seed=seed)
+    universe = Universe(binance_service, QUOTE_ASSETS, TIERS)
+    kline_cache = KlineCache(binance_service, interval='1h', max_bars=bars)
+
+    period = max(every for _, every in TIERS)
+    visited = set()
+    for cycle in range(period):
+        visited.update(universe.due(cycle))
+    symbols = universe.ranked()
+
+    with app.app_context():
+        start = time.perf_counter()
+        new_patterns = run_scan_cycle(
+            binance_service, PatternAnalyzer(), telegram_service, symbols=symbols,
+            kline_cache=kline_cache, fetch_workers=workers
+        )
+        seconds = time.perf_counter() - start
+
+    return {
+        'symbols': len(symbols),
+        'workers': workers,
+        'latency': latency,
+        'scan_seconds': seconds,
+        'symbols_per_minute': len(symbols) / seconds * 60 if seconds else None,
+        'new_patterns': len(new_patterns),
+        'api_calls': binance_service.client.calls,
+        'tiers': universe.summary()['tiers'],
+        'rotation_complete': visited == set(symbols),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Universe mode throughput check')
+    parser.add_argument('--symbols', type=int, default=2400)
+    parser.add_argument('--bars', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds per Binance call')
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--target', type=float, default=TARGET_SYMBOLS_PER_MINUTE,
+                        help='Minimum symbols per minute')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    result = run_universe(args.symbols, args.bars, args.latency, args.workers, args.seed)
+    print(f"{result['symbols']} symbols in {result['scan_seconds']:.1f}s: "
+          f"{result['symbols_per_minute']:.0f} symbols/min (target {args.target:.0f}), "
+          f"tiers {[(t['size'], t['every']) for t in result['tiers']]}, "
+          f"rotation {'complete' if result['rotation_complete'] else 'INCOMPLETE'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+    ok = result['symbols_per_minute'] >= args.target and result['rotation_complete']
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
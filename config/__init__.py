@@ -11,6 +11,9 @@ class BaseConfig:
     # Database
     SQLALCHEMY_DATABASE_URI = 'sqlite:///crypto_scanner.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Scanner workers in other processes write to the same SQLite file;
+    # wait for their locks instead of failing after the 5 s default
+    SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
     
     # Binance
     BINANCE_API_KEY = os.getenv('BINANCE_API_KEY')
@@ -23,3 +26,63 @@ class BaseConfig:
     # Scanner Settings
     SCAN_INTERVAL = 3600  # 1 hour in seconds
     TOP_COINS_LIMIT = 100  # Number of top coins to scan
+    
+    # Multi-timeframe: only the base interval is fetched from Binance, the
+    # other timeframes are resampled locally (e.g. SCAN_TIMEFRAMES=1h,4h,1d)
+    SCAN_BASE_INTERVAL = os.getenv('SCAN_BASE_INTERVAL', '1h')
+    SCAN_TIMEFRAMES = os.getenv('SCAN_TIMEFRAMES', '1h').split(',')
+    SCAN_BARS = 100  # Candles analysed per timeframe
+    # Memory budget of cached kline histories; least recently used symbols
+    # are evicted beyond it (0 = unlimited)
+    KLINE_CACHE_MAX_MB = int(os.getenv('KLINE_CACHE_MAX_MB', '256'))
+    # Kline histories imported from exchange archives
+    # (python -m scripts.import_klines); empty disables the store
+    KLINE_STORE_PATH = os.getenv('KLINE_STORE_PATH', 'instance/klines')
+    SCAN_FETCH_WORKERS = int(os.getenv('SCAN_FETCH_WORKERS', '8'))  # Symbols fetched concurrently
+    
+    # Universe mode: scan every trading pair of UNIVERSE_QUOTE_ASSETS instead
+    # of the top 100 USDT pairs. UNIVERSE_TIERS is "size:every" per tier by
+    # quote volume ("*" = the rest), e.g. the top 100 every cycle, the next
+    # 400 every 4th cycle and the rest every 24th.
+    UNIVERSE_MODE = os.getenv('UNIVERSE_MODE', 'false').lower() == 'true'
+    UNIVERSE_QUOTE_ASSETS = os.getenv('UNIVERSE_QUOTE_ASSETS', 'USDT,FDUSD,BTC').split(',')
+    UNIVERSE_TIERS = os.getenv('UNIVERSE_TIERS', '100:1,400:4,*:24')
+    # Adaptive scanning: every SCAN_TICK seconds only the symbols that are
+    # due are scanned; a symbol's interval shrinks from SCAN_MAX_INTERVAL to
+    # SCAN_MIN_INTERVAL with its volatility, volume surge and proximity to
+    # an open pattern's entry, within SCAN_WEIGHT_BUDGET request weight per
+    # minute. The top symbols list (outside universe mode) is refreshed every
+    # SCAN_CANDIDATES_TTL seconds and charged to the same budget. Symbols
+    # are rated where they are scanned, so with SCAN_QUEUE they are all
+    # treated as hot (still within the budget).
+    SCAN_ADAPTIVE = os.getenv('SCAN_ADAPTIVE', 'false').lower() == 'true'
+    SCAN_TICK = int(os.getenv('SCAN_TICK', '60'))
+    SCAN_MIN_INTERVAL = int(os.getenv('SCAN_MIN_INTERVAL', '300'))
+    SCAN_MAX_INTERVAL = int(os.getenv('SCAN_MAX_INTERVAL', '14400'))
+    SCAN_WEIGHT_BUDGET = int(os.getenv('SCAN_WEIGHT_BUDGET', '1200'))
+    SCAN_CANDIDATES_TTL = int(os.getenv('SCAN_CANDIDATES_TTL', '300'))
+    # Sharded scanning: the web app only publishes each cycle as shards of
+    # SCAN_SHARD_SIZE symbols to the scan_job table, and scanner workers
+    # (python -m scripts.scan_worker) claim them under a SCAN_JOB_LEASE
+    # second lease, retried up to SCAN_JOB_ATTEMPTS times
+    SCAN_QUEUE = os.getenv('SCAN_QUEUE', 'false').lower() == 'true'
+    SCAN_SHARD_SIZE = int(os.getenv('SCAN_SHARD_SIZE', '50'))
+    SCAN_JOB_LEASE = int(os.getenv('SCAN_JOB_LEASE', '120'))
+    SCAN_JOB_ATTEMPTS = int(os.getenv('SCAN_JOB_ATTEMPTS', '3'))
+    ALERT_POLL_INTERVAL = int(os.getenv('ALERT_POLL_INTERVAL', '10'))  # Seconds between price polls for alerts
+    
+    # Detector window sizes; several values enable multi-scale detection
+    # (e.g. PATTERN_SCALES=10,20,40)
+    PATTERN_SCALES = [int(s) for s in os.getenv('PATTERN_SCALES', '20').split(',')]
+    # Report every double/triple top/bottom and H&S formed in the last
+    # PATTERN_LOOKBACK candles, not only the one on the latest extrema
+    PATTERN_EXHAUSTIVE = os.getenv('PATTERN_EXHAUSTIVE', 'false').lower() == 'true'
+    PATTERN_LOOKBACK = int(os.getenv('PATTERN_LOOKBACK', '500'))
+    # Skip detectors whose necessary conditions (extrema counts, trendline
+    # slopes, trend change) fail on a frame; results are unchanged
+    PATTERN_SCREENING = os.getenv('PATTERN_SCREENING', 'true').lower() == 'true'
+    # Detector thresholds written by the parameter sweep (scripts.sweep_params);
+    # the built-in defaults apply while the file does not exist
+    PATTERN_PARAMS_PATH = os.getenv('PATTERN_PARAMS_PATH', 'instance/detector_params.json')
+    # Frames remembered by the analysis memo (0 disables it)
+    ANALYSIS_MEMO_SIZE = int(os.getenv('ANALYSIS_MEMO_SIZE', '4096'))
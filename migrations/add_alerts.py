@@ -0,0 +1,36 @@
+"""Add alert table for standing price alerts"""
+import sqlite3
+
+def upgrade():
+    """Create alert table"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS alert (
+            id INTEGER PRIMARY KEY,
+            symbol VARCHAR(20) NOT NULL,
+            direction VARCHAR(10) NOT NULL,
+            entry_price REAL NOT NULL,
+            stop_loss REAL NOT NULL,
+            take_profit REAL NOT NULL,
+            risk_reward_ratio REAL,
+            status VARCHAR(20) NOT NULL DEFAULT "active",
+            created_at DATETIME NOT NULL,
+            triggered_at TIMESTAMP,
+            exit_price REAL,
+            closed_at TIMESTAMP
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_alert_symbol ON alert (symbol)')
+
+    conn.commit()
+    conn.close()
+
+def downgrade():
+    """Drop alert table"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+    cursor.execute('DROP TABLE IF EXISTS alert')
+    conn.commit()
+    conn.close()
@@ -0,0 +1,59 @@
+"""Add trade outcome fields to Pattern model"""
+import sqlite3
+
+def upgrade():
+    """Add columns recording fills and exits of pattern setups"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+    
+    # Add new columns
+    cursor.execute('ALTER TABLE pattern ADD COLUMN outcome_status TEXT NOT NULL DEFAULT "open"')
+    cursor.execute('ALTER TABLE pattern ADD COLUMN filled_at TIMESTAMP')
+    cursor.execute('ALTER TABLE pattern ADD COLUMN exit_price REAL')
+    cursor.execute('ALTER TABLE pattern ADD COLUMN closed_at TIMESTAMP')
+    
+    conn.commit()
+    conn.close()
+
+def downgrade():
+    """Remove outcome columns"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+    
+    # Since SQLite doesn't support DROP COLUMN, we need to recreate the table
+    cursor.execute('''
+        CREATE TABLE pattern_new (
+            id INTEGER PRIMARY KEY,
+            symbol VARCHAR(20) NOT NULL,
+            pattern_type VARCHAR(50) NOT NULL,
+            timeframe VARCHAR(10) NOT NULL DEFAULT '1h',
+            price REAL NOT NULL,
+            confidence REAL NOT NULL,
+            timestamp DATETIME NOT NULL,
+            description TEXT,
+            entry_price REAL,
+            take_profit REAL,
+            stop_loss REAL,
+            risk_reward_ratio REAL,
+            retest_status TEXT NOT NULL DEFAULT "none",
+            retest_price REAL,
+            retest_timestamp TIMESTAMP,
+            retest_description TEXT,
+            CONSTRAINT _symbol_pattern_timeframe_timestamp_uc
+                UNIQUE (symbol, pattern_type, timeframe, timestamp)
+        )
+    ''')
+    
+    cursor.execute('''
+        INSERT INTO pattern_new 
+        SELECT id, symbol, pattern_type, timeframe, price, confidence, timestamp, description,
+               entry_price, take_profit, stop_loss, risk_reward_ratio,
+               retest_status, retest_price, retest_timestamp, retest_description
+        FROM pattern
+    ''')
+    
+    cursor.execute('DROP TABLE pattern')
+    cursor.execute('ALTER TABLE pattern_new RENAME TO pattern')
+    
+    conn.commit()
+    conn.close()
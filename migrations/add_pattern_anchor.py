@@ -0,0 +1,72 @@
+"""Add anchor column to Pattern model
+
+The unique constraint now includes the open times of the formation's
+pivots, so several formations of one pattern type found by the exhaustive
+mode on the same symbol and timeframe are all stored. SQLite cannot alter
+constraints, so the table is rebuilt.
+"""
+import sqlite3
+
+COLUMNS = '''id, symbol, pattern_type, timeframe, price, confidence, timestamp, description,
+             entry_price, take_profit, stop_loss, risk_reward_ratio,
+             retest_status, retest_price, retest_timestamp, retest_description,
+             outcome_status, filled_at, exit_price, closed_at'''
+
+def _rebuild(cursor, anchor):
+    """Recreate the pattern table with or without the anchor column"""
+    if anchor:
+        extra = '''anchor VARCHAR(100) NOT NULL DEFAULT '',
+            CONSTRAINT _symbol_pattern_timeframe_timestamp_anchor_uc
+                UNIQUE (symbol, pattern_type, timeframe, timestamp, anchor)'''
+    else:
+        extra = '''CONSTRAINT _symbol_pattern_timeframe_timestamp_uc
+                UNIQUE (symbol, pattern_type, timeframe, timestamp)'''
+    cursor.execute(f'''
+        CREATE TABLE pattern_new (
+            id INTEGER PRIMARY KEY,
+            symbol VARCHAR(20) NOT NULL,
+            pattern_type VARCHAR(50) NOT NULL,
+            timeframe VARCHAR(10) NOT NULL DEFAULT '1h',
+            price REAL NOT NULL,
+            confidence REAL NOT NULL,
+            timestamp DATETIME NOT NULL,
+            description TEXT,
+            entry_price REAL,
+            take_profit REAL,
+            stop_loss REAL,
+            risk_reward_ratio REAL,
+            retest_status TEXT NOT NULL DEFAULT "none",
+            retest_price REAL,
+            retest_timestamp TIMESTAMP,
+            retest_description TEXT,
+            outcome_status TEXT NOT NULL DEFAULT "open",
+            filled_at TIMESTAMP,
+            exit_price REAL,
+            closed_at TIMESTAMP,
+            {extra}
+        )
+    ''')
+    cursor.execute(f'INSERT INTO pattern_new ({COLUMNS}) SELECT {COLUMNS} FROM pattern')
+    cursor.execute('DROP TABLE pattern')
+    cursor.execute('ALTER TABLE pattern_new RENAME TO pattern')
+
+def upgrade():
+    """Rebuild pattern table with an anchor column"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+    _rebuild(cursor, anchor=True)
+    conn.commit()
+    conn.close()
+
+def downgrade():
+    """Remove anchor column; formations sharing a key are dropped but one"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+    cursor.execute('''
+        DELETE FROM pattern WHERE id NOT IN (
+            SELECT MIN(id) FROM pattern GROUP BY symbol, pattern_type, timeframe, timestamp
+        )
+    ''')
+    _rebuild(cursor, anchor=False)
+    conn.commit()
+    conn.close()
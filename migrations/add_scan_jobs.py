@@ -0,0 +1,39 @@
+"""Add scan_job table for the sharded scan queue"""
+import sqlite3
+
+def upgrade():
+    """Create scan_job table"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scan_job (
+            id INTEGER PRIMARY KEY,
+            cycle INTEGER NOT NULL,
+            shard INTEGER NOT NULL,
+            symbols TEXT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            worker VARCHAR(100),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_until DATETIME,
+            heartbeat_at DATETIME,
+            created_at DATETIME NOT NULL,
+            started_at DATETIME,
+            finished_at DATETIME,
+            patterns INTEGER,
+            error TEXT,
+            CONSTRAINT _cycle_shard_uc UNIQUE (cycle, shard)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_scan_job_status ON scan_job (status)')
+
+    conn.commit()
+    conn.close()
+
+def downgrade():
+    """Drop scan_job table"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+    cursor.execute('DROP TABLE IF EXISTS scan_job')
+    conn.commit()
+    conn.close()
@@ -0,0 +1,34 @@
+"""Add subscription table for per-chat notification filters"""
+import sqlite3
+
+def upgrade():
+    """Create subscription table"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subscription (
+            id INTEGER PRIMARY KEY,
+            chat_id VARCHAR(50) NOT NULL,
+            symbols TEXT,
+            pattern_types TEXT,
+            timeframes TEXT,
+            directions TEXT,
+            min_confidence REAL NOT NULL DEFAULT 0,
+            min_risk_reward REAL,
+            active BOOLEAN NOT NULL DEFAULT 1,
+            created_at DATETIME NOT NULL
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_subscription_chat_id ON subscription (chat_id)')
+
+    conn.commit()
+    conn.close()
+
+def downgrade():
+    """Drop subscription table"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+    cursor.execute('DROP TABLE IF EXISTS subscription')
+    conn.commit()
+    conn.close()
@@ -0,0 +1,76 @@
+"""Add timeframe column to Pattern model
+
+The unique constraint now includes the timeframe, so the same pattern type
+can be stored for one symbol on several timeframes at the same time.
+SQLite cannot alter constraints, so the table is rebuilt.
+"""
+import sqlite3
+
+COLUMNS = '''id, symbol, pattern_type, price, confidence, timestamp, description,
+             entry_price, take_profit, stop_loss, risk_reward_ratio,
+             retest_status, retest_price, retest_timestamp, retest_description'''
+
+def upgrade():
+    """Rebuild pattern table with a timeframe column"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE pattern_new (
+            id INTEGER PRIMARY KEY,
+            symbol VARCHAR(20) NOT NULL,
+            pattern_type VARCHAR(50) NOT NULL,
+            timeframe VARCHAR(10) NOT NULL DEFAULT '1h',
+            price REAL NOT NULL,
+            confidence REAL NOT NULL,
+            timestamp DATETIME NOT NULL,
+            description TEXT,
+            entry_price REAL,
+            take_profit REAL,
+            stop_loss REAL,
+            risk_reward_ratio REAL,
+            retest_status TEXT NOT NULL DEFAULT "none",
+            retest_price REAL,
+            retest_timestamp TIMESTAMP,
+            retest_description TEXT,
+            CONSTRAINT _symbol_pattern_timeframe_timestamp_uc
+                UNIQUE (symbol, pattern_type, timeframe, timestamp)
+        )
+    ''')
+    cursor.execute(f'INSERT INTO pattern_new ({COLUMNS}) SELECT {COLUMNS} FROM pattern')
+    cursor.execute('DROP TABLE pattern')
+    cursor.execute('ALTER TABLE pattern_new RENAME TO pattern')
+
+    conn.commit()
+    conn.close()
+
+def downgrade():
+    """Remove timeframe column"""
+    conn = sqlite3.connect('instance/app.db')
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE pattern_old (
+            id INTEGER PRIMARY KEY,
+            symbol VARCHAR(20) NOT NULL,
+            pattern_type VARCHAR(50) NOT NULL,
+            price REAL NOT NULL,
+            confidence REAL NOT NULL,
+            timestamp DATETIME NOT NULL,
+            description TEXT,
+            entry_price REAL,
+            take_profit REAL,
+            stop_loss REAL,
+            risk_reward_ratio REAL,
+            retest_status TEXT NOT NULL DEFAULT "none",
+            retest_price REAL,
+            retest_timestamp TIMESTAMP,
+            retest_description TEXT
+        )
+    ''')
+    cursor.execute(f'INSERT INTO pattern_old ({COLUMNS}) SELECT {COLUMNS} FROM pattern')
+    cursor.execute('DROP TABLE pattern')
+    cursor.execute('ALTER TABLE pattern_old RENAME TO pattern')
+
+    conn.commit()
+    conn.close()
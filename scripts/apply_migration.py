@@ -1,5 +1,6 @@
 import sqlite3
 import os
+import sys
 import importlib.util
 
 def load_migration(file_path):
@@ -9,29 +10,30 @@ def load_migration(file_path):
     spec.loader.exec_module(migration)
     return migration
 
-def apply_migration():
-    """Apply migration and clean up old data"""
+def apply_migration(name='add_retest_fields', cleanup=True):
+    """Apply migration and optionally clean up old data"""
     try:
         # Get migration file
-        migration_file = os.path.join('migrations', 'add_retest_fields.py')
+        migration_file = os.path.join('migrations', f'{name}.py')
         if not os.path.exists(migration_file):
             print("Migration file not found!")
             return
 
         # Load and run migration
         migration = load_migration(migration_file)
-        print("Running migration upgrade...")
+        print(f"Running migration upgrade {name}...")
         migration.upgrade()
         print("Migration completed successfully")
 
-        # Clean up old data using SQLite directly
-        print("Cleaning up old patterns...")
-        conn = sqlite3.connect('instance/app.db')
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM pattern")
-        conn.commit()
-        conn.close()
-        print("Old patterns deleted")
+        if cleanup:
+            # Clean up old data using SQLite directly
+            print("Cleaning up old patterns...")
+            conn = sqlite3.connect('instance/app.db')
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM pattern")
+            conn.commit()
+            conn.close()
+            print("Old patterns deleted")
 
         print("Migration and cleanup completed successfully!")
 
@@ -40,4 +42,8 @@ def apply_migration():
         
 
 if __name__ == '__main__':
-    apply_migration()
+    if len(sys.argv) > 1:
+        # Later migrations keep existing data: python scripts/apply_migration.py add_timeframe
+        apply_migration(sys.argv[1], cleanup=False)
+    else:
+        apply_migration()
@@ -0,0 +1,35 @@
+"""Import exchange kline archives into the local kline store.
+
+Usage:
+    python -m scripts.import_klines data/spot/monthly/klines/BTCUSDT/1h --workers 4
+
+Takes Binance public data dumps (``BTCUSDT-1h-2024-01.zip`` monthly or
+``BTCUSDT-1h-2024-01-15.zip`` daily, or the CSVs inside) and directories
+of them. Prints a JSON report per series with duplicates and gaps.
+"""
+import argparse
+import json
+import logging
+
+from app.services.kline_archive import import_archives
+from app.services.kline_codec import CODECS
+from app.services.kline_store import KlineStore
+from config import BaseConfig
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help='archive files or directories')
+    parser.add_argument('--store', default=BaseConfig.KLINE_STORE_PATH or 'instance/klines',
+                        help='kline store directory')
+    parser.add_argument('--codec', choices=sorted(CODECS), default='zlib',
+                        help='block compression (lzma: smaller, slower)')
+    parser.add_argument('--workers', type=int, default=4, help='files decoded in parallel')
+    parser.add_argument('--chunk-rows', type=int, default=100_000, help='CSV rows decoded at a time')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    reports = import_archives(args.paths, KlineStore(args.store, codec=args.codec), args.workers, args.chunk_rows)
+    print(json.dumps(reports, indent=2))
+
+if __name__ == '__main__':
+    main()
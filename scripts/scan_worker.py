@@ -0,0 +1,35 @@
+"""Scanner worker processes for the sharded scan queue.
+
+Usage:
+    python -m scripts.scan_worker --processes 4
+
+Each process claims scan jobs published by the web app (``SCAN_QUEUE=true``)
+from the ``scan_job`` table and runs them. Workers on other hosts only need
+the same ``SQLALCHEMY_DATABASE_URI``.
+"""
+import argparse
+import logging
+import os
+
+from app.services.scan_worker import run_workers
+
+def create_app():
+    """App configured from FLASK_ENV, like run.py"""
+    from app import create_app
+    if os.getenv('FLASK_ENV', 'production') == 'development':
+        from config.development import DevelopmentConfig as config
+    else:
+        from config.production import ProductionConfig as config
+    return create_app(config)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=1, help='worker processes on this host')
+    parser.add_argument('--poll', type=float, default=5.0, help='seconds between polls of an empty queue')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(message)s')
+    run_workers(create_app, args.processes, args.poll)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Tune detector thresholds by backtesting them on stored kline history.
+
+Usage:
+    python -m scripts.sweep_params --param tolerance=0.01,0.02,0.03 --param flag_trend=0.03,0.05,0.08
+    python -m scripts.sweep_params --random 40 --param tolerance=0.01:0.04 --param compression=0.1:0.4
+
+Histories come from the local kline store (see scripts.import_klines) and
+are loaded once into shared memory for the worker processes. Every set is
+scored by the outcomes of the setups it detects; the leaderboard is
+written to ``--output`` and the best set to PATTERN_PARAMS_PATH, where the
+scanner picks it up on its next start.
+"""
+import argparse
+import json
+import logging
+import os
+
+from app.services.kline_store import KlineStore
+from app.services.param_sweep import (
+    METRICS, SharedHistory, grid, load_histories, parse_space, random_search, run_sweep, save_best
+)
+from config import BaseConfig
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--param', action='append', default=[], metavar='NAME=VALUES',
+                        help='choices (a,b,c) or, with --random, a range (low:high)')
+    parser.add_argument('--random', type=int, metavar='N', help='random search of N sets instead of a grid')
+    parser.add_argument('--seed', type=int, help='random search seed')
+    parser.add_argument('--store', default=BaseConfig.KLINE_STORE_PATH or 'instance/klines',
+                        help='kline store directory')
+    parser.add_argument('--interval', default=BaseConfig.SCAN_BASE_INTERVAL, help='stored interval to test on')
+    parser.add_argument('--symbols', help='comma separated symbols (default: all stored)')
+    parser.add_argument('--history', type=int, default=5000, help='latest candles per symbol')
+    parser.add_argument('--bars', type=int, default=BaseConfig.SCAN_BARS, help='candles analyzed per scan')
+    parser.add_argument('--step', type=int, default=24, help='candles between scans')
+    parser.add_argument('--horizon', type=int, default=120, help='candles before an unresolved setup expires')
+    parser.add_argument('--metric', choices=METRICS, default='expectancy', help='leaderboard order')
+    parser.add_argument('--min-trades', type=int, default=20, help='resolved trades needed to be scored')
+    parser.add_argument('--workers', type=int, default=4, help='worker processes')
+    parser.add_argument('--output', default='instance/sweep_leaderboard.json', help='leaderboard file')
+    parser.add_argument('--best', default=BaseConfig.PATTERN_PARAMS_PATH,
+                        help='where to write the best parameter set')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    space = parse_space(args.param)
+    candidates = random_search(space, args.random, args.seed) if args.random else grid(space)
+
+    symbols = args.symbols.split(',') if args.symbols else None
+    histories = load_histories(KlineStore(args.store), args.interval, symbols, args.history,
+                               min_bars=args.bars + args.step)
+    if not histories:
+        parser.error(f"No {args.interval} history in {args.store}")
+    history = SharedHistory.create(histories)
+    del histories
+    try:
+        leaderboard = run_sweep(
+            history, candidates, workers=args.workers,
+            analyzer_options={
+                'scales': BaseConfig.PATTERN_SCALES,
+                'exhaustive': BaseConfig.PATTERN_EXHAUSTIVE,
+                'lookback': BaseConfig.PATTERN_LOOKBACK,
+            },
+            bars=args.bars, step=args.step, horizon=args.horizon,
+            metric=args.metric, min_trades=args.min_trades
+        )
+    finally:
+        history.close()
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(leaderboard, f, indent=2)
+    best = save_best(args.best, leaderboard, args.metric, {
+        'interval': args.interval, 'symbols': len(history), 'candidates': len(leaderboard)
+    })
+    for entry in leaderboard[:10]:
+        print(f"{entry['rank']:>3}  score={entry['score']}  trades={entry['trades']}  "
+              f"win_rate={entry['win_rate']}  {'(baseline) ' if entry['baseline'] else ''}{entry['params']}")
+    if best:
+        print(f"Best set written to {args.best}")
+
+if __name__ == '__main__':
+    main()
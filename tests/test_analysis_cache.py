@@ -0,0 +1,31 @@
+import pandas as pd
+
+from app.services.analysis_cache import AnalysisCache
+
+NOW = pd.Timestamp('2024-01-10').timestamp()
+
+class FakeBinance:
+    def get_klines(self, symbol, interval='1h', limit=100):
+        # The daily candle opened today is still forming: live until midnight
+        return pd.DataFrame({
+            'timestamp': pd.date_range(end='2024-01-10', periods=3, freq='D'),
+            'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5, 'volume': 10.0,
+        })
+
+class FakeAnalyzer:
+    def analyze_all_patterns(self, df):
+        return []
+
+def test_live_entries_stay_bounded():
+    cache = AnalysisCache(FakeBinance(), FakeAnalyzer(), max_entries=4, clock=lambda: NOW)
+    symbols = [f'SYM{i}USDT' for i in range(10)]
+    for symbol in symbols:
+        cache.get(symbol, '1d')
+
+    assert cache.stats()['entries'] == 4
+    assert cache.stats()['evictions'] == 6
+    # The most recently stored symbols are the ones kept
+    cache.get(symbols[-1], '1d')
+    assert cache.hits == 1
+    cache.get(symbols[0], '1d')
+    assert cache.misses == 11